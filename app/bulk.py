@@ -0,0 +1,57 @@
+import argparse
+import sys
+
+import orjson
+
+from app.database import SessionLocal
+from app.services.constants import BULK_FORMATS
+from app.services.stats_service import StatsService
+
+# Выгрузка и загрузка player_stats из командной строки — тот же формат, что у
+# GET /stats/export и POST /stats/import, но без HTTP между файлом и базой:
+#
+#     python -m app.bulk export --server-name lobby --format csv > lobby.csv
+#     python -m app.bulk import lobby.csv --format csv
+#
+# Файл «-» — stdin. Итог загрузки печатается в stdout одной строкой JSON.
+
+
+def _export(args):
+    with SessionLocal() as db:
+        StatsService.export_stats(db, args.server_name, args.format, sys.stdout.buffer)
+    sys.stdout.buffer.flush()
+
+
+def _import(args):
+    source = sys.stdin.buffer if args.file == "-" else open(args.file, "rb")
+    try:
+        with SessionLocal() as db:
+            result = StatsService.import_stats(db, source, args.format)
+    except ValueError as exc:
+        raise SystemExit(f"Некорректные строки загрузки: {exc.args[1]}")
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+    print(orjson.dumps(result).decode())
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.bulk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="выгрузить player_stats в stdout")
+    export.add_argument("--server-name", help="только этот сервер (по умолчанию все)")
+    export.add_argument("--format", choices=BULK_FORMATS, default="ndjson")
+    export.set_defaults(run=_export)
+
+    load = commands.add_parser("import", help="загрузить выгрузку в player_stats")
+    load.add_argument("file", help="путь к файлу или - для stdin")
+    load.add_argument("--format", choices=BULK_FORMATS, default="ndjson")
+    load.set_defaults(run=_import)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
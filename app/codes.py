@@ -3,12 +3,21 @@ from enum import Enum
 
 class Codes(str, Enum):
     LIVE_OK = "LIVE_OK"
+    READY_OK = "READY_OK"
+    NOT_READY = "NOT_READY"
 
     STATS_CREATED = "STATS_CREATED"
     STATS_UPDATED = "STATS_UPDATED"
+    STATS_ACCEPTED = "STATS_ACCEPTED"
     STATS_FETCHED = "STATS_FETCHED"
     STATS_LIST_FETCHED = "STATS_LIST_FETCHED"
+    STATS_IMPORTED = "STATS_IMPORTED"
 
     STATS_NOT_FOUND = "STATS_NOT_FOUND"
     STATS_ALREADY_EXISTS = "STATS_ALREADY_EXISTS"
+    STATS_BUFFER_FULL = "STATS_BUFFER_FULL"
+    DELTA_OUT_OF_RANGE = "DELTA_OUT_OF_RANGE"
+    INVALID_CURSOR = "INVALID_CURSOR"
+    INVALID_WINDOW = "INVALID_WINDOW"
+    IMPORT_INVALID_ROWS = "IMPORT_INVALID_ROWS"
     VALIDATION_ERROR = "VALIDATION_ERROR"
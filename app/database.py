@@ -1,8 +1,149 @@
-from sqlalchemy import create_engine
+import asyncio
+import re
+import time
+from contextlib import AsyncExitStack
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.metrics import (
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_POOL_IN_USE,
+    DB_POOL_SATURATION,
+    DB_POOL_TIMEOUTS,
+    DB_STATEMENT_SECONDS
+)
 from app.settings import settings
 
-engine = create_engine(settings.database_url)
+
+# Пул, который замеряет ожидание соединения: очередь на checkout
+# видна в метриках раньше, чем в латентности запросов
+class _TimedCheckout:
+    metrics_label = ""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.metrics_label).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_S,
+        "pool_recycle": settings.DB_POOL_RECYCLE_S,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+
+
+def _sync_connect_args() -> dict:
+    # psycopg2 не использует серверные prepared statements, для PgBouncer
+    # достаточно не отправлять startup-параметр options
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER:
+        return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+
+def _async_connect_args() -> dict:
+    if settings.DB_PGBOUNCER:
+        # asyncpg по умолчанию кэширует именованные prepared statements на соединении,
+        # а PgBouncer отдаёт каждую транзакцию любому серверному соединению
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"
+        }
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    # asyncpg исполняет запросы prepared statements, и через пять вызовов Postgres может
+    # перейти на generic-план: он отсекает секции player_stats только при исполнении,
+    # заблокировав перед этим все. Custom-план строится под конкретный server_name
+    if settings.DB_CUSTOM_PLANS:
+        server_settings["plan_cache_mode"] = "force_custom_plan"
+    return {"server_settings": server_settings} if server_settings else {}
+
+
+def _watch_pool(engine, label: str):
+    capacity = max(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW, 1)
+    # engine.pool читается при каждом сборе метрик: после dispose() пул новый
+    DB_POOL_IN_USE.labels(label).set_function(lambda: engine.pool.checkedout())
+    DB_POOL_SATURATION.labels(label).set_function(lambda: engine.pool.checkedout() / capacity)
+
+
+# Метка запроса для метрик: execution_options(metrics_label=...) у запроса,
+# иначе "<глагол> <первая таблица>" — "select player_stats", "update player_stats".
+# Текст запроса в метку не попадает: число серий в Prometheus ограничено
+_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+_STATEMENT_CACHE_MAX = 1000
+_statement_histograms: dict = {}
+
+
+def statement_label(statement: str) -> str:
+    words = statement.split(None, 1)
+    if not words:
+        return "empty"
+    table = _TABLE_RE.search(statement)
+    return f"{words[0].lower()} {table.group(1)}" if table else words[0].lower()
+
+
+# Дочерняя серия гистограммы кэшируется по тексту запроса: SQLAlchemy кэширует
+# компиляцию, так что тексты повторяются, и регулярка гоняется один раз на запрос.
+# Тексты multi-row VALUES разной длины уникальны — сверх лимита метка считается заново
+def _statement_histogram(engine_label: str, statement: str, explicit: str | None):
+    key = (engine_label, explicit or statement)
+    histogram = _statement_histograms.get(key)
+    if histogram is None:
+        histogram = DB_STATEMENT_SECONDS.labels(engine_label, explicit or statement_label(statement))
+        if len(_statement_histograms) < _STATEMENT_CACHE_MAX:
+            _statement_histograms[key] = histogram
+    return histogram
+
+
+def _time_statements(engine, engine_label: str):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        _statement_histogram(
+            engine_label,
+            statement,
+            context.execution_options.get("metrics_label")
+        ).observe(time.perf_counter() - started)
+
+
+# Синхронный движок (psycopg2): gRPC-сервер, write-behind буфер, фоновые задачи
+engine = create_engine(
+    settings.database_url,
+    poolclass=TimedQueuePool,
+    connect_args=_sync_connect_args(),
+    **_pool_options()
+)
+_watch_pool(engine, TimedQueuePool.metrics_label)
+if settings.METRICS_ENABLED:
+    _time_statements(engine, TimedQueuePool.metrics_label)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -10,4 +151,33 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Асинхронный движок (asyncpg): HTTP-маршруты не занимают поток на время запроса к БД
+async_engine = create_async_engine(
+    settings.async_database_url,
+    poolclass=TimedAsyncQueuePool,
+    connect_args=_async_connect_args(),
+    **_pool_options()
+)
+_watch_pool(async_engine.sync_engine, TimedAsyncQueuePool.metrics_label)
+if settings.METRICS_ENABLED:
+    _time_statements(async_engine.sync_engine, TimedAsyncQueuePool.metrics_label)
+
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+    bind=async_engine
+)
+
+
+# Прогрев HTTP-пула: size соединений открываются одновременно и держатся, пока не открыты все,
+# — иначе пул раз за разом отдавал бы одно и то же. Первые запросы под нагрузкой
+# не платят за подключение к Postgres
+async def warm_async_pool(size: int):
+    async with AsyncExitStack() as stack:
+        connections = await asyncio.gather(
+            *(stack.enter_async_context(async_engine.connect()) for _ in range(size))
+        )
+        for conn in connections:
+            await conn.exec_driver_sql("SELECT 1")
+
 Base = declarative_base()
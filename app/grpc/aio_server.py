@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import signal
+from uuid import UUID
+
+import grpc
+from sqlalchemy.exc import DataError
+
+from app.database import AsyncSessionLocal, async_engine, engine
+from app.grpc.server import (
+    _parse_keys,
+    around_args,
+    around_response,
+    batch_get_response,
+    batch_update_response,
+    global_stats_response,
+    global_top_args,
+    grpc_address,
+    max_concurrent_rpcs,
+    out_of_range_response,
+    server_options,
+    sort_arg,
+    start_metrics_server,
+    stats_response,
+    sum_deltas,
+    window_top_args,
+    window_top_response
+)
+from app.grpc.interceptors import AsyncMetricsInterceptor
+from app.settings import settings
+from app.services.async_stats_service import AsyncStatsService
+from app.services.write_buffer import DeltaOutOfRange, write_buffer, WriteBufferFull
+
+import app.grpc.stats_pb2 as pb2
+import app.grpc.stats_pb2_grpc as pb2_grpc
+
+logger = logging.getLogger(__name__)
+
+
+# Тот же StatsService по gRPC, но на grpc.aio: RPC — корутины на одном event loop,
+# БД — AsyncSession/asyncpg. Число RPC в полёте ограничено не пулом потоков,
+# а GRPC_MAX_CONCURRENT_RPCS и пулом соединений async-движка.
+# Включается GRPC_SERVER_MODE=aio
+class AsyncStatsGrpcService(pb2_grpc.StatsServiceServicer):
+
+    async def GetStats(self, request, context):
+        async with AsyncSessionLocal() as db:
+            try:
+                if request.window:
+                    data = await AsyncStatsService.get_window_stats(
+                        db,
+                        UUID(request.user_id),
+                        request.server_name,
+                        request.window
+                    )
+                else:
+                    data = await AsyncStatsService.get_stats(
+                        db,
+                        UUID(request.user_id),
+                        request.server_name
+                    )
+            except ValueError as exc:
+                if str(exc) == "INVALID_WINDOW":
+                    context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                    context.set_details("Invalid window")
+                else:
+                    context.set_code(grpc.StatusCode.NOT_FOUND)
+                    context.set_details("Stats not found")
+                return pb2.GetStatsResponse()
+
+        return stats_response(data)
+
+    async def UpdateStats(self, request, context):
+        if write_buffer.enabled:
+            try:
+                args = (
+                    UUID(request.user_id),
+                    request.server_name,
+                    request.time_played,
+                    request.kills,
+                    request.deaths
+                )
+                # Ждать освобождения буфера на event loop нельзя — ждём в потоке
+                if not write_buffer.add(*args, wait=False):
+                    await asyncio.to_thread(write_buffer.add, *args)
+            except DeltaOutOfRange:
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details("Pending stats delta is out of INTEGER range")
+            except ValueError:
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details("Invalid user_id")
+            except WriteBufferFull:
+                context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+                context.set_details("Stats buffer is full")
+            return pb2.Empty()
+
+        async with AsyncSessionLocal() as db:
+            try:
+                await AsyncStatsService.update_stats(
+                    db,
+                    UUID(request.user_id),
+                    request.server_name,
+                    request.time_played,
+                    request.kills,
+                    request.deaths
+                )
+            except ValueError:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("Stats not found")
+
+        return pb2.Empty()
+
+    async def BatchUpdateStats(self, request, context):
+        return await self._apply_batch(request.items, context)
+
+    async def StreamUpdateStats(self, request_iterator, context):
+        return await self._apply_batch([item async for item in request_iterator], context)
+
+    async def BatchGetStats(self, request, context):
+        keys, invalid = _parse_keys(request.items)
+
+        async with AsyncSessionLocal() as db:
+            items = await AsyncStatsService.get_stats_batch(db, list(keys))
+
+        return batch_get_response(keys, invalid, items)
+
+    async def GetGlobalStats(self, request, context):
+        async with AsyncSessionLocal() as db:
+            try:
+                data = await AsyncStatsService.get_global_stats(db, UUID(request.user_id))
+            except ValueError:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("Stats not found")
+                return pb2.GlobalStatsResponse()
+
+        return global_stats_response(data)
+
+    async def GetGlobalTop(self, request, context):
+        try:
+            sort, limit = global_top_args(request)
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetGlobalTopResponse()
+
+        async with AsyncSessionLocal() as db:
+            items = await AsyncStatsService.get_global_top(db, sort, limit)
+
+        return pb2.GetGlobalTopResponse(items=[global_stats_response(data) for data in items])
+
+    async def GetWindowTop(self, request, context):
+        try:
+            async with AsyncSessionLocal() as db:
+                items, pagination = await AsyncStatsService.get_window_top_stats(
+                    db, request.server_name, *window_top_args(request)
+                )
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetWindowTopResponse()
+
+        return window_top_response(items, pagination)
+
+    async def GetRank(self, request, context):
+        try:
+            sort = sort_arg(request)
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetRankResponse()
+
+        async with AsyncSessionLocal() as db:
+            try:
+                data = await AsyncStatsService.get_rank(db, UUID(request.user_id), request.server_name, sort)
+            except ValueError:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("Stats not found")
+                return pb2.GetRankResponse()
+
+        return pb2.GetRankResponse(**data)
+
+    async def GetAround(self, request, context):
+        try:
+            sort, count = around_args(request)
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetAroundResponse()
+
+        async with AsyncSessionLocal() as db:
+            try:
+                items = await AsyncStatsService.get_around(db, UUID(request.user_id), request.server_name, sort, count)
+            except ValueError:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("Stats not found")
+                return pb2.GetAroundResponse()
+
+        return around_response(items)
+
+    @staticmethod
+    async def _apply_batch(items, context):
+        try:
+            deltas, invalid = sum_deltas(items)
+        except DeltaOutOfRange as exc:
+            return out_of_range_response(context, exc.args)
+
+        async with AsyncSessionLocal() as db:
+            try:
+                found = await AsyncStatsService.update_stats_batch(db, deltas)
+            except DataError:
+                return out_of_range_response(context)
+
+        return batch_update_response(deltas, invalid, found)
+
+
+def create_server(process_index: int = 0) -> grpc.aio.Server:
+    server = grpc.aio.server(
+        interceptors=[AsyncMetricsInterceptor()] if settings.METRICS_ENABLED else [],
+        options=server_options(),
+        maximum_concurrent_rpcs=max_concurrent_rpcs()
+    )
+    pb2_grpc.add_StatsServiceServicer_to_server(
+        AsyncStatsGrpcService(), server
+    )
+
+    server.add_insecure_port(grpc_address(process_index))
+    return server
+
+
+# Точка входа aio-процесса; порядок остановки тот же, что у serve в server.py
+async def serve(process_index: int = 0):
+    server = create_server(process_index)
+    start_metrics_server(process_index)
+    write_buffer.start()
+    await server.start()
+    logger.info("gRPC aio server started on %s", grpc_address(process_index))
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    loop.add_signal_handler(signal.SIGINT, stopping.set)
+
+    await stopping.wait()
+    await server.stop(settings.GRPC_GRACE_S)
+    await asyncio.to_thread(write_buffer.stop)
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def run(process_index: int = 0):
+    asyncio.run(serve(process_index))
@@ -0,0 +1,80 @@
+import time
+
+import grpc
+
+from app.metrics import GRPC_SERVER_SECONDS
+
+
+# Серверные интерцепторы: время каждого RPC в stats_grpc_server_seconds{method, code}.
+# Код берётся из context.code(): сервисы сообщают ошибки через set_code, а не исключением.
+# В сервисе только unary-unary и stream-unary методы — их и оборачиваем
+
+
+def _method_name(handler_call_details) -> str:
+    # "/stats.StatsService/GetStats" -> "GetStats"
+    return handler_call_details.method.rsplit("/", 1)[-1]
+
+
+def _code(context, failed: bool) -> str:
+    code = context.code()
+    if code is None:
+        return "UNKNOWN" if failed else "OK"
+    return code.name
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+
+        def timed(behavior):
+            def wrapper(request, context):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    response = behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    GRPC_SERVER_SECONDS.labels(method, _code(context, failed)).observe(
+                        time.perf_counter() - started
+                    )
+            return wrapper
+
+        if handler.unary_unary is not None:
+            return handler._replace(unary_unary=timed(handler.unary_unary))
+        if handler.stream_unary is not None:
+            return handler._replace(stream_unary=timed(handler.stream_unary))
+        return handler
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+
+        def timed(behavior):
+            async def wrapper(request, context):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    response = await behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    GRPC_SERVER_SECONDS.labels(method, _code(context, failed)).observe(
+                        time.perf_counter() - started
+                    )
+            return wrapper
+
+        if handler.unary_unary is not None:
+            return handler._replace(unary_unary=timed(handler.unary_unary))
+        if handler.stream_unary is not None:
+            return handler._replace(stream_unary=timed(handler.stream_unary))
+        return handler
@@ -1,43 +1,79 @@
-import grpc
+import logging
+import signal
 from concurrent import futures
 from uuid import UUID
 
-from app.database import SessionLocal
+import grpc
+from prometheus_client import start_http_server
+from sqlalchemy.exc import DataError
+
+from app.database import SessionLocal, engine
+from app.grpc.interceptors import MetricsInterceptor
+from app.settings import settings
+from app.services.constants import AROUND_MAX, GLOBAL_TOP_MAX, INT32_MAX, INT32_MIN, SORT_FIELDS
 from app.services.stats_service import StatsService
+from app.services.write_buffer import DeltaOutOfRange, write_buffer, WriteBufferFull
 
 import app.grpc.stats_pb2 as pb2
 import app.grpc.stats_pb2_grpc as pb2_grpc
 
+logger = logging.getLogger(__name__)
+
 
 class StatsGrpcService(pb2_grpc.StatsServiceServicer):
 
     def GetStats(self, request, context):
         db = SessionLocal()
         try:
-            data = StatsService.get_stats(
-                db,
-                UUID(request.user_id),
-                request.server_name
-            )
+            if request.window:
+                data = StatsService.get_window_stats(
+                    db,
+                    UUID(request.user_id),
+                    request.server_name,
+                    request.window
+                )
+            else:
+                data = StatsService.get_stats(
+                    db,
+                    UUID(request.user_id),
+                    request.server_name
+                )
 
-            return pb2.GetStatsResponse(
-                user_id=data["user_id"],
-                server_name=data["server_name"],
-                time_played=data["time_played"],
-                kills=data["kills"],
-                deaths=data["deaths"],
-                kd_ratio=data["kd_ratio"]
-            )
+            return stats_response(data)
 
-        except ValueError:
-            context.set_code(grpc.StatusCode.NOT_FOUND)
-            context.set_details("Stats not found")
+        except ValueError as exc:
+            if str(exc) == "INVALID_WINDOW":
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details("Invalid window")
+            else:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                context.set_details("Stats not found")
             return pb2.GetStatsResponse()
 
         finally:
             db.close()
 
     def UpdateStats(self, request, context):
+        if write_buffer.enabled:
+            try:
+                write_buffer.add(
+                    UUID(request.user_id),
+                    request.server_name,
+                    request.time_played,
+                    request.kills,
+                    request.deaths
+                )
+            except DeltaOutOfRange:
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details("Pending stats delta is out of INTEGER range")
+            except ValueError:
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details("Invalid user_id")
+            except WriteBufferFull:
+                context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+                context.set_details("Stats buffer is full")
+            return pb2.Empty()
+
         db = SessionLocal()
         try:
             StatsService.update_stats(
@@ -59,15 +95,338 @@ class StatsGrpcService(pb2_grpc.StatsServiceServicer):
         finally:
             db.close()
 
+    def BatchUpdateStats(self, request, context):
+        return self._apply_batch(request.items, context)
+
+    def StreamUpdateStats(self, request_iterator, context):
+        return self._apply_batch(request_iterator, context)
+
+    def BatchGetStats(self, request, context):
+        keys, invalid = _parse_keys(request.items)
+
+        db = SessionLocal()
+        try:
+            items = StatsService.get_stats_batch(db, list(keys))
+        finally:
+            db.close()
+
+        return batch_get_response(keys, invalid, items)
+
+    def GetGlobalStats(self, request, context):
+        db = SessionLocal()
+        try:
+            return global_stats_response(StatsService.get_global_stats(db, UUID(request.user_id)))
+        except ValueError:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details("Stats not found")
+            return pb2.GlobalStatsResponse()
+        finally:
+            db.close()
+
+    def GetGlobalTop(self, request, context):
+        try:
+            sort, limit = global_top_args(request)
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetGlobalTopResponse()
+
+        db = SessionLocal()
+        try:
+            items = StatsService.get_global_top(db, sort, limit)
+        finally:
+            db.close()
+
+        return pb2.GetGlobalTopResponse(items=[global_stats_response(data) for data in items])
+
+    def GetWindowTop(self, request, context):
+        db = SessionLocal()
+        try:
+            items, pagination = StatsService.get_window_top_stats(db, request.server_name, *window_top_args(request))
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetWindowTopResponse()
+        finally:
+            db.close()
+
+        return window_top_response(items, pagination)
+
+    def GetRank(self, request, context):
+        try:
+            sort = sort_arg(request)
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetRankResponse()
+
+        db = SessionLocal()
+        try:
+            return pb2.GetRankResponse(**StatsService.get_rank(db, UUID(request.user_id), request.server_name, sort))
+        except ValueError:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details("Stats not found")
+            return pb2.GetRankResponse()
+        finally:
+            db.close()
+
+    def GetAround(self, request, context):
+        try:
+            sort, count = around_args(request)
+        except ValueError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return pb2.GetAroundResponse()
+
+        db = SessionLocal()
+        try:
+            items = StatsService.get_around(db, UUID(request.user_id), request.server_name, sort, count)
+        except ValueError:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details("Stats not found")
+            return pb2.GetAroundResponse()
+        finally:
+            db.close()
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+        return around_response(items)
+
+# Дельты одного батча складываются по ключу и пишутся одной транзакцией,
+# ненайденные строки возвращаются в not_found. Сумма или итог вне INTEGER —
+# INVALID_ARGUMENT, батч не пишется целиком
+    @staticmethod
+    def _apply_batch(items, context):
+        try:
+            deltas, invalid = sum_deltas(items)
+        except DeltaOutOfRange as exc:
+            return out_of_range_response(context, exc.args)
+
+        db = SessionLocal()
+        try:
+            found = StatsService.update_stats_batch(db, deltas)
+        except DataError:
+            return out_of_range_response(context)
+        finally:
+            db.close()
+
+        return batch_update_response(deltas, invalid, found)
+
+
+# Сборка сообщений — общая для StatsGrpcService и AsyncStatsGrpcService (aio_server.py)
+
+def stats_response(data: dict) -> pb2.GetStatsResponse:
+    return pb2.GetStatsResponse(
+        user_id=data["user_id"],
+        server_name=data["server_name"],
+        time_played=data["time_played"],
+        kills=data["kills"],
+        deaths=data["deaths"],
+        kd_ratio=data["kd_ratio"]
+    )
+
+
+def global_stats_response(data: dict) -> pb2.GlobalStatsResponse:
+    return pb2.GlobalStatsResponse(
+        user_id=data["user_id"],
+        servers=data["servers"],
+        time_played=data["time_played"],
+        kills=data["kills"],
+        deaths=data["deaths"],
+        kd_ratio=data["kd_ratio"]
+    )
+
+
+# Пустые поля proto3 — значения по умолчанию, как у HTTP-эндпоинта
+def sort_arg(request) -> str:
+    sort = request.sort or "kills"
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+    return sort
+
+
+def global_top_args(request) -> tuple[str, int]:
+    sort = sort_arg(request)
+    limit = request.limit or 20
+    if not 1 <= limit <= GLOBAL_TOP_MAX:
+        raise ValueError(f"limit must be between 1 and {GLOBAL_TOP_MAX}")
+    return sort, limit
+
+
+# (sort, page, page_size, window) для get_window_top_stats; окно обязательно
+def window_top_args(request) -> tuple[str, int, int, str]:
+    sort = sort_arg(request)
+    page = request.page or 1
+    page_size = request.page_size or 20
+    if page < 1 or not 1 <= page_size <= GLOBAL_TOP_MAX:
+        raise ValueError(f"page must be >= 1, page_size between 1 and {GLOBAL_TOP_MAX}")
+    if not request.window:
+        raise ValueError("INVALID_WINDOW")
+    return sort, page, page_size, request.window
+
+
+def window_top_response(items: list[dict], pagination: dict) -> pb2.GetWindowTopResponse:
+    return pb2.GetWindowTopResponse(
+        items=[pb2.WindowStatsItem(**data) for data in items],
+        total=pagination["total"]
+    )
+
+
+def around_args(request) -> tuple[str, int]:
+    sort = sort_arg(request)
+    count = request.count or 10
+    if not 1 <= count <= AROUND_MAX:
+        raise ValueError(f"count must be between 1 and {AROUND_MAX}")
+    return sort, count
+
+
+def around_response(items: list[dict]) -> pb2.GetAroundResponse:
+    return pb2.GetAroundResponse(items=[
+        pb2.RankedStats(**{**data, "rank": data["rank"] or 0}) for data in items
+    ])
+
+
+def _parse_keys(items) -> tuple[dict, list]:
+    keys = {}
+    invalid = []
+    for item in items:
+        try:
+            keys[(UUID(item.user_id), item.server_name)] = None
+        except ValueError:
+            invalid.append(pb2.StatsKey(user_id=item.user_id, server_name=item.server_name))
+    return keys, invalid
+
+
+# Сумма дельт ключа должна помещаться в INTEGER, иначе DataError сорвал бы весь батч:
+# такие ключи — в DeltaOutOfRange
+def sum_deltas(items) -> tuple[dict, list]:
+    deltas = {}
+    invalid = []
+    for item in items:
+        try:
+            key = (UUID(item.user_id), item.server_name)
+        except ValueError:
+            invalid.append(pb2.StatsKey(user_id=item.user_id, server_name=item.server_name))
+            continue
+        time_played, kills, deaths = deltas.get(key, (0, 0, 0))
+        deltas[key] = (
+            time_played + item.time_played,
+            kills + item.kills,
+            deaths + item.deaths
+        )
+
+    out_of_range = [
+        key for key, delta in deltas.items()
+        if not all(INT32_MIN <= value <= INT32_MAX for value in delta)
+    ]
+    if out_of_range:
+        raise DeltaOutOfRange(*out_of_range)
+    return deltas, invalid
+
+
+# Ключей в details не больше OUT_OF_RANGE_KEYS_SHOWN: details уходит в трейлере ответа
+OUT_OF_RANGE_KEYS_SHOWN = 10
+
+
+def out_of_range_response(context, keys=()) -> pb2.BatchUpdateStatsResponse:
+    context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+    if keys:
+        shown = ", ".join(f"{user_id}/{server_name}" for user_id, server_name in keys[:OUT_OF_RANGE_KEYS_SHOWN])
+        more = f" and {len(keys) - OUT_OF_RANGE_KEYS_SHOWN} more" if len(keys) > OUT_OF_RANGE_KEYS_SHOWN else ""
+        context.set_details(f"Stats delta is out of INTEGER range: {shown}{more}")
+    else:
+        context.set_details("Stats value is out of INTEGER range")
+    return pb2.BatchUpdateStatsResponse()
+
+
+def batch_update_response(deltas: dict, invalid: list, found: set) -> pb2.BatchUpdateStatsResponse:
+    return pb2.BatchUpdateStatsResponse(
+        updated=len(found),
+        not_found=invalid + [
+            pb2.StatsKey(user_id=str(user_id), server_name=server_name)
+            for user_id, server_name in deltas
+            if (user_id, server_name) not in found
+        ]
+    )
+
+
+def batch_get_response(keys: dict, invalid: list, items: list[dict]) -> pb2.BatchGetStatsResponse:
+    found = {(data["user_id"], data["server_name"]) for data in items}
+    return pb2.BatchGetStatsResponse(
+        items=[stats_response(data) for data in items],
+        not_found=invalid + [
+            pb2.StatsKey(user_id=str(user_id), server_name=server_name)
+            for user_id, server_name in keys
+            if (str(user_id), server_name) not in found
+        ]
+    )
+
+
+# Опции сервера из настроек: keepalive, размеры сообщений, SO_REUSEPORT.
+# 0 в настройке — оставить значение gRPC по умолчанию
+def server_options() -> list[tuple[str, int]]:
+    options = [("grpc.so_reuseport", 1 if settings.GRPC_REUSE_PORT else 0)]
+    for name, value in (
+        ("grpc.keepalive_time_ms", settings.GRPC_KEEPALIVE_TIME_MS),
+        ("grpc.keepalive_timeout_ms", settings.GRPC_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.http2.min_ping_interval_without_data_ms", settings.GRPC_MIN_PING_INTERVAL_MS),
+        ("grpc.max_receive_message_length", settings.GRPC_MAX_RECEIVE_MESSAGE_BYTES),
+        ("grpc.max_send_message_length", settings.GRPC_MAX_SEND_MESSAGE_BYTES)
+    ):
+        if value > 0:
+            options.append((name, value))
+    options.append(("grpc.keepalive_permit_without_calls", 1 if settings.GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS else 0))
+    return options
+
+
+# Сверх лимита одновременных RPC сервер сразу отвечает RESOURCE_EXHAUSTED, а не копит очередь
+def max_concurrent_rpcs() -> int | None:
+    return settings.GRPC_MAX_CONCURRENT_RPCS or None
+
+
+# Адрес gRPC-процесса. С SO_REUSEPORT все процессы слушают один порт и ядро
+# раздаёт им соединения, без него процесс N слушает GRPC_PORT + N
+def grpc_address(process_index: int = 0) -> str:
+    port = settings.GRPC_PORT if settings.GRPC_REUSE_PORT else settings.GRPC_PORT + process_index
+    return f"[{settings.GRPC_HOST}]:{port}" if ":" in settings.GRPC_HOST else f"{settings.GRPC_HOST}:{port}"
+
+
+def create_server(process_index: int = 0) -> grpc.Server:
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=settings.GRPC_MAX_WORKERS),
+        interceptors=[MetricsInterceptor()] if settings.METRICS_ENABLED else [],
+        options=server_options(),
+        maximum_concurrent_rpcs=max_concurrent_rpcs()
+    )
     pb2_grpc.add_StatsServiceServicer_to_server(
         StatsGrpcService(), server
     )
 
-    server.add_insecure_port("[::]:50051")
+    address = grpc_address(process_index)
+    server.add_insecure_port(address)
+    return server
+
+
+# Метрики gRPC-процесса не видны в /metrics HTTP-воркера — отдаём их на своём порту
+def start_metrics_server(process_index: int = 0):
+    if settings.METRICS_GRPC_PORT > 0:
+        start_http_server(settings.METRICS_GRPC_PORT + process_index)
+
+
+# Точка входа gRPC-процесса (см. app/launcher.py).
+# По SIGTERM/SIGINT сервер перестаёт принимать RPC, дожидается текущих
+# не дольше GRPC_GRACE_S и сбрасывает write-behind буфер
+def serve(process_index: int = 0):
+    server = create_server(process_index)
+    start_metrics_server(process_index)
+    write_buffer.start()
     server.start()
-    print("gRPC server started on port 50051")
+    logger.info("gRPC server started on %s", grpc_address(process_index))
+
+    def shutdown(signum, frame):
+        server.stop(settings.GRPC_GRACE_S)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
 
-    server.wait_for_termination()
\ No newline at end of file
+    server.wait_for_termination()
+    write_buffer.stop()
+    engine.dispose()
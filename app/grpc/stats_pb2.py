@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # NO CHECKED-IN PROTOBUF GENCODE
-# source: stats.proto
+# source: app/grpc/stats.proto
 # Protobuf Python Version: 6.31.1
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
@@ -15,7 +15,7 @@ _runtime_version.ValidateProtobufRuntimeVersion(
     31,
     1,
     '',
-    'stats.proto'
+    'app/grpc/stats.proto'
 )
 # @@protoc_insertion_point(imports)
 
@@ -24,21 +24,55 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bstats.proto\x12\x05stats\"7\n\x0fGetStatsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\"~\n\x10GetStatsResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x13\n\x0btime_played\x18\x03 \x01(\x05\x12\r\n\x05kills\x18\x04 \x01(\x05\x12\x0e\n\x06\x64\x65\x61ths\x18\x05 \x01(\x05\x12\x10\n\x08kd_ratio\x18\x06 \x01(\x01\"n\n\x12UpdateStatsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x13\n\x0btime_played\x18\x03 \x01(\x05\x12\r\n\x05kills\x18\x04 \x01(\x05\x12\x0e\n\x06\x64\x65\x61ths\x18\x05 \x01(\x05\"\x07\n\x05\x45mpty2\x83\x01\n\x0cStatsService\x12;\n\x08GetStats\x12\x16.stats.GetStatsRequest\x1a\x17.stats.GetStatsResponse\x12\x36\n\x0bUpdateStats\x12\x19.stats.UpdateStatsRequest\x1a\x0c.stats.Emptyb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x61pp/grpc/stats.proto\x12\x05stats\"G\n\x0fGetStatsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x0e\n\x06window\x18\x03 \x01(\t\"~\n\x10GetStatsResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x13\n\x0btime_played\x18\x03 \x01(\x05\x12\r\n\x05kills\x18\x04 \x01(\x05\x12\x0e\n\x06\x64\x65\x61ths\x18\x05 \x01(\x05\x12\x10\n\x08kd_ratio\x18\x06 \x01(\x01\"n\n\x12UpdateStatsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x13\n\x0btime_played\x18\x03 \x01(\x05\x12\r\n\x05kills\x18\x04 \x01(\x05\x12\x0e\n\x06\x64\x65\x61ths\x18\x05 \x01(\x05\"\x07\n\x05\x45mpty\"0\n\x08StatsKey\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\"C\n\x17\x42\x61tchUpdateStatsRequest\x12(\n\x05items\x18\x01 \x03(\x0b\x32\x19.stats.UpdateStatsRequest\"O\n\x18\x42\x61tchUpdateStatsResponse\x12\x0f\n\x07updated\x18\x01 \x01(\x05\x12\"\n\tnot_found\x18\x02 \x03(\x0b\x32\x0f.stats.StatsKey\"=\n\x14\x42\x61tchGetStatsRequest\x12%\n\x05items\x18\x01 \x03(\x0b\x32\x16.stats.GetStatsRequest\"c\n\x15\x42\x61tchGetStatsResponse\x12&\n\x05items\x18\x01 \x03(\x0b\x32\x17.stats.GetStatsResponse\x12\"\n\tnot_found\x18\x02 \x03(\x0b\x32\x0f.stats.StatsKey\"(\n\x15GetGlobalStatsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\"}\n\x13GlobalStatsResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x0f\n\x07servers\x18\x02 \x01(\x05\x12\x13\n\x0btime_played\x18\x03 \x01(\x03\x12\r\n\x05kills\x18\x04 \x01(\x03\x12\x0e\n\x06\x64\x65\x61ths\x18\x05 \x01(\x03\x12\x10\n\x08kd_ratio\x18\x06 \x01(\x01\"2\n\x13GetGlobalTopRequest\x12\x0c\n\x04sort\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\"A\n\x14GetGlobalTopResponse\x12)\n\x05items\x18\x01 \x03(\x0b\x32\x1a.stats.GlobalStatsResponse\"i\n\x13GetWindowTopRequest\x12\x13\n\x0bserver_name\x18\x01 \x01(\t\x12\x0e\n\x06window\x18\x02 \x01(\t\x12\x0c\n\x04sort\x18\x03 \x01(\t\x12\x0c\n\x04page\x18\x04 \x01(\x05\x12\x11\n\tpage_size\x18\x05 \x01(\x05\"V\n\x0fWindowStatsItem\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0btime_played\x18\x02 \x01(\x03\x12\r\n\x05kills\x18\x03 \x01(\x03\x12\x0e\n\x06\x64\x65\x61ths\x18\x04 \x01(\x03\"L\n\x14GetWindowTopResponse\x12%\n\x05items\x18\x01 \x03(\x0b\x32\x16.stats.WindowStatsItem\x12\r\n\x05total\x18\x02 \x01(\x05\"D\n\x0eGetRankRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x0c\n\x04sort\x18\x03 \x01(\t\"s\n\x0fGetRankResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x0c\n\x04sort\x18\x03 \x01(\t\x12\r\n\x05value\x18\x04 \x01(\x03\x12\x0c\n\x04rank\x18\x05 \x01(\x03\x12\x0f\n\x07players\x18\x06 \x01(\x03\"U\n\x10GetAroundRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0bserver_name\x18\x02 \x01(\t\x12\x0c\n\x04sort\x18\x03 \x01(\t\x12\r\n\x05\x63ount\x18\x04 \x01(\x05\"`\n\x0bRankedStats\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x13\n\x0btime_played\x18\x02 \x01(\x05\x12\r\n\x05kills\x18\x03 \x01(\x05\x12\x0e\n\x06\x64\x65\x61ths\x18\x04 \x01(\x05\x12\x0c\n\x04rank\x18\x05 \x01(\x03\"6\n\x11GetAroundResponse\x12!\n\x05items\x18\x01 \x03(\x0b\x32\x12.stats.RankedStats2\xcf\x05\n\x0cStatsService\x12;\n\x08GetStats\x12\x16.stats.GetStatsRequest\x1a\x17.stats.GetStatsResponse\x12\x36\n\x0bUpdateStats\x12\x19.stats.UpdateStatsRequest\x1a\x0c.stats.Empty\x12S\n\x10\x42\x61tchUpdateStats\x12\x1e.stats.BatchUpdateStatsRequest\x1a\x1f.stats.BatchUpdateStatsResponse\x12Q\n\x11StreamUpdateStats\x12\x19.stats.UpdateStatsRequest\x1a\x1f.stats.BatchUpdateStatsResponse(\x01\x12J\n\rBatchGetStats\x12\x1b.stats.BatchGetStatsRequest\x1a\x1c.stats.BatchGetStatsResponse\x12J\n\x0eGetGlobalStats\x12\x1c.stats.GetGlobalStatsRequest\x1a\x1a.stats.GlobalStatsResponse\x12G\n\x0cGetGlobalTop\x12\x1a.stats.GetGlobalTopRequest\x1a\x1b.stats.GetGlobalTopResponse\x12G\n\x0cGetWindowTop\x12\x1a.stats.GetWindowTopRequest\x1a\x1b.stats.GetWindowTopResponse\x12\x38\n\x07GetRank\x12\x15.stats.GetRankRequest\x1a\x16.stats.GetRankResponse\x12>\n\tGetAround\x12\x17.stats.GetAroundRequest\x1a\x18.stats.GetAroundResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
-_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'stats_pb2', _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.grpc.stats_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_GETSTATSREQUEST']._serialized_start=22
-  _globals['_GETSTATSREQUEST']._serialized_end=77
-  _globals['_GETSTATSRESPONSE']._serialized_start=79
-  _globals['_GETSTATSRESPONSE']._serialized_end=205
-  _globals['_UPDATESTATSREQUEST']._serialized_start=207
-  _globals['_UPDATESTATSREQUEST']._serialized_end=317
-  _globals['_EMPTY']._serialized_start=319
-  _globals['_EMPTY']._serialized_end=326
-  _globals['_STATSSERVICE']._serialized_start=329
-  _globals['_STATSSERVICE']._serialized_end=460
+  _globals['_GETSTATSREQUEST']._serialized_start=31
+  _globals['_GETSTATSREQUEST']._serialized_end=102
+  _globals['_GETSTATSRESPONSE']._serialized_start=104
+  _globals['_GETSTATSRESPONSE']._serialized_end=230
+  _globals['_UPDATESTATSREQUEST']._serialized_start=232
+  _globals['_UPDATESTATSREQUEST']._serialized_end=342
+  _globals['_EMPTY']._serialized_start=344
+  _globals['_EMPTY']._serialized_end=351
+  _globals['_STATSKEY']._serialized_start=353
+  _globals['_STATSKEY']._serialized_end=401
+  _globals['_BATCHUPDATESTATSREQUEST']._serialized_start=403
+  _globals['_BATCHUPDATESTATSREQUEST']._serialized_end=470
+  _globals['_BATCHUPDATESTATSRESPONSE']._serialized_start=472
+  _globals['_BATCHUPDATESTATSRESPONSE']._serialized_end=551
+  _globals['_BATCHGETSTATSREQUEST']._serialized_start=553
+  _globals['_BATCHGETSTATSREQUEST']._serialized_end=614
+  _globals['_BATCHGETSTATSRESPONSE']._serialized_start=616
+  _globals['_BATCHGETSTATSRESPONSE']._serialized_end=715
+  _globals['_GETGLOBALSTATSREQUEST']._serialized_start=717
+  _globals['_GETGLOBALSTATSREQUEST']._serialized_end=757
+  _globals['_GLOBALSTATSRESPONSE']._serialized_start=759
+  _globals['_GLOBALSTATSRESPONSE']._serialized_end=884
+  _globals['_GETGLOBALTOPREQUEST']._serialized_start=886
+  _globals['_GETGLOBALTOPREQUEST']._serialized_end=936
+  _globals['_GETGLOBALTOPRESPONSE']._serialized_start=938
+  _globals['_GETGLOBALTOPRESPONSE']._serialized_end=1003
+  _globals['_GETWINDOWTOPREQUEST']._serialized_start=1005
+  _globals['_GETWINDOWTOPREQUEST']._serialized_end=1110
+  _globals['_WINDOWSTATSITEM']._serialized_start=1112
+  _globals['_WINDOWSTATSITEM']._serialized_end=1198
+  _globals['_GETWINDOWTOPRESPONSE']._serialized_start=1200
+  _globals['_GETWINDOWTOPRESPONSE']._serialized_end=1276
+  _globals['_GETRANKREQUEST']._serialized_start=1278
+  _globals['_GETRANKREQUEST']._serialized_end=1346
+  _globals['_GETRANKRESPONSE']._serialized_start=1348
+  _globals['_GETRANKRESPONSE']._serialized_end=1463
+  _globals['_GETAROUNDREQUEST']._serialized_start=1465
+  _globals['_GETAROUNDREQUEST']._serialized_end=1550
+  _globals['_RANKEDSTATS']._serialized_start=1552
+  _globals['_RANKEDSTATS']._serialized_end=1648
+  _globals['_GETAROUNDRESPONSE']._serialized_start=1650
+  _globals['_GETAROUNDRESPONSE']._serialized_end=1704
+  _globals['_STATSSERVICE']._serialized_start=1707
+  _globals['_STATSSERVICE']._serialized_end=2426
 # @@protoc_insertion_point(module_scope)
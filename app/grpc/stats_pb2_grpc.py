@@ -3,7 +3,7 @@
 import grpc
 import warnings
 
-import stats_pb2 as stats__pb2
+from app.grpc import stats_pb2 as app_dot_grpc_dot_stats__pb2
 
 GRPC_GENERATED_VERSION = '1.80.0'
 GRPC_VERSION = grpc.__version__
@@ -18,7 +18,7 @@ except ImportError:
 if _version_not_supported:
     raise RuntimeError(
         f'The grpc package installed is at version {GRPC_VERSION},'
-        + ' but the generated code in stats_pb2_grpc.py depends on'
+        + ' but the generated code in app/grpc/stats_pb2_grpc.py depends on'
         + f' grpcio>={GRPC_GENERATED_VERSION}.'
         + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
         + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
@@ -36,13 +36,53 @@ class StatsServiceStub(object):
         """
         self.GetStats = channel.unary_unary(
                 '/stats.StatsService/GetStats',
-                request_serializer=stats__pb2.GetStatsRequest.SerializeToString,
-                response_deserializer=stats__pb2.GetStatsResponse.FromString,
+                request_serializer=app_dot_grpc_dot_stats__pb2.GetStatsRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.GetStatsResponse.FromString,
                 _registered_method=True)
         self.UpdateStats = channel.unary_unary(
                 '/stats.StatsService/UpdateStats',
-                request_serializer=stats__pb2.UpdateStatsRequest.SerializeToString,
-                response_deserializer=stats__pb2.Empty.FromString,
+                request_serializer=app_dot_grpc_dot_stats__pb2.UpdateStatsRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.Empty.FromString,
+                _registered_method=True)
+        self.BatchUpdateStats = channel.unary_unary(
+                '/stats.StatsService/BatchUpdateStats',
+                request_serializer=app_dot_grpc_dot_stats__pb2.BatchUpdateStatsRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.BatchUpdateStatsResponse.FromString,
+                _registered_method=True)
+        self.StreamUpdateStats = channel.stream_unary(
+                '/stats.StatsService/StreamUpdateStats',
+                request_serializer=app_dot_grpc_dot_stats__pb2.UpdateStatsRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.BatchUpdateStatsResponse.FromString,
+                _registered_method=True)
+        self.BatchGetStats = channel.unary_unary(
+                '/stats.StatsService/BatchGetStats',
+                request_serializer=app_dot_grpc_dot_stats__pb2.BatchGetStatsRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.BatchGetStatsResponse.FromString,
+                _registered_method=True)
+        self.GetGlobalStats = channel.unary_unary(
+                '/stats.StatsService/GetGlobalStats',
+                request_serializer=app_dot_grpc_dot_stats__pb2.GetGlobalStatsRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.GlobalStatsResponse.FromString,
+                _registered_method=True)
+        self.GetGlobalTop = channel.unary_unary(
+                '/stats.StatsService/GetGlobalTop',
+                request_serializer=app_dot_grpc_dot_stats__pb2.GetGlobalTopRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.GetGlobalTopResponse.FromString,
+                _registered_method=True)
+        self.GetWindowTop = channel.unary_unary(
+                '/stats.StatsService/GetWindowTop',
+                request_serializer=app_dot_grpc_dot_stats__pb2.GetWindowTopRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.GetWindowTopResponse.FromString,
+                _registered_method=True)
+        self.GetRank = channel.unary_unary(
+                '/stats.StatsService/GetRank',
+                request_serializer=app_dot_grpc_dot_stats__pb2.GetRankRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.GetRankResponse.FromString,
+                _registered_method=True)
+        self.GetAround = channel.unary_unary(
+                '/stats.StatsService/GetAround',
+                request_serializer=app_dot_grpc_dot_stats__pb2.GetAroundRequest.SerializeToString,
+                response_deserializer=app_dot_grpc_dot_stats__pb2.GetAroundResponse.FromString,
                 _registered_method=True)
 
 
@@ -61,18 +101,111 @@ class StatsServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchUpdateStats(self, request, context):
+        """Пачка дельт (например, конец матча) — одна транзакция на весь запрос
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamUpdateStats(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetGlobalStats(self, request, context):
+        """Суммы по всем серверам и глобальный топ (таблица player_totals)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetGlobalTop(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetWindowTop(self, request, context):
+        """Лидерборд сервера за окно времени (бакеты player_stats_hourly/daily)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetRank(self, request, context):
+        """Место игрока на сервере по полю сортировки
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetAround(self, request, context):
+        """Игрок и соседи сверху и снизу в лидерборде сервера
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_StatsServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
             'GetStats': grpc.unary_unary_rpc_method_handler(
                     servicer.GetStats,
-                    request_deserializer=stats__pb2.GetStatsRequest.FromString,
-                    response_serializer=stats__pb2.GetStatsResponse.SerializeToString,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.GetStatsRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.GetStatsResponse.SerializeToString,
             ),
             'UpdateStats': grpc.unary_unary_rpc_method_handler(
                     servicer.UpdateStats,
-                    request_deserializer=stats__pb2.UpdateStatsRequest.FromString,
-                    response_serializer=stats__pb2.Empty.SerializeToString,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.UpdateStatsRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.Empty.SerializeToString,
+            ),
+            'BatchUpdateStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchUpdateStats,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.BatchUpdateStatsRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.BatchUpdateStatsResponse.SerializeToString,
+            ),
+            'StreamUpdateStats': grpc.stream_unary_rpc_method_handler(
+                    servicer.StreamUpdateStats,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.UpdateStatsRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.BatchUpdateStatsResponse.SerializeToString,
+            ),
+            'BatchGetStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetStats,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.BatchGetStatsRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.BatchGetStatsResponse.SerializeToString,
+            ),
+            'GetGlobalStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetGlobalStats,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.GetGlobalStatsRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.GlobalStatsResponse.SerializeToString,
+            ),
+            'GetGlobalTop': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetGlobalTop,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.GetGlobalTopRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.GetGlobalTopResponse.SerializeToString,
+            ),
+            'GetWindowTop': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetWindowTop,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.GetWindowTopRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.GetWindowTopResponse.SerializeToString,
+            ),
+            'GetRank': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRank,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.GetRankRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.GetRankResponse.SerializeToString,
+            ),
+            'GetAround': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetAround,
+                    request_deserializer=app_dot_grpc_dot_stats__pb2.GetAroundRequest.FromString,
+                    response_serializer=app_dot_grpc_dot_stats__pb2.GetAroundResponse.SerializeToString,
             ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
@@ -100,8 +233,8 @@ class StatsService(object):
             request,
             target,
             '/stats.StatsService/GetStats',
-            stats__pb2.GetStatsRequest.SerializeToString,
-            stats__pb2.GetStatsResponse.FromString,
+            app_dot_grpc_dot_stats__pb2.GetStatsRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.GetStatsResponse.FromString,
             options,
             channel_credentials,
             insecure,
@@ -127,8 +260,224 @@ class StatsService(object):
             request,
             target,
             '/stats.StatsService/UpdateStats',
-            stats__pb2.UpdateStatsRequest.SerializeToString,
-            stats__pb2.Empty.FromString,
+            app_dot_grpc_dot_stats__pb2.UpdateStatsRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchUpdateStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stats.StatsService/BatchUpdateStats',
+            app_dot_grpc_dot_stats__pb2.BatchUpdateStatsRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.BatchUpdateStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamUpdateStats(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/stats.StatsService/StreamUpdateStats',
+            app_dot_grpc_dot_stats__pb2.UpdateStatsRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.BatchUpdateStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchGetStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stats.StatsService/BatchGetStats',
+            app_dot_grpc_dot_stats__pb2.BatchGetStatsRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.BatchGetStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetGlobalStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stats.StatsService/GetGlobalStats',
+            app_dot_grpc_dot_stats__pb2.GetGlobalStatsRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.GlobalStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetGlobalTop(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stats.StatsService/GetGlobalTop',
+            app_dot_grpc_dot_stats__pb2.GetGlobalTopRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.GetGlobalTopResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetWindowTop(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stats.StatsService/GetWindowTop',
+            app_dot_grpc_dot_stats__pb2.GetWindowTopRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.GetWindowTopResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetRank(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stats.StatsService/GetRank',
+            app_dot_grpc_dot_stats__pb2.GetRankRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.GetRankResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetAround(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stats.StatsService/GetAround',
+            app_dot_grpc_dot_stats__pb2.GetAroundRequest.SerializeToString,
+            app_dot_grpc_dot_stats__pb2.GetAroundResponse.FromString,
             options,
             channel_credentials,
             insecure,
@@ -0,0 +1,142 @@
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+
+import uvicorn
+
+from app.settings import settings
+
+# Продакшн-запуск: HTTP_WORKERS процессов uvicorn и GRPC_PROCESSES процессов gRPC,
+# каждый со своим GIL и своими пулами соединений.
+#
+#     python -m app.launcher
+#
+# uvicorn сам управляет своими воркерами и обрабатывает SIGTERM/SIGINT;
+# когда он завершился, гасим gRPC-процессы тем же SIGTERM и ждём их graceful stop.
+# Автоперезагрузки (--reload) здесь нет и не будет: она для разработки (Dockerfile-test).
+
+logger = logging.getLogger("app.launcher")
+
+# gRPC не переживает fork после инициализации, поэтому дочерние процессы — spawn
+_mp = multiprocessing.get_context("spawn")
+
+
+def _configure_logging():
+    logging.basicConfig(format="%(asctime)s %(processName)s %(name)s: %(message)s")
+    logging.getLogger("app.launcher").setLevel(logging.INFO)
+    logging.getLogger("app.grpc").setLevel(logging.INFO)
+
+
+def _run_grpc(process_index: int):
+    _configure_logging()
+    if settings.GRPC_SERVER_MODE == "aio":
+        from app.grpc.aio_server import run
+        run(process_index)
+    else:
+        from app.grpc.server import serve
+        serve(process_index)
+
+
+class GrpcSupervisor:
+
+    def __init__(self, processes: int):
+        self.processes: list = [None] * processes
+        self._stopping = threading.Event()
+        self._monitor: threading.Thread | None = None
+
+    def _spawn(self, index: int):
+        process = _mp.Process(target=_run_grpc, args=(index,), name=f"grpc-{index}")
+        process.start()
+        self.processes[index] = process
+
+    def start(self):
+        for index in range(len(self.processes)):
+            self._spawn(index)
+        self._monitor = threading.Thread(target=self._watch, name="grpc-supervisor", daemon=True)
+        self._monitor.start()
+
+# Упавший gRPC-процесс перезапускается. Нулевой код выхода — штатная остановка
+# по сигналу (например, Ctrl+C пришёл всей группе процессов), такой не поднимаем
+    def _watch(self):
+        while not self._stopping.wait(1):
+            for index, process in enumerate(self.processes):
+                if process.exitcode not in (None, 0) and not self._stopping.is_set():
+                    logger.warning("gRPC process %s exited with %s, restarting", process.name, process.exitcode)
+                    self._spawn(index)
+
+    def stop(self):
+        self._stopping.set()
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(settings.GRPC_GRACE_S + 5)
+            if process.is_alive():
+                logger.warning("gRPC process %s did not stop in time, killing", process.name)
+                process.kill()
+                process.join()
+
+
+def _exit_on_sigterm(signum, frame):
+    sys.exit(0)
+
+
+# Миграции применяются один раз до старта процессов; дочерним процессам (spawn
+# наследует окружение) остаётся только сверить версию схемы, без advisory lock и DDL
+def _prepare_schema():
+    if settings.SCHEMA_MIGRATIONS != "apply":
+        return
+    from app.database import engine
+    from app.migrations import ensure_schema
+
+    applied = ensure_schema(engine, "apply")
+    if applied:
+        logger.info("Applied migrations %s", applied)
+    os.environ["SCHEMA_MIGRATIONS"] = "check"
+
+
+# Секции бакетов на сегодня и вперёд — тоже до старта: gRPC-процессы пишут сразу,
+# и строки, успевшие лечь в DEFAULT-секцию, пришлось бы из неё переносить
+def _prepare_buckets():
+    if settings.SCHEMA_MIGRATIONS == "off":
+        return
+    from app.database import SessionLocal
+    from app.services.stats_buckets import StatsBucketService
+
+    with SessionLocal() as db:
+        StatsBucketService.ensure_partitions(db)
+
+
+def main():
+    _configure_logging()
+    # uvicorn после своей graceful-остановки повторно поднимает пойманный SIGTERM;
+    # с обработчиком по умолчанию процесс умер бы, не дойдя до остановки gRPC в finally
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    _prepare_schema()
+    _prepare_buckets()
+
+    supervisor = None
+    if settings.GRPC_ENABLED and not settings.GRPC_IN_PROCESS and settings.GRPC_PROCESSES > 0:
+        supervisor = GrpcSupervisor(settings.GRPC_PROCESSES)
+        supervisor.start()
+
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.APP_HOST,
+            port=settings.APP_PORT,
+            workers=settings.HTTP_WORKERS,
+            access_log=settings.HTTP_ACCESS_LOG
+        )
+    finally:
+        if supervisor is not None:
+            supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,98 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-import uvicorn
+from app.middleware import MetricsMiddleware
+from app.responses import ORJSONResponse
 from app.routes import routers
-from app.database import engine
-from app.models import PlayerStats
+from app.database import SessionLocal, async_engine, engine, warm_async_pool
+from app.migrations import ensure_schema
 from app.settings import settings
-import threading
-from app.grpc.server import serve
+from app.services.leaderboard_snapshots import refresh_snapshots_periodically
+from app.services.live_leaderboard import live_leaderboard
+from app.services.shared_cache import shared_cache
+from app.services.stats_buckets import StatsBucketService, maintain_buckets_periodically
+from app.services.write_buffer import write_buffer
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+# Секции бакетов создаются до приёма запросов: запись, пришедшая раньше них, легла бы
+# в DEFAULT-секцию. Обычно лаунчер их уже создал, и это несколько to_regclass
+def ensure_bucket_partitions():
+    with SessionLocal() as db:
+        StatsBucketService.ensure_partitions(db)
+
+
+# Прогрев пула — после старта: воркер сразу отвечает на /live, а /ready отдаёт 200,
+# когда пул прогрет. Postgres недоступен — повторяем, воркер остаётся неготовым
+async def warm_up(app: FastAPI):
+    while True:
+        try:
+            if settings.DB_POOL_WARMUP:
+                await warm_async_pool(settings.DB_POOL_SIZE)
+            break
+        except Exception:
+            logger.exception("Не удалось подготовить воркер, повтор через секунду")
+            await asyncio.sleep(1)
+    app.state.ready = True
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # STARTUP
-    PlayerStats.metadata.create_all(bind=engine)
+    # STARTUP: вместо create_all — одно чтение schema_migrations, DDL только если схема отстаёт
+    app.state.ready = False
+    await asyncio.to_thread(ensure_schema, engine, settings.SCHEMA_MIGRATIONS)
+    await asyncio.to_thread(ensure_bucket_partitions)
+    write_buffer.start()
+    # Режим разработки: gRPC в том же процессе, что и HTTP (в проде — app/launcher.py)
+    grpc_server = None
+    if settings.GRPC_ENABLED and settings.GRPC_IN_PROCESS:
+        if settings.GRPC_SERVER_MODE == "aio":
+            # aio-сервер живёт на event loop приложения
+            from app.grpc.aio_server import create_server
+            grpc_server = create_server()
+            await grpc_server.start()
+        else:
+            from app.grpc.server import create_server
+            grpc_server = create_server()
+            grpc_server.start()
+    snapshots = None
+    if settings.LEADERBOARD_SNAPSHOT_INTERVAL_S > 0:
+        snapshots = asyncio.create_task(
+            refresh_snapshots_periodically(settings.LEADERBOARD_SNAPSHOT_INTERVAL_S)
+        )
+    buckets = asyncio.create_task(
+        maintain_buckets_periodically(settings.STATS_BUCKET_MAINTENANCE_INTERVAL_S)
+    )
+    live = asyncio.create_task(live_leaderboard.run())
+    warming = asyncio.create_task(warm_up(app))
     yield
-    # SHUTDOWN (если понадобится)
+    # SHUTDOWN: снимаем готовность, останавливаем фоновые задачи и дописываем в БД всё, что осталось в буфере
+    app.state.ready = False
+    warming.cancel()
+    live.cancel()
+    buckets.cancel()
+    if snapshots is not None:
+        snapshots.cancel()
+    if grpc_server is not None:
+        if settings.GRPC_SERVER_MODE == "aio":
+            await grpc_server.stop(settings.GRPC_GRACE_S)
+        else:
+            await asyncio.to_thread(grpc_server.stop(settings.GRPC_GRACE_S).wait)
+    write_buffer.stop()
+    await shared_cache.aclose()
+    await async_engine.dispose()
 
 
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 for route in routers:
     app.include_router(route)
 
 if __name__ == "__main__":
+    from app.launcher import main
 
-    def start_grpc():
-        serve()
-
-
-    grpc_thread = threading.Thread(target=start_grpc, daemon=True)
-    grpc_thread.start()
-    uvicorn.run("main:app",host=settings.APP_HOST,port=settings.APP_PORT,reload=True)
-
+    main()
@@ -0,0 +1,130 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Все метрики сервиса объявляются здесь, чтобы их было видно в одном месте
+
+WRITE_BUFFER_PENDING = Gauge(
+    "stats_write_buffer_pending_keys",
+    "Ключей (user_id, server_name), ожидающих сброса в БД"
+)
+WRITE_BUFFER_FLUSH_SIZE = Histogram(
+    "stats_write_buffer_flush_size",
+    "Строк в одном сбросе буфера",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+WRITE_BUFFER_FLUSH_SECONDS = Histogram(
+    "stats_write_buffer_flush_seconds",
+    "Длительность сброса буфера (upsert + commit)"
+)
+WRITE_BUFFER_FLUSH_ERRORS = Counter(
+    "stats_write_buffer_flush_errors_total",
+    "Неудачные сбросы буфера (дельты возвращены в буфер)"
+)
+WRITE_BUFFER_DROPPED = Counter(
+    "stats_write_buffer_dropped_total",
+    "Ключи, отброшенные при сбросе: значение вне диапазона колонки"
+)
+WRITE_BUFFER_REJECTED = Counter(
+    "stats_write_buffer_rejected_total",
+    "Дельты, отклонённые из-за переполнения буфера"
+)
+
+CACHE_HITS = Counter(
+    "stats_cache_hits_total",
+    "Попадания в in-process кэш",
+    ["cache"]
+)
+CACHE_MISSES = Counter(
+    "stats_cache_misses_total",
+    "Промахи in-process кэша",
+    ["cache"]
+)
+CACHE_EVICTIONS = Counter(
+    "stats_cache_evictions_total",
+    "Вытеснения из in-process кэша по размеру (LRU)",
+    ["cache"]
+)
+
+SHARED_CACHE_ERRORS = Counter(
+    "stats_shared_cache_errors_total",
+    "Ошибки общего кэша (запрос ушёл в Postgres)",
+    ["operation"]
+)
+
+RANK_LOOKUPS = Counter(
+    "stats_rank_lookups_total",
+    "Запросы места игрока: из индекса в памяти (index) или COUNT в БД (db)",
+    ["source"]
+)
+RANK_INDEX_BUILD_SECONDS = Histogram(
+    "stats_rank_index_build_seconds",
+    "Сборка доски индекса мест из player_stats",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+LIVE_SUBSCRIBERS = Gauge(
+    "stats_live_subscribers",
+    "Подписчиков живого лидерборда (SSE и WebSocket)"
+)
+LIVE_TICK_SECONDS = Histogram(
+    "stats_live_tick_seconds",
+    "Один пересчёт живых лидербордов: запросы досок и рассылка diff",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+LIVE_MESSAGES = Counter(
+    "stats_live_messages_total",
+    "Сообщения подписчикам живого лидерборда по типу (snapshot, diff)",
+    ["type"]
+)
+LIVE_OVERFLOWS = Counter(
+    "stats_live_overflows_total",
+    "Переполнения очереди подписчика: накопленные diff выброшены, отправлен снимок"
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "stats_db_pool_checkout_seconds",
+    "Ожидание соединения из пула SQLAlchemy (включая pre-ping и открытие нового)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+DB_POOL_TIMEOUTS = Counter(
+    "stats_db_pool_timeouts_total",
+    "Соединение из пула не получено за DB_POOL_TIMEOUT_S",
+    ["engine"]
+)
+DB_POOL_IN_USE = Gauge(
+    "stats_db_pool_in_use",
+    "Соединений выдано из пула",
+    ["engine"]
+)
+DB_POOL_SATURATION = Gauge(
+    "stats_db_pool_saturation",
+    "Доля занятых соединений от pool_size + max_overflow",
+    ["engine"]
+)
+
+# Бакеты латентности запросов: от долей миллисекунды до таймаутов
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "stats_http_request_seconds",
+    "Обработка HTTP-запроса: от получения до отправки тела ответа",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_RESPONSE_RENDER_SECONDS = Histogram(
+    "stats_http_response_render_seconds",
+    "Сериализация тела ответа в JSON",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+)
+GRPC_SERVER_SECONDS = Histogram(
+    "stats_grpc_server_seconds",
+    "Обработка gRPC-вызова",
+    ["method", "code"],
+    buckets=LATENCY_BUCKETS
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "stats_db_statement_seconds",
+    "Выполнение SQL-запроса (cursor.execute) по нормализованной метке",
+    ["engine", "statement"],
+    buckets=LATENCY_BUCKETS
+)
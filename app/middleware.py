@@ -0,0 +1,36 @@
+import time
+
+from app.metrics import HTTP_REQUEST_SECONDS
+
+
+# Чистый ASGI-middleware: без BaseHTTPMiddleware, который оборачивает каждый запрос
+# в отдельную задачу и потоки памяти. Метка маршрута — шаблон пути ("/stats/{user_id}"),
+# а не сам путь, иначе каждый user_id стал бы отдельной серией
+class MetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status
+            ).observe(time.perf_counter() - started)
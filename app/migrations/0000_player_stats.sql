@@ -0,0 +1,11 @@
+-- Базовая таблица статистики. Раньше её создавал metadata.create_all на каждом
+-- старте; на существующих базах IF NOT EXISTS её пропускает.
+
+CREATE TABLE IF NOT EXISTS player_stats (
+    user_id UUID NOT NULL,
+    server_name VARCHAR NOT NULL,
+    time_played INTEGER DEFAULT 0,
+    kills INTEGER DEFAULT 0,
+    deaths INTEGER DEFAULT 0,
+    PRIMARY KEY (user_id, server_name)
+);
@@ -0,0 +1,63 @@
+-- Составные индексы лидерборда и счётчик игроков по серверу.
+--
+-- На больших таблицах индексы лучше заранее создать вручную через
+-- CREATE INDEX CONCURRENTLY с теми же именами — IF NOT EXISTS их пропустит.
+
+CREATE INDEX IF NOT EXISTS ix_player_stats_server_kills
+    ON player_stats (server_name, kills DESC, user_id DESC);
+CREATE INDEX IF NOT EXISTS ix_player_stats_server_deaths
+    ON player_stats (server_name, deaths DESC, user_id DESC);
+CREATE INDEX IF NOT EXISTS ix_player_stats_server_time_played
+    ON player_stats (server_name, time_played DESC, user_id DESC);
+
+-- Одиночные индексы перекрыты первичным ключом и составными индексами выше
+DROP INDEX IF EXISTS ix_player_stats_user_id;
+DROP INDEX IF EXISTS ix_player_stats_server_name;
+
+CREATE TABLE IF NOT EXISTS server_player_counts (
+    server_name VARCHAR PRIMARY KEY,
+    players BIGINT NOT NULL DEFAULT 0
+);
+
+-- Statement-level триггеры с transition tables: одно обновление счётчика
+-- на сервер за оператор, а не на каждую вставленную строку
+CREATE OR REPLACE FUNCTION player_stats_count_insert() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO server_player_counts AS c (server_name, players)
+    SELECT server_name, count(*) FROM new_rows GROUP BY server_name ORDER BY server_name
+    ON CONFLICT (server_name) DO UPDATE SET players = c.players + excluded.players;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION player_stats_count_delete() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE server_player_counts AS c
+    SET players = c.players - d.players
+    FROM (
+        SELECT server_name, count(*) AS players FROM old_rows GROUP BY server_name ORDER BY server_name
+    ) AS d
+    WHERE c.server_name = d.server_name;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS player_stats_count_insert ON player_stats;
+CREATE TRIGGER player_stats_count_insert
+    AFTER INSERT ON player_stats
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_stats_count_insert();
+
+DROP TRIGGER IF EXISTS player_stats_count_delete ON player_stats;
+CREATE TRIGGER player_stats_count_delete
+    AFTER DELETE ON player_stats
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_stats_count_delete();
+
+-- Начальное заполнение. CREATE TRIGGER держит блокировку таблицы до конца
+-- транзакции, поэтому параллельные вставки не потеряются
+INSERT INTO server_player_counts (server_name, players)
+SELECT server_name, count(*) FROM player_stats GROUP BY server_name
+ON CONFLICT (server_name) DO UPDATE SET players = excluded.players;
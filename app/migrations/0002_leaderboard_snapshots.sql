@@ -0,0 +1,23 @@
+-- Снимки лидерборда с предрассчитанными местами.
+
+CREATE TABLE IF NOT EXISTS leaderboard_snapshots (
+    server_name VARCHAR NOT NULL,
+    sort_key VARCHAR NOT NULL,
+    rank BIGINT NOT NULL,
+    user_id UUID NOT NULL,
+    time_played INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    deaths INTEGER NOT NULL,
+    PRIMARY KEY (server_name, sort_key, rank)
+);
+
+CREATE INDEX IF NOT EXISTS ix_leaderboard_snapshots_player
+    ON leaderboard_snapshots (server_name, user_id);
+
+CREATE TABLE IF NOT EXISTS leaderboard_snapshot_meta (
+    server_name VARCHAR NOT NULL,
+    sort_key VARCHAR NOT NULL,
+    players BIGINT NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (server_name, sort_key)
+);
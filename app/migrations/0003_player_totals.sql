@@ -0,0 +1,100 @@
+-- Суммы игрока по всем серверам и глобальный лидерборд.
+--
+-- player_totals поддерживается statement-level триггерами на player_stats,
+-- как server_player_counts: за оператор — один upsert на игрока с дельтой
+-- (новые значения минус старые), без GROUP BY по всей таблице при чтении.
+
+CREATE TABLE IF NOT EXISTS player_totals (
+    user_id UUID PRIMARY KEY,
+    servers INTEGER NOT NULL DEFAULT 0,
+    time_played BIGINT NOT NULL DEFAULT 0,
+    kills BIGINT NOT NULL DEFAULT 0,
+    deaths BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_player_totals_kills
+    ON player_totals (kills DESC, user_id DESC);
+CREATE INDEX IF NOT EXISTS ix_player_totals_deaths
+    ON player_totals (deaths DESC, user_id DESC);
+CREATE INDEX IF NOT EXISTS ix_player_totals_time_played
+    ON player_totals (time_played DESC, user_id DESC);
+
+-- Дельты упорядочены по user_id: конкурентные операторы блокируют строки
+-- player_totals в одном порядке и не ловят deadlock
+CREATE OR REPLACE FUNCTION player_totals_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO player_totals AS t (user_id, servers, time_played, kills, deaths)
+        SELECT user_id, count(*), sum(time_played), sum(kills), sum(deaths)
+        FROM new_rows GROUP BY user_id ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            servers = t.servers + excluded.servers,
+            time_played = t.time_played + excluded.time_played,
+            kills = t.kills + excluded.kills,
+            deaths = t.deaths + excluded.deaths;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE player_totals AS t SET
+            time_played = t.time_played + d.time_played,
+            kills = t.kills + d.kills,
+            deaths = t.deaths + d.deaths
+        FROM (
+            SELECT user_id, sum(time_played) AS time_played, sum(kills) AS kills, sum(deaths) AS deaths
+            FROM (
+                SELECT user_id, time_played, kills, deaths FROM new_rows
+                UNION ALL
+                SELECT user_id, -time_played, -kills, -deaths FROM old_rows
+            ) AS changes
+            GROUP BY user_id
+            HAVING sum(time_played) <> 0 OR sum(kills) <> 0 OR sum(deaths) <> 0
+            ORDER BY user_id
+        ) AS d
+        WHERE t.user_id = d.user_id;
+    ELSE
+        UPDATE player_totals AS t SET
+            servers = t.servers - d.servers,
+            time_played = t.time_played - d.time_played,
+            kills = t.kills - d.kills,
+            deaths = t.deaths - d.deaths
+        FROM (
+            SELECT user_id, count(*) AS servers, sum(time_played) AS time_played,
+                   sum(kills) AS kills, sum(deaths) AS deaths
+            FROM old_rows GROUP BY user_id ORDER BY user_id
+        ) AS d
+        WHERE t.user_id = d.user_id;
+
+        DELETE FROM player_totals AS t
+        USING (SELECT DISTINCT user_id FROM old_rows) AS d
+        WHERE t.user_id = d.user_id AND t.servers <= 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS player_totals_insert ON player_stats;
+CREATE TRIGGER player_totals_insert
+    AFTER INSERT ON player_stats
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_totals_apply();
+
+DROP TRIGGER IF EXISTS player_totals_update ON player_stats;
+CREATE TRIGGER player_totals_update
+    AFTER UPDATE ON player_stats
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_totals_apply();
+
+DROP TRIGGER IF EXISTS player_totals_delete ON player_stats;
+CREATE TRIGGER player_totals_delete
+    AFTER DELETE ON player_stats
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_totals_apply();
+
+-- Начальное заполнение под блокировкой, взятой CREATE TRIGGER
+INSERT INTO player_totals (user_id, servers, time_played, kills, deaths)
+SELECT user_id, count(*), sum(time_played), sum(kills), sum(deaths)
+FROM player_stats GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    servers = excluded.servers,
+    time_played = excluded.time_played,
+    kills = excluded.kills,
+    deaths = excluded.deaths;
@@ -0,0 +1,113 @@
+-- Статистика по времени: дельты по часам и по дням.
+--
+-- Каждый INSERT/UPDATE в player_stats раскладывается триггером в два бакета
+-- текущего момента (UTC): часовой (player_stats_hourly) и дневной
+-- (player_stats_daily). Окна day/week/season читаются из дневных бакетов,
+-- часовые нужны только для неровных краёв окна from..to.
+--
+-- Обе таблицы секционированы по времени: часовая — по дням, дневная — по месяцам.
+-- Секции наперёд создаёт и по сроку хранения удаляет фоновая задача
+-- (app/services/stats_buckets.py); DEFAULT-секции — страховка, чтобы запись
+-- не падала, если задача давно не запускалась.
+--
+-- Массовая загрузка исторических данных (COPY, бенчмарки) не должна попадать
+-- в сегодняшний бакет: SET LOCAL stats.skip_buckets = on в её транзакции.
+
+CREATE TABLE IF NOT EXISTS player_stats_hourly (
+    bucket TIMESTAMPTZ NOT NULL,
+    server_name VARCHAR NOT NULL,
+    user_id UUID NOT NULL,
+    time_played INTEGER NOT NULL DEFAULT 0,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (server_name, user_id, bucket)
+) PARTITION BY RANGE (bucket);
+
+CREATE TABLE IF NOT EXISTS player_stats_daily (
+    day DATE NOT NULL,
+    server_name VARCHAR NOT NULL,
+    user_id UUID NOT NULL,
+    time_played INTEGER NOT NULL DEFAULT 0,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (server_name, user_id, day)
+) PARTITION BY RANGE (day);
+
+-- Первичный ключ обслуживает окно одного игрока, эти индексы — лидерборд окна:
+-- все игроки сервера за диапазон времени
+CREATE INDEX IF NOT EXISTS ix_player_stats_hourly_server_bucket
+    ON player_stats_hourly (server_name, bucket);
+CREATE INDEX IF NOT EXISTS ix_player_stats_daily_server_day
+    ON player_stats_daily (server_name, day);
+
+CREATE TABLE IF NOT EXISTS player_stats_hourly_default PARTITION OF player_stats_hourly DEFAULT;
+CREATE TABLE IF NOT EXISTS player_stats_daily_default PARTITION OF player_stats_daily DEFAULT;
+
+-- Дельта строки — новые значения минус старые; строки без изменений пропускаются.
+-- Дельты одного оператора пишутся одним CTE в оба бакета, в порядке
+-- (server_name, user_id) — том же, что у блокировок строк player_stats
+CREATE OR REPLACE FUNCTION player_stats_buckets_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('stats.skip_buckets', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        WITH deltas AS (
+            SELECT server_name, user_id, time_played, kills, deaths
+            FROM new_rows
+            WHERE time_played <> 0 OR kills <> 0 OR deaths <> 0
+        ), hourly AS (
+            INSERT INTO player_stats_hourly AS t (bucket, server_name, user_id, time_played, kills, deaths)
+            SELECT date_trunc('hour', now(), 'UTC'), * FROM deltas ORDER BY server_name, user_id
+            ON CONFLICT (server_name, user_id, bucket) DO UPDATE SET
+                time_played = t.time_played + excluded.time_played,
+                kills = t.kills + excluded.kills,
+                deaths = t.deaths + excluded.deaths
+        )
+        INSERT INTO player_stats_daily AS t (day, server_name, user_id, time_played, kills, deaths)
+        SELECT (now() AT TIME ZONE 'UTC')::date, * FROM deltas ORDER BY server_name, user_id
+        ON CONFLICT (server_name, user_id, day) DO UPDATE SET
+            time_played = t.time_played + excluded.time_played,
+            kills = t.kills + excluded.kills,
+            deaths = t.deaths + excluded.deaths;
+    ELSE
+        WITH deltas AS (
+            SELECT n.server_name, n.user_id,
+                   n.time_played - o.time_played AS time_played,
+                   n.kills - o.kills AS kills,
+                   n.deaths - o.deaths AS deaths
+            FROM new_rows AS n
+            JOIN old_rows AS o ON o.server_name = n.server_name AND o.user_id = n.user_id
+            WHERE n.time_played <> o.time_played OR n.kills <> o.kills OR n.deaths <> o.deaths
+        ), hourly AS (
+            INSERT INTO player_stats_hourly AS t (bucket, server_name, user_id, time_played, kills, deaths)
+            SELECT date_trunc('hour', now(), 'UTC'), * FROM deltas ORDER BY server_name, user_id
+            ON CONFLICT (server_name, user_id, bucket) DO UPDATE SET
+                time_played = t.time_played + excluded.time_played,
+                kills = t.kills + excluded.kills,
+                deaths = t.deaths + excluded.deaths
+        )
+        INSERT INTO player_stats_daily AS t (day, server_name, user_id, time_played, kills, deaths)
+        SELECT (now() AT TIME ZONE 'UTC')::date, * FROM deltas ORDER BY server_name, user_id
+        ON CONFLICT (server_name, user_id, day) DO UPDATE SET
+            time_played = t.time_played + excluded.time_played,
+            kills = t.kills + excluded.kills,
+            deaths = t.deaths + excluded.deaths;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS player_stats_buckets_insert ON player_stats;
+CREATE TRIGGER player_stats_buckets_insert
+    AFTER INSERT ON player_stats
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_stats_buckets_apply();
+
+DROP TRIGGER IF EXISTS player_stats_buckets_update ON player_stats;
+CREATE TRIGGER player_stats_buckets_update
+    AFTER UPDATE ON player_stats
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_stats_buckets_apply();
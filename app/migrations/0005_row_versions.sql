@@ -0,0 +1,10 @@
+-- Версия строки player_stats для ETag и Last-Modified у GET /stats/{user_id}.
+-- version растёт на единицу, updated_at — время транзакции при каждой записи значений;
+-- обе колонки пишут сами запросы записи (app/services/queries.py, bulk_io.py), без триггера.
+--
+-- Постоянное значение по умолчанию (now() вычисляется один раз) — ADD COLUMN
+-- не переписывает таблицу и держит блокировку мгновения
+
+ALTER TABLE player_stats
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
@@ -0,0 +1,57 @@
+-- Версия лидерборда сервера для ETag у GET /stats: растёт на каждый оператор,
+-- который вставляет, меняет или удаляет строки player_stats этого сервера, — из любого
+-- процесса (HTTP, gRPC, буфер, загрузка). Значения берутся из одной последовательности,
+-- поэтому не повторяются и после удаления строки сервера (detach, пустой сервер).
+--
+-- Ведут её те же statement-level триггеры, что и счётчик игроков; запись на сервер
+-- обновляет его строку server_player_counts, и записи одного сервера коммитятся по очереди.
+
+CREATE SEQUENCE IF NOT EXISTS leaderboard_version_seq;
+
+ALTER TABLE server_player_counts
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('leaderboard_version_seq');
+
+CREATE OR REPLACE FUNCTION player_stats_count_insert() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO server_player_counts AS c (server_name, players)
+    SELECT server_name, count(*) FROM new_rows GROUP BY server_name ORDER BY server_name
+    ON CONFLICT (server_name) DO UPDATE SET
+        players = c.players + excluded.players,
+        version = nextval('leaderboard_version_seq');
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION player_stats_count_delete() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE server_player_counts AS c
+    SET players = c.players - d.players,
+        version = nextval('leaderboard_version_seq')
+    FROM (
+        SELECT server_name, count(*) AS players FROM old_rows GROUP BY server_name ORDER BY server_name
+    ) AS d
+    WHERE c.server_name = d.server_name;
+    RETURN NULL;
+END
+$$;
+
+-- Страница лидерборда показывает все три счётчика, поэтому версию двигает любая
+-- запись значений, а не только по полю сортировки
+CREATE OR REPLACE FUNCTION player_stats_board_version() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE server_player_counts AS c
+    SET version = nextval('leaderboard_version_seq')
+    FROM (SELECT DISTINCT server_name FROM new_rows ORDER BY server_name) AS d
+    WHERE c.server_name = d.server_name;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS player_stats_board_version ON player_stats;
+CREATE TRIGGER player_stats_board_version
+    AFTER UPDATE ON player_stats
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION player_stats_board_version();
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Миграции — файлы NNNN_<name>.sql в этой папке, применяются по порядку номеров.
+# Каждый файл идемпотентен (IF NOT EXISTS / CREATE OR REPLACE), применённые
+# версии записываются в schema_migrations.
+
+MIGRATIONS_DIR = Path(__file__).parent
+
+# Ключ pg_advisory_xact_lock: несколько воркеров стартуют одновременно,
+# миграции применяет только один, остальные ждут и видят их уже применёнными
+MIGRATIONS_LOCK_ID = 7_301_225
+
+
+def available_migrations() -> list[tuple[int, str, Path]]:
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("[0-9][0-9][0-9][0-9]_*.sql")):
+        version, name = path.stem.split("_", 1)
+        migrations.append((int(version), name, path))
+    return migrations
+
+
+# Быстрый путь старта: одно чтение schema_migrations без блокировки и без DDL
+def pending_migrations(engine: Engine) -> list[int]:
+    versions = [version for version, _, _ in available_migrations()]
+    with engine.connect() as conn:
+        if conn.scalar(text("SELECT to_regclass('schema_migrations')")) is None:
+            return versions
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+    return [version for version in versions if version not in applied]
+
+
+# mode — SCHEMA_MIGRATIONS: apply — применить недостающие, check — только убедиться,
+# что схема не отстаёт от кода (миграции применены заранее: python -m app.migrations), off — не трогать БД
+def ensure_schema(engine: Engine, mode: str) -> list[int]:
+    if mode == "off":
+        return []
+    pending = pending_migrations(engine)
+    if not pending:
+        return []
+    if mode == "check":
+        raise RuntimeError(f"Схема БД отстаёт от кода, не применены миграции: {pending}")
+    return apply_migrations(engine)
+
+
+def apply_migrations(engine: Engine) -> list[int]:
+    applied_now = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR NOT NULL, "
+            "applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ))
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+        for version, name, path in available_migrations():
+            if version in applied:
+                continue
+            conn.exec_driver_sql(path.read_text(encoding="utf-8"))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name}
+            )
+            applied_now.append(version)
+
+    return applied_now
@@ -0,0 +1,10 @@
+from app.database import engine
+from app.migrations import apply_migrations
+
+# Применить миграции отдельным шагом деплоя — до старта подов с SCHEMA_MIGRATIONS=check:
+#
+#     python -m app.migrations
+
+if __name__ == "__main__":
+    applied = apply_migrations(engine)
+    print(f"Применены миграции: {applied}" if applied else "Схема актуальна")
@@ -1,13 +1,122 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Date, DateTime, Index, Integer, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from app.database import Base
 
+# По желанию секционируется по server_name (app/services/server_partitions.py) —
+# модель и запросы от этого не меняются
 class PlayerStats(Base):
     __tablename__ = "player_stats"
 
-    user_id = Column(UUID, primary_key=True, index=True)
-    server_name = Column(String, primary_key=True, index=True)
+    # Отдельные индексы не нужны: user_id — префикс первичного ключа,
+    # server_name — префикс составных индексов лидерборда ниже
+    user_id = Column(UUID, primary_key=True)
+    server_name = Column(String, primary_key=True)
 
     time_played = Column(Integer, default=0)
     kills = Column(Integer, default=0)
     deaths = Column(Integer, default=0)
+
+    # Растут при каждой записи значений — для ETag и Last-Modified
+    # (app/migrations/0005_row_versions.sql)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+# Индексы под сортировки лидерборда: ORDER BY <sort> DESC, user_id DESC внутри сервера
+# и keyset-курсор WHERE (<sort>, user_id) < (:v, :u) читаются прямо из индекса
+Index("ix_player_stats_server_kills", PlayerStats.server_name, PlayerStats.kills.desc(), PlayerStats.user_id.desc())
+Index("ix_player_stats_server_deaths", PlayerStats.server_name, PlayerStats.deaths.desc(), PlayerStats.user_id.desc())
+Index("ix_player_stats_server_time_played", PlayerStats.server_name, PlayerStats.time_played.desc(), PlayerStats.user_id.desc())
+
+
+# Число игроков на сервере. Поддерживается триггерами на player_stats
+# (см. app/migrations/0001_leaderboard_indexes.sql), чтобы total в пагинации
+# не стоил COUNT(*) на каждый запрос. version — версия доски сервера для ETag лидерборда:
+# её двигает любая запись в player_stats сервера (app/migrations/0006_board_versions.sql)
+class ServerPlayerCount(Base):
+    __tablename__ = "server_player_counts"
+
+    server_name = Column(String, primary_key=True)
+    players = Column(BigInteger, nullable=False, default=0)
+    version = Column(BigInteger, nullable=False, server_default=text("nextval('leaderboard_version_seq')"))
+
+
+# Снимок лидерборда по (server_name, sort_key): строки пронумерованы ROW_NUMBER()
+# и пересобираются фоновой задачей (app/services/leaderboard_snapshots.py)
+class LeaderboardSnapshot(Base):
+    __tablename__ = "leaderboard_snapshots"
+
+    server_name = Column(String, primary_key=True)
+    sort_key = Column(String, primary_key=True)
+    rank = Column(BigInteger, primary_key=True)
+
+    user_id = Column(UUID, nullable=False)
+    time_played = Column(Integer, nullable=False)
+    kills = Column(Integer, nullable=False)
+    deaths = Column(Integer, nullable=False)
+
+
+# Места игрока во всех снимках сервера одним index scan
+Index("ix_leaderboard_snapshots_player", LeaderboardSnapshot.server_name, LeaderboardSnapshot.user_id)
+
+
+class LeaderboardSnapshotMeta(Base):
+    __tablename__ = "leaderboard_snapshot_meta"
+
+    server_name = Column(String, primary_key=True)
+    sort_key = Column(String, primary_key=True)
+
+    players = Column(BigInteger, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# Суммы игрока по всем серверам. Поддерживается триггерами на player_stats
+# (см. app/migrations/0003_player_totals.sql); читается глобальным лидербордом
+class PlayerTotals(Base):
+    __tablename__ = "player_totals"
+
+    user_id = Column(UUID, primary_key=True)
+
+    servers = Column(Integer, nullable=False, default=0)
+    time_played = Column(BigInteger, nullable=False, default=0)
+    kills = Column(BigInteger, nullable=False, default=0)
+    deaths = Column(BigInteger, nullable=False, default=0)
+
+
+Index("ix_player_totals_kills", PlayerTotals.kills.desc(), PlayerTotals.user_id.desc())
+Index("ix_player_totals_deaths", PlayerTotals.deaths.desc(), PlayerTotals.user_id.desc())
+Index("ix_player_totals_time_played", PlayerTotals.time_played.desc(), PlayerTotals.user_id.desc())
+
+
+# Дельты статистики по часам и по дням (UTC). Пишутся триггером на player_stats,
+# секционированы по времени — секции ведёт app/services/stats_buckets.py
+# (см. app/migrations/0004_stats_buckets.sql)
+class PlayerStatsHourly(Base):
+    __tablename__ = "player_stats_hourly"
+    __table_args__ = {"postgresql_partition_by": "RANGE (bucket)"}
+
+    server_name = Column(String, primary_key=True)
+    user_id = Column(UUID, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+
+    time_played = Column(Integer, nullable=False, default=0)
+    kills = Column(Integer, nullable=False, default=0)
+    deaths = Column(Integer, nullable=False, default=0)
+
+
+class PlayerStatsDaily(Base):
+    __tablename__ = "player_stats_daily"
+    __table_args__ = {"postgresql_partition_by": "RANGE (day)"}
+
+    server_name = Column(String, primary_key=True)
+    user_id = Column(UUID, primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    time_played = Column(Integer, nullable=False, default=0)
+    kills = Column(Integer, nullable=False, default=0)
+    deaths = Column(Integer, nullable=False, default=0)
+
+
+# Лидерборд окна: все игроки сервера за диапазон времени
+Index("ix_player_stats_hourly_server_bucket", PlayerStatsHourly.server_name, PlayerStatsHourly.bucket)
+Index("ix_player_stats_daily_server_day", PlayerStatsDaily.server_name, PlayerStatsDaily.day)
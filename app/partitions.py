@@ -0,0 +1,81 @@
+import argparse
+
+import orjson
+
+from app.database import SessionLocal
+from app.services.server_partitions import ServerPartitionService
+
+# Секции player_stats по server_name из командной строки:
+#
+#     python -m app.partitions enable                   # один раз: player_stats → секционированная
+#     python -m app.partitions create lobby             # своя секция серверу (строки переносятся из DEFAULT)
+#     python -m app.partitions detach lobby [--drop]    # конец сезона: секция уходит из player_stats
+#     python -m app.partitions attach lobby [--table t] # вернуть отключённую или залитую отдельно таблицу
+#     python -m app.partitions list
+#
+# Итог печатается в stdout одной строкой JSON.
+
+
+def _enable(args):
+    with SessionLocal() as db:
+        return {"enabled": ServerPartitionService.enable(db)}
+
+
+def _create(args):
+    with SessionLocal() as db:
+        name, moved = ServerPartitionService.create(db, args.server_name)
+    return {"server_name": args.server_name, "partition": name, "moved": moved}
+
+
+def _detach(args):
+    with SessionLocal() as db:
+        players = ServerPartitionService.detach(db, args.server_name, args.drop)
+    return {"server_name": args.server_name, "players": players, "dropped": args.drop}
+
+
+def _attach(args):
+    with SessionLocal() as db:
+        players = ServerPartitionService.attach(db, args.server_name, args.table)
+    return {"server_name": args.server_name, "players": players}
+
+
+def _list(args):
+    with SessionLocal() as db:
+        return [
+            {"partition": name, "bound": bound, "rows_estimate": rows}
+            for name, bound, rows in ServerPartitionService.partitions(db)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("enable", help="секционировать player_stats по server_name").set_defaults(run=_enable)
+
+    create = commands.add_parser("create", help="своя секция для сервера")
+    create.add_argument("server_name")
+    create.set_defaults(run=_create)
+
+    detach = commands.add_parser("detach", help="отключить секцию сервера")
+    detach.add_argument("server_name")
+    detach.add_argument("--drop", action="store_true", help="удалить отключённую таблицу")
+    detach.set_defaults(run=_detach)
+
+    attach = commands.add_parser("attach", help="подключить таблицу секцией сервера")
+    attach.add_argument("server_name")
+    attach.add_argument("--table", help="таблица со строками сервера (по умолчанию — отключённая секция)")
+    attach.set_defaults(run=_attach)
+
+    commands.add_parser("list", help="секции player_stats").set_defaults(run=_list)
+
+    args = parser.parse_args()
+    try:
+        result = args.run(args)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    print(orjson.dumps(result).decode())
+
+
+if __name__ == "__main__":
+    main()
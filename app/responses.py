@@ -1,40 +1,106 @@
-from fastapi.responses import JSONResponse
-from datetime import datetime
-import uuid
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+import orjson
+from fastapi.responses import JSONResponse, Response
 from app.codes import Codes
+from app.metrics import HTTP_RESPONSE_RENDER_SECONDS
+
+
+# JSONResponse на orjson: UUID, datetime и Enum сериализуются без предварительного
+# приведения к str, а сама сериализация в разы быстрее stdlib json
+class ORJSONResponse(JSONResponse):
+
+    def render(self, content) -> bytes:
+        started = time.perf_counter()
+        body = orjson.dumps(content, option=orjson.OPT_UTC_Z)
+        HTTP_RESPONSE_RENDER_SECONDS.observe(time.perf_counter() - started)
+        return body
+
 
-# Успешный ответ
-def success_response(message: str, code: Codes, data=None):
-    return JSONResponse(
+# traceId — 16 случайных байт в hex (как uuid4().hex, но без сборки объекта UUID),
+# timestamp — aware datetime, orjson сам отдаёт его в ISO 8601 с суффиксом Z
+def _trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# Успешный ответ; headers — ETag, Cache-Control и прочие заголовки кэширования
+def success_response(message: str, code: Codes, data=None, headers: dict | None = None):
+    return ORJSONResponse(
         status_code=200,
+        headers=headers,
         content={
             "data": data,
             "message": message,
             "meta": {
                 "code": code,
-                "traceId": uuid.uuid4().hex,
-                "timestamp": datetime.utcnow().isoformat() + "Z"
+                "traceId": _trace_id(),
+                "timestamp": _now()
             }
         }
     )
 
-def success_pagination_response(message: str, code: Codes, data=None, pagination=None):
-    return JSONResponse(
+def success_pagination_response(message: str, code: Codes, data=None, pagination=None, headers: dict | None = None):
+    return ORJSONResponse(
         status_code=200,
+        headers=headers,
         content={
             "data": data,
             "pagination": pagination,
             "message": message,
             "meta": {
                 "code": code,
-                "traceId": uuid.uuid4().hex,
-                "timestamp": datetime.utcnow().isoformat() + "Z"
+                "traceId": _trace_id(),
+                "timestamp": _now()
             }
         }
     )
+
+# Условные GET. ETag слабый: в теле случайный traceId и timestamp, совпадает только смысл ответа
+def weak_etag(opaque: str) -> str:
+    return f'W/"{opaque}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+# If-None-Match сравнивается слабо (RFC 9110); If-Modified-Since — только без If-None-Match
+def is_not_modified(request_headers, headers: dict) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers.get("ETag")
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+    since = request_headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+
+
+# 304 без тела: ни запроса в БД, ни сериализации — только те же заголовки кэширования
+def not_modified_response(headers: dict):
+    return Response(status_code=304, headers=headers)
+
+
 # Ошибка
 def error_response(status_code: int, message: str, code: Codes):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status_code,
         content=
         {
@@ -43,8 +109,8 @@ def error_response(status_code: int, message: str, code: Codes):
                 "code": code,
             },
             "meta": {
-                "traceId": uuid.uuid4().hex,
-                "timestamp": datetime.utcnow().isoformat() + "Z"
+                "traceId": _trace_id(),
+                "timestamp": _now()
             }
         }
     )
@@ -1,4 +1,7 @@
+from .global_stats import router as global_stats_router
 from .health import router as health_router
+from .live import router as live_router
+from .metrics import router as metrics_router
 from .stats import router as stats_router
 
-routers = [health_router, stats_router]
+routers = [health_router, metrics_router, global_stats_router, live_router, stats_router]
@@ -0,0 +1,48 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from app.routes.stats import get_db
+from app.services.constants import GLOBAL_TOP_MAX, SORT_FIELDS
+from app.services.async_stats_service import AsyncStatsService
+from app.responses import success_response, error_response
+from app.codes import Codes
+
+# Статистика по всем серверам сразу: суммы игрока и глобальный топ.
+# Читается из player_totals, которую ведут триггеры на player_stats
+router = APIRouter(prefix="/stats/global", tags=["stats"])
+
+
+@router.get("/top")
+async def get_global_top(
+    sort: Literal[SORT_FIELDS] = Query("kills"),
+    limit: int = Query(20, ge=1, le=GLOBAL_TOP_MAX),
+    db: AsyncSession = Depends(get_db)
+):
+    items = await AsyncStatsService.get_global_top(db, sort, limit)
+    return success_response(
+        message="Глобальный топ игроков получен",
+        code=Codes.STATS_LIST_FETCHED,
+        data={"items": items}
+    )
+
+
+@router.get("/{user_id}")
+async def get_global_stats(
+    user_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        data = await AsyncStatsService.get_global_stats(db, user_id)
+        return success_response(
+            message="Статистика по всем серверам получена",
+            code=Codes.STATS_FETCHED,
+            data=data
+        )
+    except ValueError:
+        return error_response(
+            404,
+            "Статистика не найдена",
+            Codes.STATS_NOT_FOUND
+        )
@@ -1,9 +1,16 @@
-from fastapi import APIRouter
-from app.responses import success_response
+from fastapi import APIRouter, Request
+from app.responses import error_response, success_response
 from app.codes import Codes
 
 router = APIRouter(tags=["heals"])
 
 @router.get("/live")
-def get_live():
+async def get_live():
     return success_response(data={"alive": True}, code=Codes.LIVE_OK, message="svc-stats жив")
+
+# Readiness-проба: 503, пока не прогрет пул соединений (app/main.py, warm_up), и с начала остановки
+@router.get("/ready")
+async def get_ready(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        return error_response(503, "svc-stats ещё не готов", Codes.NOT_READY)
+    return success_response(data={"ready": True}, code=Codes.READY_OK, message="svc-stats готов")
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Literal
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.services.constants import LIVE_TOP_MAX, SORT_FIELDS
+from app.services.live_leaderboard import live_leaderboard
+from app.settings import settings
+
+# Живой лидерборд вместо опроса GET /stats раз в секунду: первым сообщением
+# приходит snapshot (top целиком), дальше — diff с изменившимися местами и выбывшими.
+# Роутер подключается до stats, иначе /stats/live разбирался бы как /stats/{user_id}
+router = APIRouter(prefix="/stats/live", tags=["stats"])
+
+_WS_PING = '{"type":"ping"}'
+
+
+#Server-Sent Events: event: snapshot | diff, data — JSON; пинг комментарием раз в STATS_LIVE_PING_S
+@router.get("")
+async def live_top_sse(
+    server_name: str = Query(...),
+    sort: Literal[SORT_FIELDS] = Query("kills"),
+    top: int = Query(20, ge=1, le=LIVE_TOP_MAX)
+):
+    subscriber = live_leaderboard.subscribe(server_name, sort, top)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), settings.STATS_LIVE_PING_S)
+                except TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield message.sse
+        finally:
+            live_leaderboard.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Без буферизации на прокси: иначе diff доходят пачками
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+#То же по WebSocket: каждое сообщение — JSON с полем type (snapshot | diff | ping).
+#Клиенту писать не нужно: ушедший клиент обнаруживается на ближайшей отправке, в том числе пинга
+@router.websocket("/ws")
+async def live_top_ws(
+    websocket: WebSocket,
+    server_name: str = Query(...),
+    sort: Literal[SORT_FIELDS] = Query("kills"),
+    top: int = Query(20, ge=1, le=LIVE_TOP_MAX)
+):
+    await websocket.accept()
+    subscriber = live_leaderboard.subscribe(server_name, sort, top)
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), settings.STATS_LIVE_PING_S)
+            except TimeoutError:
+                await websocket.send_text(_WS_PING)
+                continue
+            await websocket.send_text(message.data.decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_leaderboard.unsubscribe(subscriber)
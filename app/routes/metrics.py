@@ -0,0 +1,23 @@
+import os
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+router = APIRouter(tags=["metrics"])
+
+
+# При нескольких воркерах uvicorn (HTTP_WORKERS > 1) каждый процесс считает своё.
+# С PROMETHEUS_MULTIPROC_DIR метрики всех воркеров складываются из файлов в этом
+# каталоге; gauge с set_function (пул соединений) в этом режиме не собираются
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
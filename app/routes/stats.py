@@ -1,40 +1,141 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+import zlib
+from typing import Literal
+
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from uuid import UUID
 
 class StatsResponse(BaseModel):
     user_id: UUID
 
-from app.database import SessionLocal
-from app.schemas import StatsUpdate
-from app.services.stats_service import StatsService
+from app.database import AsyncSessionLocal
+from app.schemas import RosterCreate, StatsUpdate
+from app.services import bulk_io
+from app.services.constants import AROUND_MAX, BULK_FORMATS, CONSISTENCY_LIVE, CONSISTENCY_SNAPSHOT, SORT_FIELDS
+from app.services.async_stats_service import AsyncStatsService
+from app.services.write_buffer import DeltaOutOfRange, write_buffer, WriteBufferFull
 from app.responses import (
     success_response,
     error_response,
-    success_pagination_response
+    success_pagination_response,
+    http_date,
+    is_not_modified,
+    not_modified_response,
+    weak_etag
 )
+from app.settings import settings
 from app.codes import Codes
 
 router = APIRouter(prefix="/stats", tags=["stats"]) #Все эндпоинты будут начинаться с /stats
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def _invalid_window():
+    return error_response(
+        400,
+        "Некорректное окно статистики",
+        Codes.INVALID_WINDOW
+    )
+
+#Заголовки кэширования статистики игрока: ETag — версия строки и время записи,
+#Last-Modified — время записи. no-cache: хранить можно, но перед отдачей сверяться с сервисом
+def _stats_cache_headers(data: dict) -> dict:
+    updated_at = data["updated_at"]
+    opaque = f"{data['version']}.{int(updated_at.timestamp() * 1_000_000)}"
+    headers = {"Cache-Control": "no-cache"}
+    if data["rank"] is not None:
+        # Места меняются с пересборкой снимков, а не с записью строки: они входят в ETag,
+        # а Last-Modified их не отражает и не отдаётся
+        opaque += f".{zlib.crc32(orjson.dumps(data['rank'], option=orjson.OPT_SORT_KEYS)):08x}"
+    else:
+        headers["Last-Modified"] = http_date(updated_at)
+    headers["ETag"] = weak_etag(opaque)
+    return headers
+
+
+#Заголовки кэширования страницы лидерборда. ETag — только у живого лидерборда, из версии доски
+#сервера в БД (её двигает любая запись в его player_stats из любого процесса): 304 отдаётся
+#после одного поиска по первичному ключу, без запроса страницы. max-age > 0 — страницу кэширует и CDN
+async def _leaderboard_cache_headers(db: AsyncSession, server_name: str, sort: str, versioned: bool) -> dict:
+    max_age = settings.STATS_LEADERBOARD_MAX_AGE_S
+    headers = {"Cache-Control": f"public, max-age={max_age}" if max_age > 0 else "no-cache"}
+    if versioned and settings.STATS_LEADERBOARD_ETAG:
+        version = await AsyncStatsService.get_board_version(db, server_name)
+        headers["ETag"] = weak_etag(f"{version}.{sort}")
+    return headers
+
+#Выгрузка player_stats сервера (без server_name — всех серверов) потоком NDJSON или CSV.
+#Маршруты /export и /import объявлены до /{user_id}, иначе их путь разбирался бы как UUID
+@router.get("/export")
+async def export_stats(
+    server_name: str | None = Query(None),
+    format: Literal[BULK_FORMATS] = Query("ndjson")
+):
+    # Своя сессия на всё время отдачи: ответ читается дольше, чем живёт обработчик
+    async def chunks():
+        async with AsyncSessionLocal() as db:
+            async for chunk in AsyncStatsService.export_stats(db, server_name, format):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=bulk_io.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="player_stats.{format}"'}
+    )
+
+#Загрузка выгрузки обратно: тело запроса в том же формате, значения из него заменяют текущие
+@router.post("/import")
+async def import_stats(
+    request: Request,
+    format: Literal[BULK_FORMATS] = Query("ndjson"),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        data = await AsyncStatsService.import_stats(db, request.stream(), format)
+    except ValueError as exc:
+        return error_response(
+            422,
+            f"Некорректные строки загрузки: {exc.args[1]}",
+            Codes.IMPORT_INVALID_ROWS
+        )
+    return success_response(
+        message="Статистика загружена",
+        code=Codes.STATS_IMPORTED,
+        data=data
+    )
+
+#Ростер сервера одним запросом: created — созданные игроки, existing — у кого статистика уже была.
+#Объявлен до /{user_id} по той же причине, что /export
+@router.post("/bulk")
+async def create_roster(
+    payload: RosterCreate,
+    server_name: str = Query(...),
+    db: AsyncSession = Depends(get_db)
+):
+    data = await AsyncStatsService.create_roster(db, server_name, payload.user_ids)
+    return success_response(
+        message="Ростер создан",
+        code=Codes.STATS_CREATED,
+        data=data
+    )
 
 #Создание статистики игрока
 @router.post("/{user_id}")
-def create_stats(
+async def create_stats(
     user_id: UUID,
     server_name: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        StatsService.create_stats(db, user_id, server_name)
+        await AsyncStatsService.create_stats(db, user_id, server_name)
         return success_response(
             message="Статистика создана",
             code=Codes.STATS_CREATED,
@@ -53,14 +154,37 @@ def create_stats(
 
 #Обновляем статистику
 @router.patch("/{user_id}")
-def update_stats(
+async def update_stats(
     user_id: UUID,
     payload: StatsUpdate,
     server_name: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    if write_buffer.enabled:
+        delta = (user_id, server_name, payload.time_played, payload.kills, payload.deaths)
+        try:
+            # Ждать места в буфере в event loop нельзя — ждём в пуле потоков
+            if not write_buffer.add(*delta, wait=False):
+                await run_in_threadpool(write_buffer.add, *delta)
+        except WriteBufferFull:
+            return error_response(
+                503,
+                "Буфер статистики переполнен, повторите позже",
+                Codes.STATS_BUFFER_FULL
+            )
+        except DeltaOutOfRange:
+            return error_response(
+                422,
+                "Сумма ожидающих изменений вышла за пределы INTEGER",
+                Codes.DELTA_OUT_OF_RANGE
+            )
+        return success_response(
+            message="Статистика принята",
+            code=Codes.STATS_ACCEPTED
+        )
+
     try:
-        StatsService.update_stats(
+        await AsyncStatsService.update_stats(
         db,
         user_id,
         server_name,
@@ -80,16 +204,18 @@ def update_stats(
         )
 
 
-@router.get("/{user_id}")
-def get_stats(
+#Место игрока на сервере по полю sort: 1 — первое, players — всего игроков на сервере
+@router.get("/{user_id}/rank")
+async def get_rank(
     user_id: UUID,
     server_name: str = Query(...),
-    db: Session = Depends(get_db)
+    sort: Literal[SORT_FIELDS] = Query("kills"),
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        data = StatsService.get_stats(db, user_id, server_name)
+        data = await AsyncStatsService.get_rank(db, user_id, server_name, sort)
         return success_response(
-            message="Статистика получена",
+            message="Место игрока получено",
             code=Codes.STATS_FETCHED,
             data=data
         )
@@ -101,25 +227,123 @@ def get_stats(
         )
 
 
+#Игрок и по count соседей сверху и снизу в лидерборде по полю sort; rank — если известно место
+@router.get("/{user_id}/around")
+async def get_around(
+    user_id: UUID,
+    server_name: str = Query(...),
+    sort: Literal[SORT_FIELDS] = Query("kills"),
+    count: int = Query(10, ge=1, le=AROUND_MAX),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        items = await AsyncStatsService.get_around(db, user_id, server_name, sort, count)
+        return success_response(
+            message="Соседи игрока получены",
+            code=Codes.STATS_LIST_FETCHED,
+            data={"items": items}
+        )
+    except ValueError:
+        return error_response(
+            404,
+            "Статистика не найдена",
+            Codes.STATS_NOT_FOUND
+        )
+
+
+#window — статистика за окно: day | week | season | from..to (см. services/windows.py).
+#Без window — ETag и Last-Modified: If-None-Match с той же версией получает 304 без тела
+@router.get("/{user_id}")
+async def get_stats(
+    request: Request,
+    user_id: UUID,
+    server_name: str = Query(...),
+    window: str | None = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    headers = None
+    try:
+        if window is None:
+            data = await AsyncStatsService.get_stats(db, user_id, server_name)
+            headers = _stats_cache_headers(data)
+            if is_not_modified(request.headers, headers):
+                return not_modified_response(headers)
+        else:
+            data = await AsyncStatsService.get_window_stats(db, user_id, server_name, window)
+        return success_response(
+            message="Статистика получена",
+            code=Codes.STATS_FETCHED,
+            data=data,
+            headers=headers
+        )
+    except ValueError as exc:
+        if str(exc) == Codes.INVALID_WINDOW:
+            return _invalid_window()
+        return error_response(
+            404,
+            "Статистика не найдена",
+            Codes.STATS_NOT_FOUND
+        )
+
+
 @router.get("")
-def get_top_stats(
+async def get_top_stats(
+    request: Request,
     server_name: str = Query(...),
-    sort: str = Query("kills", enum=["kills", "deaths", "time_played"]),
+    sort: Literal[SORT_FIELDS] = Query("kills"),
     page: int = Query(1, ge=1),
     pageSize: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: str | None = Query(None),
+    consistency: str = Query(CONSISTENCY_LIVE, enum=[CONSISTENCY_LIVE, CONSISTENCY_SNAPSHOT]),
+    window: str | None = Query(None),
+    db: AsyncSession = Depends(get_db)
 ):
-    data, pagination = StatsService.get_top_stats(
+    # Лидерборд окна листается только по номеру страницы и снимков у него нет
+    if window is not None and (cursor is not None or consistency == CONSISTENCY_SNAPSHOT):
+        return _invalid_window()
+
+    headers = await _leaderboard_cache_headers(
         db,
         server_name,
         sort,
-        page,
-        pageSize
+        versioned=window is None and consistency == CONSISTENCY_LIVE
     )
+    if is_not_modified(request.headers, headers):
+        return not_modified_response(headers)
+
+    try:
+        if window is None:
+            data, pagination = await AsyncStatsService.get_top_stats(
+                db,
+                server_name,
+                sort,
+                page,
+                pageSize,
+                cursor,
+                consistency
+            )
+        else:
+            data, pagination = await AsyncStatsService.get_window_top_stats(
+                db,
+                server_name,
+                sort,
+                page,
+                pageSize,
+                window
+            )
+    except ValueError as exc:
+        if str(exc) == Codes.INVALID_WINDOW:
+            return _invalid_window()
+        return error_response(
+            400,
+            "Некорректный курсор",
+            Codes.INVALID_CURSOR
+        )
 #Route только упаковывает ответ, не считает ничего
     return success_pagination_response(
         message="Топ игроков получен",
         code=Codes.STATS_LIST_FETCHED,
         data={"items": data},
-        pagination=pagination
+        pagination=pagination,
+        headers=headers
     )
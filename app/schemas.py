@@ -1,7 +1,15 @@
+from uuid import UUID
+
 from pydantic import BaseModel, Field
 
+from app.services.constants import INT32_MAX, ROSTER_MAX
+
 
 class StatsUpdate(BaseModel):
-    time_played: int = Field(ge=0)
-    kills: int = Field(ge=0)
-    deaths: int = Field(ge=0)
+    time_played: int = Field(ge=0, le=INT32_MAX)
+    kills: int = Field(ge=0, le=INT32_MAX)
+    deaths: int = Field(ge=0, le=INT32_MAX)
+
+
+class RosterCreate(BaseModel):
+    user_ids: list[UUID] = Field(min_length=1, max_length=ROSTER_MAX)
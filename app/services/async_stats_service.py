@@ -0,0 +1,286 @@
+import asyncio
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from app.models import PlayerStats
+from app.services import bulk_io, queries
+from app.services.constants import CONSISTENCY_LIVE, CONSISTENCY_SNAPSHOT, EXPORT_QUEUE_CHUNKS
+from app.services.cache import stats_cache
+from app.services.rank_index import rank_index
+from app.services.shared_cache import shared_cache
+from app.services.windows import parse_window
+from app.services.write_hooks import after_bulk_write, after_write_async
+from app.codes import Codes
+from app.settings import settings
+
+
+# Асинхронный двойник StatsService для HTTP-маршрутов (AsyncSession + asyncpg).
+# Запросы, DTO, кэш и хуки записи те же, что у синхронного сервиса —
+# отличается только await на походах в БД
+class AsyncStatsService:
+
+    @staticmethod
+    async def create_stats(db: AsyncSession, user_id: UUID, server_name: str) -> PlayerStats:
+        stats = (await db.scalars(queries.insert_stats_stmt(user_id, server_name))).first()
+
+        if stats is None:
+            await db.rollback()
+            raise ValueError(Codes.STATS_ALREADY_EXISTS)
+
+        await db.commit()
+        await after_write_async([(user_id, server_name)], [(user_id, server_name, (0, 0, 0), (0, 0, 0))])
+        return stats
+
+    @staticmethod
+    async def create_roster(db: AsyncSession, server_name: str, user_ids: list[UUID]) -> dict:
+        user_ids = sorted(set(user_ids))
+        created = set((await db.scalars(queries.insert_roster_stmt(server_name, user_ids))).all())
+        await db.commit()
+
+        if created:
+            await after_write_async(
+                [(user_id, server_name) for user_id in created],
+                [(user_id, server_name, (0, 0, 0), (0, 0, 0)) for user_id in created]
+            )
+        return queries.to_roster_dto(server_name, user_ids, created)
+
+    @staticmethod
+    async def update_stats(
+        db: AsyncSession,
+        user_id: UUID,
+        server_name: str,
+        time_played: int,
+        kills: int,
+        deaths: int
+    ) -> PlayerStats:
+        stats = (await db.scalars(
+            queries.update_stats_stmt(user_id, server_name, time_played, kills, deaths)
+        )).first()
+
+        if not stats:
+            await db.rollback()
+            raise ValueError("STATS_NOT_FOUND")
+
+        await db.commit()
+        await after_write_async(
+            [(user_id, server_name)],
+            [(user_id, server_name, (stats.time_played, stats.kills, stats.deaths), (time_played, kills, deaths))]
+        )
+        return stats
+
+    @staticmethod
+    async def update_stats_batch(
+            db: AsyncSession,
+            deltas: dict[tuple[UUID, str], tuple[int, int, int]]
+    ) -> set[tuple[UUID, str]]:
+        if not deltas:
+            return set()
+
+        changed = []
+        for stmt in queries.update_deltas_stmts(queries.delta_rows(deltas)):
+            changed.extend(await db.execute(stmt))
+
+        await db.commit()
+        found = {(row.user_id, row.server_name) for row in changed}
+        await after_write_async(found, queries.changes_from_rows(changed, deltas))
+        return found
+
+    @staticmethod
+    async def get_stats(db: AsyncSession, user_id: UUID, server_name: str) -> dict:
+        key = (user_id, server_name)
+        cached = stats_cache.get(key)
+        if cached is not None:
+            return cached
+        stamp = stats_cache.stamp()
+
+        data = await shared_cache.aget_stats(server_name, user_id)
+        if data is None:
+            stats = (await db.scalars(queries.select_stats(user_id, server_name))).first()
+
+            if not stats:
+                raise ValueError("STATS_NOT_FOUND")
+
+            data = queries.to_dto(stats)
+            data["rank"] = None
+            if settings.LEADERBOARD_SNAPSHOT_INTERVAL_S > 0:
+                rows = (await db.execute(queries.select_ranks(user_id, server_name))).all()
+                data["rank"] = {sort_key: rank for sort_key, rank in rows}
+            await shared_cache.aset_stats(server_name, user_id, data)
+        stats_cache.set(key, data, stamp)
+        return data
+
+    @staticmethod
+    async def get_stats_batch(db: AsyncSession, keys: list[tuple[UUID, str]]) -> list[dict]:
+        if not keys:
+            return []
+
+        items = (await db.scalars(queries.select_stats_batch(keys))).all()
+        return [queries.to_dto(s) for s in items]
+
+    @staticmethod
+    async def get_rank(db: AsyncSession, user_id: UUID, server_name: str, sort: str) -> dict:
+        stats = (await db.scalars(queries.select_stats(user_id, server_name))).first()
+
+        if not stats:
+            raise ValueError("STATS_NOT_FOUND")
+
+        score = getattr(stats, sort)
+        found = rank_index.rank(server_name, sort, score, user_id)
+        if found is None:
+            found = (
+                await db.scalar(queries.select_rank_count(server_name, sort, score, user_id)) + 1,
+                await db.scalar(queries.select_total_players(server_name)) or 0
+            )
+
+        return queries.to_rank_dto(user_id, server_name, sort, score, *found)
+
+    @staticmethod
+    async def get_around(db: AsyncSession, user_id: UUID, server_name: str, sort: str, count: int) -> list[dict]:
+        rows = (await db.execute(queries.around_query(user_id, server_name, sort, count))).all()
+
+        if not rows:
+            raise ValueError("STATS_NOT_FOUND")
+
+        score = next(getattr(r, sort) for r in rows if r.user_id == user_id)
+        found = rank_index.rank(server_name, sort, score, user_id)
+        return queries.pack_around(rows, user_id, found[0] if found else None)
+
+    @staticmethod
+    async def get_global_stats(db: AsyncSession, user_id: UUID) -> dict:
+        totals = (await db.scalars(queries.select_player_totals(user_id))).first()
+
+        if not totals:
+            raise ValueError("STATS_NOT_FOUND")
+
+        return queries.to_totals_dto(totals)
+
+    @staticmethod
+    async def get_global_top(db: AsyncSession, sort: str, limit: int) -> list[dict]:
+        items = (await db.scalars(queries.select_global_top(sort, limit))).all()
+        return [queries.to_totals_dto(t) for t in items]
+
+    @staticmethod
+    async def get_window_stats(db: AsyncSession, user_id: UUID, server_name: str, window: str) -> dict:
+        start, end = parse_window(window)
+        row = (await db.execute(queries.select_window_stats(user_id, server_name, start, end))).one()
+
+        if not row.buckets and not (await db.scalars(queries.select_stats(user_id, server_name))).first():
+            raise ValueError("STATS_NOT_FOUND")
+
+        return queries.to_window_dto(user_id, server_name, row, start, end)
+
+    @staticmethod
+    async def get_window_top_stats(
+            db: AsyncSession,
+            server_name: str,
+            sort: str,
+            page: int,
+            page_size: int,
+            window: str
+    ) -> tuple[list[dict], dict]:
+        start, end = parse_window(window)
+        rows = (await db.execute(
+            queries.window_top_query(server_name, sort, start, end, page, page_size)
+        )).all()
+        total = rows[0].total if rows else await db.scalar(queries.select_window_total(server_name, start, end))
+
+        return queries.pack_window_page(rows, total, page, page_size, start, end)
+
+    # Версия доски сервера для ETag лидерборда; 0 — у сервера ещё нет строк
+    @staticmethod
+    async def get_board_version(db: AsyncSession, server_name: str) -> int:
+        return await db.scalar(queries.select_board_version(server_name)) or 0
+
+    @staticmethod
+    async def get_top_stats(
+            db: AsyncSession,
+            server_name: str,
+            sort: str,
+            page: int,
+            page_size: int,
+            cursor: str | None = None,
+            consistency: str = CONSISTENCY_LIVE
+    ) -> tuple[list[dict], dict]:
+        if consistency == CONSISTENCY_SNAPSHOT:
+            if cursor is not None:
+                raise ValueError("INVALID_CURSOR")
+            meta = (await db.scalars(queries.select_snapshot_meta(server_name, sort))).first()
+            if meta is not None:
+                items = (await db.scalars(
+                    queries.select_snapshot_page(server_name, sort, page, page_size)
+                )).all()
+                return queries.pack_snapshot_page(meta, items, page, page_size)
+
+        if cursor is None and shared_cache.covers(page, page_size):
+            cached = await shared_cache.aget_top(server_name, sort, page, page_size)
+            if cached is None:
+                stmt, _ = queries.top_stats_query(server_name, sort, 1, shared_cache.top_size, None)
+                rows = (await db.scalars(stmt)).all()
+                total = await db.scalar(queries.select_total_players(server_name)) or 0
+                await shared_cache.afill_top(server_name, sort, rows, total)
+                cached = rows[(page - 1) * page_size:page * page_size], total
+            items, total = cached
+            return queries.pack_top_stats(items, total, sort, page, page_size, None)
+
+        stmt, direction = queries.top_stats_query(server_name, sort, page, page_size, cursor)
+        total = await db.scalar(queries.select_total_players(server_name)) or 0
+        items = (await db.scalars(stmt)).all()
+
+        return queries.pack_top_stats(items, total, sort, page, page_size, direction)
+
+    # asyncpg отдаёт COPY в callback, а ответу нужен итератор: между ними очередь
+    # на EXPORT_QUEUE_CHUNKS кусков. Медленный клиент заполняет её, COPY ждёт на put,
+    # и Postgres упирается в TCP-окно — память не растёт. Ушедший клиент отменяет COPY
+    @staticmethod
+    async def export_stats(db: AsyncSession, server_name: str | None, fmt: str) -> AsyncIterator[bytes]:
+        await db.execute(bulk_io.NO_STATEMENT_TIMEOUT)
+        raw = await (await db.connection()).get_raw_connection()
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+
+        async def copy():
+            try:
+                await raw.driver_connection.copy_from_query(
+                    bulk_io.export_select(fmt, server_name, "$1"),
+                    *([server_name] if server_name is not None else []),
+                    output=chunks.put,
+                    **bulk_io.export_options(fmt)
+                )
+            except Exception as exc:
+                await chunks.put(exc)
+            else:
+                await chunks.put(None)
+
+        task = asyncio.create_task(copy())
+        try:
+            while (chunk := await chunks.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                # asyncpg отдаёт bytearray, Starlette ждёт bytes или str
+                yield bytes(chunk)
+        finally:
+            task.cancel()
+
+    # chunks — тело запроса как есть: asyncpg отправляет его в COPY по мере чтения
+    @staticmethod
+    async def import_stats(db: AsyncSession, chunks: AsyncIterator[bytes], fmt: str) -> dict:
+        table, columns, options = bulk_io.COPY_TARGETS[fmt]
+        try:
+            await db.execute(bulk_io.NO_STATEMENT_TIMEOUT)
+            await db.execute(bulk_io.SKIP_BUCKETS)
+            for ddl in bulk_io.STAGING_DDL:
+                await db.execute(ddl)
+            raw = await (await db.connection()).get_raw_connection()
+            await raw.driver_connection.copy_to_table(table, source=chunks, columns=list(columns), **options)
+            if fmt == "ndjson":
+                await db.execute(bulk_io.STAGE_NDJSON)
+            row = (await db.execute(bulk_io.MERGE_IMPORT)).one()
+            await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            message = bulk_io.import_error(exc)
+            if message is None:
+                raise
+            raise ValueError(Codes.IMPORT_INVALID_ROWS, message) from exc
+
+        after_bulk_write()
+        return bulk_io.to_import_dto(row)
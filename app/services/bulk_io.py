@@ -0,0 +1,135 @@
+from sqlalchemy import text
+
+# Выгрузка и загрузка player_stats целиком: одни и те же колонки в обе стороны,
+# так что выгрузка одного стенда загружается в другой без преобразований.
+#   ndjson — объект на строку: {"user_id": ..., "server_name": ..., "time_played": ..., ...}
+#   csv    — первая строка заголовок, колонки в порядке BULK_COLUMNS
+BULK_COLUMNS = ("user_id", "server_name", "time_played", "kills", "deaths")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+# Загрузка: COPY во временную таблицу транзакции, затем одно слияние в player_stats.
+# Ограничения staging-таблицы проверяют данные до слияния — те же правила, что у PATCH.
+# Первичный ключ ловит повтор ключа в загрузке, даже если строки совпадают целиком
+STAGING_DDL = (
+    text("""
+    CREATE TEMP TABLE player_stats_import (
+        user_id UUID NOT NULL,
+        server_name TEXT NOT NULL,
+        time_played INTEGER NOT NULL CHECK (time_played >= 0),
+        kills INTEGER NOT NULL CHECK (kills >= 0),
+        deaths INTEGER NOT NULL CHECK (deaths >= 0),
+        PRIMARY KEY (server_name, user_id)
+    ) ON COMMIT DROP
+    """),
+    # NDJSON Postgres не читает: строка целиком ложится в jsonb-колонку через CSV-режим
+    # COPY с разделителем и кавычкой из управляющих символов, которых в JSON-тексте нет
+    text("CREATE TEMP TABLE player_stats_import_raw (doc JSONB) ON COMMIT DROP")
+)
+
+# Таблица, колонки и параметры COPY по формату; параметры — в именах asyncpg.copy_to_table
+COPY_TARGETS = {
+    "csv": ("player_stats_import", BULK_COLUMNS, {"format": "csv", "header": True}),
+    "ndjson": ("player_stats_import_raw", ("doc",), {"format": "csv", "delimiter": "\x01", "quote": "\x02"})
+}
+
+
+# Параметры COPY текстом — для psycopg2 (cursor.copy_expert)
+def _copy_options_sql(options: dict) -> str:
+    rendered = []
+    for name, value in options.items():
+        if value is True:
+            rendered.append(f"{name.upper()} true")
+        elif name == "format":
+            rendered.append(f"FORMAT {value}")
+        else:
+            rendered.append(f"{name.upper()} E'\\x{ord(value):02x}'")
+    return ", ".join(rendered)
+
+
+def copy_sql(fmt: str) -> str:
+    table, columns, options = COPY_TARGETS[fmt]
+    return f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH ({_copy_options_sql(options)})"
+
+
+# Выгрузка — COPY (SELECT ...) TO STDOUT с теми же параметрами, что у загрузки того же формата:
+# строки форматирует Postgres и отдаёт потоком, клиент только пересылает байты.
+# NDJSON — row_to_json по строке, в CSV-режиме с управляющими символами он выходит как есть.
+# Без ORDER BY: сервер читается последовательным сканом, порядок строк не гарантируется.
+# placeholder — параметр server_name в синтаксисе драйвера: %s (psycopg2) или $1 (asyncpg)
+def export_select(fmt: str, server_name: str | None, placeholder: str) -> str:
+    where = f" WHERE server_name = {placeholder}" if server_name is not None else ""
+    rows = f"SELECT {', '.join(BULK_COLUMNS)} FROM player_stats{where}"
+    return rows if fmt == "csv" else f"SELECT row_to_json(r) FROM ({rows}) r"
+
+
+def export_options(fmt: str) -> dict:
+    return COPY_TARGETS[fmt][2]
+
+
+def export_sql(fmt: str, server_name: str | None) -> str:
+    return f"COPY ({export_select(fmt, server_name, '%s')}) TO STDOUT WITH ({_copy_options_sql(export_options(fmt))})"
+
+
+# Пустые строки NDJSON пропускаются; отсутствующее поле — NULL и ошибка NOT NULL staging-таблицы
+STAGE_NDJSON = text("""
+    INSERT INTO player_stats_import
+    SELECT r.* FROM player_stats_import_raw, jsonb_populate_record(NULL::player_stats_import, doc) r
+    WHERE doc IS NOT NULL
+""")
+
+# Слияние одним запросом: строки загрузки заменяют значения в player_stats.
+# Ключи идут в порядке (server_name, user_id), как у пачечных записей (queries.delta_rows), —
+# параллельные записи берут блокировки строк в том же порядке и не ловят deadlock.
+# Совпадающие строки не переписываются: повторная загрузка того же файла почти ничего не стоит.
+# Дубликатов ключа здесь уже нет — их отвергает первичный ключ staging-таблицы
+MERGE_IMPORT = text("""
+    WITH merged AS (
+        INSERT INTO player_stats (user_id, server_name, time_played, kills, deaths)
+        SELECT user_id, server_name, time_played, kills, deaths
+        FROM player_stats_import
+        ORDER BY server_name, user_id
+        ON CONFLICT (user_id, server_name) DO UPDATE SET
+            time_played = EXCLUDED.time_played,
+            kills = EXCLUDED.kills,
+            deaths = EXCLUDED.deaths,
+            version = player_stats.version + 1,
+            updated_at = now()
+        WHERE (player_stats.time_played, player_stats.kills, player_stats.deaths)
+            IS DISTINCT FROM (EXCLUDED.time_played, EXCLUDED.kills, EXCLUDED.deaths)
+        RETURNING xmax = 0 AS inserted
+    )
+    SELECT
+        (SELECT count(*) FROM player_stats_import) AS rows,
+        count(*) FILTER (WHERE inserted) AS inserted,
+        count(*) FILTER (WHERE NOT inserted) AS updated
+    FROM merged
+""").execution_options(metrics_label="stats_import_merge")
+
+# Загрузка — не «сегодняшняя игра»: в бакеты статистики по времени не пишем
+SKIP_BUCKETS = text("SET LOCAL stats.skip_buckets = on")
+
+# Выгрузка и загрузка — один запрос на все строки, DB_STATEMENT_TIMEOUT_MS на них не распространяется
+NO_STATEMENT_TIMEOUT = text("SET LOCAL statement_timeout = 0")
+
+
+def to_import_dto(row) -> dict:
+    return {"rows": row.rows, "inserted": row.inserted, "updated": row.updated}
+
+
+# Ошибка в самих данных загрузки (SQLSTATE 21, 22, 23: формат, ограничения, дубликаты) —
+# текст Postgres для клиента, с номером строки COPY, если он есть. Прочие ошибки — None
+def import_error(exc: Exception) -> str | None:
+    orig = getattr(exc, "orig", None) or exc
+    # asyncpg под адаптером SQLAlchemy: исходное исключение — в __cause__
+    orig = orig.__cause__ if getattr(orig, "__cause__", None) is not None else orig
+    sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if not sqlstate or sqlstate[:2] not in ("21", "22", "23"):
+        return None
+
+    diag = getattr(orig, "diag", None)
+    message = diag.message_primary if diag is not None else getattr(orig, "message", str(orig))
+    context = diag.context if diag is not None else getattr(orig, "context", None)
+    copy_line = next((line for line in (context or "").splitlines() if line.startswith("COPY")), None)
+    return f"{message} ({copy_line})" if copy_line else message
@@ -0,0 +1,89 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+from app.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+from app.settings import settings
+
+# Маркер инвалидированного ключа: хранит номер инвалидации, чтобы чтение,
+# начатое до записи, не положило в кэш устаревшее значение
+_INVALIDATED = object()
+
+
+# Ограниченный TTL + LRU кэш в памяти процесса.
+# Все операции под одним Lock: в него ходят и обработчики HTTP, и пул потоков gRPC.
+# У каждого воркера uvicorn свой экземпляр — запись в другом процессе
+# видна здесь не позже чем через ttl_s.
+class TTLCache:
+
+    def __init__(self, name: str, max_size: int, ttl_s: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.enabled = max_size > 0 and ttl_s > 0
+
+        self._items: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamps = itertools.count(1)
+
+        self._hits = CACHE_HITS.labels(name)
+        self._misses = CACHE_MISSES.labels(name)
+        self._evictions = CACHE_EVICTIONS.labels(name)
+
+# Номер, который читатель берёт до похода в БД и передаёт в set()
+    def stamp(self) -> int:
+        return next(self._stamps)
+
+    def get(self, key: Hashable) -> Any | None:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[1] is _INVALIDATED or entry[0] < time.monotonic():
+                self._misses.inc()
+                return None
+            self._items.move_to_end(key)
+            self._hits.inc()
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, stamp: int):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            entry = self._items.get(key)
+            # Ключ инвалидировали после начала чтения — значение могло устареть
+            if entry is not None and entry[1] is _INVALIDATED and entry[2] > stamp:
+                return
+            self._put(key, value, stamp)
+
+    def invalidate_many(self, keys: Iterable[Hashable]):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            stamp = next(self._stamps)
+            for key in keys:
+                self._put(key, _INVALIDATED, stamp)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def _put(self, key: Hashable, value: Any, stamp: int):
+        self._items[key] = (time.monotonic() + self.ttl_s, value, stamp)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self._evictions.inc()
+
+
+# DTO из StatsService.get_stats по ключу (user_id, server_name)
+stats_cache = TTLCache(
+    "stats",
+    max_size=settings.STATS_CACHE_SIZE,
+    ttl_s=settings.STATS_CACHE_TTL_S
+)
@@ -5,3 +5,37 @@ KD_RATIO_PRECISION = 2
 PAGE_NEXT = +1
 PAGE_PREV = -1
 
+# Сколько строк в одном multi-row INSERT (лимит bind-параметров Postgres — 65535)
+UPSERT_CHUNK_ROWS = 5000
+
+# Границы колонок INTEGER в player_stats: значения и суммы дельт за их пределами
+# отклоняются до похода в БД
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+
+# Поля, по которым строится лидерборд
+SORT_FIELDS = ("kills", "deaths", "time_played")
+
+# Позиции полей в тройках (time_played, kills, deaths) — дельты и новые значения в after_write
+FIELD_POSITIONS = {"time_played": 0, "kills": 1, "deaths": 2}
+
+# Максимальный размер глобального топа за один запрос
+GLOBAL_TOP_MAX = 100
+
+# Сколько соседей сверху и снизу можно запросить в «вокруг игрока»
+AROUND_MAX = 50
+
+# Сколько игроков можно создать одним POST /stats/bulk
+ROSTER_MAX = 10000
+
+# Максимальный top живого лидерборда (GET /stats/live)
+LIVE_TOP_MAX = 100
+
+# Форматы выгрузки и загрузки player_stats и сколько кусков COPY (~8 КБ) выгрузки
+# держать в памяти между Postgres и медленным клиентом
+BULK_FORMATS = ("ndjson", "csv")
+EXPORT_QUEUE_CHUNKS = 64
+
+# Режимы чтения лидерборда: живые строки или последний снимок
+CONSISTENCY_LIVE = "live"
+CONSISTENCY_SNAPSHOT = "snapshot"
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from uuid import UUID
+
+from sqlalchemy import delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+from app.models import LeaderboardSnapshot, LeaderboardSnapshotMeta, PlayerStats, ServerPlayerCount
+from app.services import queries
+from app.services.constants import SORT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_try_advisory_lock: при нескольких репликах снимки пересобирает одна
+SNAPSHOT_LOCK_ID = 7_301_226
+
+
+class LeaderboardSnapshotService:
+
+# Пересобирает снимок одного (server_name, sort) одной транзакцией:
+#читатели до коммита видят старый снимок целиком, после — новый целиком
+    @staticmethod
+    def refresh_snapshot(db: Session, server_name: str, sort: str) -> int:
+        sort_column = getattr(PlayerStats, sort)
+
+        db.execute(delete(LeaderboardSnapshot).where(
+            LeaderboardSnapshot.server_name == server_name,
+            LeaderboardSnapshot.sort_key == sort
+        ))
+
+        ranked = select(
+            PlayerStats.server_name,
+            literal(sort),
+            func.row_number().over(order_by=(sort_column.desc(), PlayerStats.user_id.desc())),
+            PlayerStats.user_id,
+            PlayerStats.time_played,
+            PlayerStats.kills,
+            PlayerStats.deaths
+        ).where(PlayerStats.server_name == server_name)
+
+        players = db.execute(insert(LeaderboardSnapshot).from_select(
+            ["server_name", "sort_key", "rank", "user_id", "time_played", "kills", "deaths"],
+            ranked
+        )).rowcount
+
+        stmt = insert(LeaderboardSnapshotMeta).values(
+            server_name=server_name,
+            sort_key=sort,
+            players=players,
+            refreshed_at=func.now()
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[LeaderboardSnapshotMeta.server_name, LeaderboardSnapshotMeta.sort_key],
+            set_={"players": stmt.excluded.players, "refreshed_at": stmt.excluded.refreshed_at}
+        ))
+
+        db.commit()
+        return players
+
+# Пересобирает снимки всех серверов. Если этим уже занята другая реплика — пропускаем цикл
+    @staticmethod
+    def refresh_all() -> int:
+        refreshed = 0
+        # Блокировка уровня сессии держится на отдельном соединении весь цикл
+        with engine.connect() as lock_conn:
+            if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": SNAPSHOT_LOCK_ID}).scalar():
+                return 0
+            lock_conn.commit()
+            try:
+                with SessionLocal() as db:
+                    servers = db.scalars(
+                        select(ServerPlayerCount.server_name).where(ServerPlayerCount.players > 0)
+                    ).all()
+                    for server_name in servers:
+                        for sort in SORT_FIELDS:
+                            LeaderboardSnapshotService.refresh_snapshot(db, server_name, sort)
+                            refreshed += 1
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SNAPSHOT_LOCK_ID})
+                lock_conn.commit()
+        return refreshed
+
+# Страница лидерборда из снимка. None — снимка для сервера ещё нет
+    @staticmethod
+    def get_top_stats(
+            db: Session,
+            server_name: str,
+            sort: str,
+            page: int,
+            page_size: int
+    ) -> tuple[list[dict], dict] | None:
+        meta = db.scalars(queries.select_snapshot_meta(server_name, sort)).first()
+        if meta is None:
+            return None
+
+        items = db.scalars(queries.select_snapshot_page(server_name, sort, page, page_size)).all()
+        return queries.pack_snapshot_page(meta, items, page, page_size)
+
+# Места игрока по всем полям сортировки: {"kills": 12, "deaths": 40, ...}
+    @staticmethod
+    def get_ranks(db: Session, user_id: UUID, server_name: str) -> dict:
+        rows = db.execute(queries.select_ranks(user_id, server_name)).all()
+        return {sort_key: rank for sort_key, rank in rows}
+
+
+# Фоновая задача из lifespan: пересборка снимков раз в interval_s секунд
+async def refresh_snapshots_periodically(interval_s: float):
+    while True:
+        try:
+            await asyncio.to_thread(LeaderboardSnapshotService.refresh_all)
+        except Exception:
+            logger.exception("Не удалось пересобрать снимки лидерборда")
+        await asyncio.sleep(interval_s)
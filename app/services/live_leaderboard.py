@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Iterable
+
+import orjson
+
+from app.database import AsyncSessionLocal
+from app.metrics import LIVE_MESSAGES, LIVE_OVERFLOWS, LIVE_SUBSCRIBERS, LIVE_TICK_SECONDS
+from app.services import queries
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Сообщение кодируется один раз на группу подписчиков: data — JSON для WebSocket,
+# sse — готовый кадр Server-Sent Events
+class LiveMessage:
+    __slots__ = ("type", "data", "sse")
+
+    def __init__(self, type: str, payload: dict):
+        self.type = type
+        self.data = orjson.dumps({"type": type, **payload})
+        self.sse = b"event: " + type.encode() + b"\ndata: " + self.data + b"\n\n"
+
+
+# Подписчик — одно соединение SSE или WebSocket со своей очередью сообщений.
+# Очередь ограничена: рассылка никогда не ждёт медленного клиента
+class LiveSubscriber:
+
+    def __init__(self, group: "_Group", queue_size: int):
+        self.group = group
+        self.queue: asyncio.Queue[LiveMessage] = asyncio.Queue(maxsize=queue_size)
+
+# Переполнение — клиент не успевает читать: накопленные diff ему уже не помогут,
+#очередь сбрасывается и в неё кладётся текущий снимок, который заменяет состояние клиента целиком
+    def push(self, message: LiveMessage, snapshot):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(snapshot())
+            LIVE_OVERFLOWS.inc()
+
+
+# Подписчики одного (server_name, sort, top) и последнее отправленное им состояние:
+# items — [(user_id, value)] в порядке лидерборда, seq — номер состояния
+class _Group:
+
+    def __init__(self, server_name: str, sort: str, top: int):
+        self.server_name = server_name
+        self.sort = sort
+        self.top = top
+        self.subscribers: set[LiveSubscriber] = set()
+        self.items: list[tuple[str, int]] | None = None
+        self.seq = 0
+
+    def snapshot(self) -> LiveMessage:
+        return LiveMessage("snapshot", {
+            "seq": self.seq,
+            "server_name": self.server_name,
+            "sort": self.sort,
+            "top": self.top,
+            "items": [
+                {"rank": rank, "user_id": user_id, "value": value}
+                for rank, (user_id, value) in enumerate(self.items, 1)
+            ]
+        })
+
+# Новое состояние доски: подписчикам уходит только то, что изменилось —
+#игроки с новым местом или значением и выбывшие из top. Ничего не изменилось — ничего не шлём
+    def publish(self, items: list[tuple[str, int]]):
+        previous = self.items
+        if items == previous:
+            return
+
+        self.items = items
+        self.seq += 1
+        cached = None
+
+        def snapshot():
+            nonlocal cached
+            if cached is None:
+                cached = self.snapshot()
+                LIVE_MESSAGES.labels("snapshot").inc()
+            return cached
+
+        if previous is None:
+            message = snapshot()
+        else:
+            message = LiveMessage("diff", _diff(self.seq, previous, items))
+            LIVE_MESSAGES.labels("diff").inc()
+
+        for subscriber in self.subscribers:
+            subscriber.push(message, snapshot)
+
+
+def _diff(seq: int, previous: list[tuple[str, int]], items: list[tuple[str, int]]) -> dict:
+    before = {user_id: (rank, value) for rank, (user_id, value) in enumerate(previous, 1)}
+    changed = [
+        {"rank": rank, "user_id": user_id, "value": value}
+        for rank, (user_id, value) in enumerate(items, 1)
+        if before.get(user_id) != (rank, value)
+    ]
+    current = {user_id for user_id, _ in items}
+    removed = [user_id for user_id, _ in previous if user_id not in current]
+    return {"seq": seq, "changed": changed, "removed": removed}
+
+
+# Живые лидерборды процесса: подписки на (server_name, sort, top), один пересчёт на тик.
+# Доска (server_name, sort) пересчитывается, если на её сервер писали через after_write
+# (StatsService, AsyncStatsService, write-behind буфер) или если её не пересчитывали
+# STATS_LIVE_RESYNC_S — так видны записи других воркеров. Один запрос на доску берёт
+# top самой большой подписки, меньшие получают свой срез. Подписчики одной группы
+# получают одно и то же уже закодированное сообщение
+class LiveLeaderboard:
+
+    def __init__(self, tick_s: float, resync_s: float, queue_size: int):
+        self.tick_s = tick_s
+        self.resync_s = resync_s
+        self.queue_size = queue_size
+
+        # Группы трогает только event loop; _dirty пополняют и потоки gRPC и буфера
+        self._groups: dict[tuple[str, str, int], _Group] = {}
+        self._refreshed_at: dict[tuple[str, str], float] = {}
+        self._dirty: set[str] = set()
+        self._all_dirty = False
+        self._lock = threading.Lock()
+
+# Подписчик получает снимок сразу, если доска уже известна, иначе — на ближайшем тике
+    def subscribe(self, server_name: str, sort: str, top: int) -> LiveSubscriber:
+        key = (server_name, sort, top)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(server_name, sort, top)
+
+        subscriber = LiveSubscriber(group, self.queue_size)
+        group.subscribers.add(subscriber)
+        if group.items is not None:
+            subscriber.queue.put_nowait(group.snapshot())
+            LIVE_MESSAGES.labels("snapshot").inc()
+        LIVE_SUBSCRIBERS.inc()
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber):
+        group = subscriber.group
+        group.subscribers.discard(subscriber)
+        LIVE_SUBSCRIBERS.dec()
+        if not group.subscribers:
+            self._groups.pop((group.server_name, group.sort, group.top), None)
+            if not any(g.server_name == group.server_name and g.sort == group.sort for g in self._groups.values()):
+                self._refreshed_at.pop((group.server_name, group.sort), None)
+
+# Вызывается из after_write: changes — (user_id, server_name, new, delta)
+    def mark_dirty(self, changes: Iterable[tuple]):
+        if not self._groups:
+            return
+        servers = {change[1] for change in changes}
+        with self._lock:
+            self._dirty |= servers
+
+# Загрузка меняет неизвестно какие серверы — пересчитываем все доски
+    def mark_all_dirty(self):
+        with self._lock:
+            self._all_dirty = True
+
+    def _due_boards(self) -> dict[tuple[str, str], int]:
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            all_dirty, self._all_dirty = self._all_dirty, False
+
+        now = time.monotonic()
+        due = {
+            (group.server_name, group.sort)
+            for group in self._groups.values()
+            if all_dirty
+            or group.server_name in dirty
+            or group.items is None
+            or self._refreshed_at.get((group.server_name, group.sort), 0) + self.resync_s < now
+        }
+        # Доска берётся на top самой большой её подписки — срез получают все группы доски
+        boards: dict[tuple[str, str], int] = {}
+        for group in self._groups.values():
+            board_key = (group.server_name, group.sort)
+            if board_key in due:
+                boards[board_key] = max(boards.get(board_key, 0), group.top)
+        return boards
+
+    async def tick(self):
+        boards = self._due_boards()
+        if not boards:
+            return
+
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            for (server_name, sort), limit in boards.items():
+                rows = (await db.execute(queries.select_live_top(server_name, sort, limit))).all()
+                items = [(str(user_id), value) for user_id, value in rows]
+                self._refreshed_at[(server_name, sort)] = time.monotonic()
+                # Группа, подписавшаяся во время запроса с top больше limit, ждёт следующего тика
+                for group in list(self._groups.values()):
+                    if group.server_name == server_name and group.sort == sort and group.top <= limit:
+                        group.publish(items[:group.top])
+        LIVE_TICK_SECONDS.observe(time.perf_counter() - started)
+
+# Фоновая задача из lifespan: пересчёт раз в tick_s секунд
+    async def run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Не удалось пересчитать живые лидерборды")
+            await asyncio.sleep(self.tick_s)
+
+
+live_leaderboard = LiveLeaderboard(
+    settings.STATS_LIVE_TICK_MS / 1000,
+    settings.STATS_LIVE_RESYNC_S,
+    settings.STATS_LIVE_QUEUE_SIZE
+)
@@ -0,0 +1,33 @@
+import base64
+import json
+from uuid import UUID
+
+from app.services.constants import INT32_MAX, INT32_MIN, PAGE_NEXT, PAGE_PREV
+
+
+# Курсор keyset-пагинации: непрозрачный для клиента токен с позицией строки
+# (значение сортировки, user_id) и направлением листания.
+# Поле сортировки тоже кладём внутрь, чтобы курсор от kills не применили к deaths.
+def encode_cursor(sort: str, value: int, user_id: UUID | str, direction: int) -> str:
+    raw = json.dumps([sort, value, str(user_id), direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+# Любой битый или чужой курсор — ValueError, как и остальные доменные ошибки
+def decode_cursor(token: str, sort: str) -> tuple[int, UUID, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        cursor_sort, value, user_id, direction = json.loads(raw)
+        user_id = UUID(user_id)
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("INVALID_CURSOR")
+
+    # bool — подкласс int, а значение вне INTEGER asyncpg не примет: без проверки 500 вместо 400
+    if (
+        cursor_sort != sort
+        or type(direction) is not int or direction not in (PAGE_NEXT, PAGE_PREV)
+        or type(value) is not int or not INT32_MIN <= value <= INT32_MAX
+    ):
+        raise ValueError("INVALID_CURSOR")
+
+    return value, user_id, direction
@@ -0,0 +1,595 @@
+import math
+from datetime import datetime
+from typing import Iterator
+from uuid import UUID
+
+from sqlalchemy import Integer, Select, String, bindparam, cast, column, func, literal, select, tuple_, union_all, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert
+
+from app.models import (
+    LeaderboardSnapshot,
+    LeaderboardSnapshotMeta,
+    PlayerStats,
+    PlayerStatsDaily,
+    PlayerStatsHourly,
+    PlayerTotals,
+    ServerPlayerCount
+)
+from app.services.constants import KD_RATIO_PRECISION, PAGE_NEXT, PAGE_PREV, UPSERT_CHUNK_ROWS
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.windows import split_window, window_bounds
+
+# Построители SQL-запросов и упаковка результатов в DTO.
+# Общие для StatsService (sync, psycopg2) и AsyncStatsService (asyncpg):
+# сервисы отличаются только тем, как выполняют запрос — db.execute или await db.execute.
+
+
+# Фиксированный порядок ключей — конкурентные транзакции берут блокировки
+# строк в одном порядке и не ловят deadlock
+def delta_rows(deltas: dict[tuple[UUID, str], tuple[int, int, int]]) -> list[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "server_name": server_name,
+            "time_played": time_played,
+            "kills": kills,
+            "deaths": deaths
+        }
+        for (user_id, server_name), (time_played, kills, deaths)
+        in sorted(deltas.items(), key=lambda item: (item[0][1], str(item[0][0])))
+    ]
+
+
+# Без смертей KD равен числу убийств
+def kd_ratio(kills: int, deaths: int) -> float:
+    kd = kills / deaths if deaths > 0 else kills
+    return round(kd, KD_RATIO_PRECISION)
+
+
+def to_dto(stats: PlayerStats) -> dict:
+    return {
+        "user_id": str(stats.user_id),
+        "server_name": stats.server_name,
+        "time_played": stats.time_played,
+        "kills": stats.kills,
+        "deaths": stats.deaths,
+        "kd_ratio": kd_ratio(stats.kills, stats.deaths),
+        "version": stats.version,
+        "updated_at": stats.updated_at
+    }
+
+
+def to_totals_dto(totals: PlayerTotals) -> dict:
+    return {
+        "user_id": str(totals.user_id),
+        "servers": totals.servers,
+        "time_played": totals.time_played,
+        "kills": totals.kills,
+        "deaths": totals.deaths,
+        "kd_ratio": kd_ratio(totals.kills, totals.deaths)
+    }
+
+
+def select_stats(user_id: UUID, server_name: str) -> Select:
+    return select(PlayerStats).where(
+        PlayerStats.user_id == user_id,
+        PlayerStats.server_name == server_name
+    ).execution_options(metrics_label="stats_get")
+
+
+def select_stats_batch(keys: list[tuple[UUID, str]]) -> Select:
+    return select(PlayerStats).where(
+        tuple_(PlayerStats.user_id, PlayerStats.server_name).in_(keys)
+    )
+
+
+# Создание одним запросом: INSERT ... ON CONFLICT DO NOTHING RETURNING.
+# Гонку двух create решает уникальный ключ — проигравший получает пустой RETURNING, а не IntegrityError
+def insert_stats_stmt(user_id: UUID, server_name: str):
+    return (
+        insert(PlayerStats)
+        .values(user_id=user_id, server_name=server_name)
+        .on_conflict_do_nothing(index_elements=[PlayerStats.user_id, PlayerStats.server_name])
+        .returning(PlayerStats)
+        .execution_options(metrics_label="stats_create")
+    )
+
+
+# Ростер сервера одним запросом: INSERT ... SELECT unnest(:ids) — один bind-параметр
+# на любое число игроков. RETURNING отдаёт только созданных, остальные уже были.
+# user_ids отсортированы вызывающим — блокировки строк берутся в одном порядке
+def insert_roster_stmt(server_name: str, user_ids: list[UUID]):
+    user_id = func.unnest(cast(bindparam("user_ids", user_ids), ARRAY(PG_UUID(as_uuid=True)))).label("user_id")
+    rows = select(user_id, literal(server_name, String))
+    return (
+        insert(PlayerStats)
+        .from_select(["user_id", "server_name"], rows)
+        .on_conflict_do_nothing(index_elements=[PlayerStats.user_id, PlayerStats.server_name])
+        .returning(PlayerStats.user_id)
+        .execution_options(metrics_label="stats_roster_create")
+    )
+
+
+def to_roster_dto(server_name: str, user_ids: list[UUID], created: set[UUID]) -> dict:
+    return {
+        "server_name": server_name,
+        "created": [str(user_id) for user_id in user_ids if user_id in created],
+        "existing": [str(user_id) for user_id in user_ids if user_id not in created]
+    }
+
+
+# Каждая запись значений двигает версию строки (ETag) и updated_at (Last-Modified)
+def _bump_version() -> dict:
+    return {"version": PlayerStats.version + 1, "updated_at": func.now()}
+
+
+# Атомарный UPDATE ... SET kills = kills + :k RETURNING
+def update_stats_stmt(user_id: UUID, server_name: str, time_played: int, kills: int, deaths: int):
+    return (
+        update(PlayerStats)
+        .where(
+            PlayerStats.user_id == user_id,
+            PlayerStats.server_name == server_name
+        )
+        .values(
+            time_played=PlayerStats.time_played + time_played,
+            kills=PlayerStats.kills + kills,
+            deaths=PlayerStats.deaths + deaths,
+            **_bump_version()
+        )
+        .returning(PlayerStats)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Строки, которые возвращают пачечные записи: ключ и новые значения (для индекса мест)
+_CHANGED_COLUMNS = (
+    PlayerStats.user_id,
+    PlayerStats.server_name,
+    PlayerStats.time_played,
+    PlayerStats.kills,
+    PlayerStats.deaths
+)
+
+
+# Изменения для after_write: (user_id, server_name, новые значения, дельта)
+def changes_from_rows(rows, deltas: dict[tuple[UUID, str], tuple[int, int, int]]) -> list:
+    return [
+        (r.user_id, r.server_name, (r.time_played, r.kills, r.deaths), deltas[(r.user_id, r.server_name)])
+        for r in rows
+    ]
+
+
+# Postgres ограничивает число bind-параметров, поэтому пачки режутся на куски;
+# все куски выполняются в одной транзакции вызывающего
+def upsert_deltas_stmts(rows: list[dict]) -> Iterator:
+    for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        stmt = insert(PlayerStats).values(rows[start:start + UPSERT_CHUNK_ROWS])
+        yield stmt.on_conflict_do_update(
+            index_elements=[PlayerStats.user_id, PlayerStats.server_name],
+            set_={
+                "time_played": PlayerStats.time_played + stmt.excluded.time_played,
+                "kills": PlayerStats.kills + stmt.excluded.kills,
+                "deaths": PlayerStats.deaths + stmt.excluded.deaths,
+                **_bump_version()
+            }
+        ).returning(*_CHANGED_COLUMNS)
+
+
+def update_deltas_stmts(rows: list[dict]) -> Iterator:
+    for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        chunk = values(
+            column("user_id", PG_UUID),
+            column("server_name", String),
+            column("time_played", Integer),
+            column("kills", Integer),
+            column("deaths", Integer),
+            name="deltas"
+        ).data([
+            (r["user_id"], r["server_name"], r["time_played"], r["kills"], r["deaths"])
+            for r in rows[start:start + UPSERT_CHUNK_ROWS]
+        ])
+
+        yield (
+            update(PlayerStats)
+            .where(
+                PlayerStats.user_id == chunk.c.user_id,
+                PlayerStats.server_name == chunk.c.server_name
+            )
+            .values(
+                time_played=PlayerStats.time_played + chunk.c.time_played,
+                kills=PlayerStats.kills + chunk.c.kills,
+                deaths=PlayerStats.deaths + chunk.c.deaths,
+                **_bump_version()
+            )
+            .returning(*_CHANGED_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+
+
+# Счётчик поддерживается триггерами, COUNT(*) по серверу не нужен
+def select_total_players(server_name: str) -> Select:
+    return select(ServerPlayerCount.players).where(
+        ServerPlayerCount.server_name == server_name
+    ).execution_options(metrics_label="leaderboard_total")
+
+
+# Версия доски сервера для ETag: поиск по первичному ключу, до запроса страницы
+def select_board_version(server_name: str) -> Select:
+    return select(ServerPlayerCount.version).where(
+        ServerPlayerCount.server_name == server_name
+    ).execution_options(metrics_label="leaderboard_version")
+
+
+# Запрос страницы лидерборда. direction: None — по номеру страницы (OFFSET),
+# PAGE_NEXT / PAGE_PREV — keyset по курсору: WHERE (kills, user_id) < (:k, :u).
+# Сортировка <sort> DESC, user_id DESC — user_id даёт стабильный tiebreak
+# metrics_label — отдельная серия в stats_db_statement_seconds для страницы лидерборда
+def top_stats_query(
+        server_name: str,
+        sort: str,
+        page: int,
+        page_size: int,
+        cursor: str | None
+) -> tuple[Select, int | None]:
+    sort_column = getattr(PlayerStats, sort)
+    query = select(PlayerStats).where(
+        PlayerStats.server_name == server_name
+    ).execution_options(metrics_label="leaderboard_page")
+
+    if cursor is None:
+        return query.order_by(
+            sort_column.desc(),
+            PlayerStats.user_id.desc()
+        ).offset((page - 1) * page_size).limit(page_size), None
+
+    value, user_id, direction = decode_cursor(cursor, sort)
+    position = tuple_(sort_column, PlayerStats.user_id)
+    # Берём на одну строку больше — так узнаём, есть ли что-то дальше
+    if direction == PAGE_NEXT:
+        return query.where(position < (value, user_id)).order_by(
+            sort_column.desc(),
+            PlayerStats.user_id.desc()
+        ).limit(page_size + 1), direction
+
+    return query.where(position > (value, user_id)).order_by(
+        sort_column.asc(),
+        PlayerStats.user_id.asc()
+    ).limit(page_size + 1), direction
+
+
+def pack_top_stats(
+        items: list[PlayerStats],
+        total: int,
+        sort: str,
+        page: int,
+        page_size: int,
+        direction: int | None
+) -> tuple[list[dict], dict]:
+    total_pages = math.ceil(total / page_size)
+
+    if direction is None:
+        has_next = page < total_pages
+        has_prev = page > 1
+    elif direction == PAGE_NEXT:
+        has_next = len(items) > page_size
+        has_prev = True
+        items = items[:page_size]
+    else:
+        has_next = True
+        has_prev = len(items) > page_size
+        items = items[:page_size][::-1]
+    if direction is not None:
+        page = None
+
+    data = [
+        {
+            "user_id": str(s.user_id),
+            "time_played": s.time_played,
+            "kills": s.kills,
+            "deaths": s.deaths
+        } for s in items
+    ]
+
+    pagination = {
+        "page": page,
+        "pageSize": page_size,
+        "total": total,
+        "totalPages": total_pages,
+        "nextPage": page + 1 if page is not None and has_next else None,
+        "prevPage": page - 1 if page is not None and has_prev else None,
+        "nextCursor": encode_cursor(
+            sort, getattr(items[-1], sort), items[-1].user_id, PAGE_NEXT
+        ) if items and has_next else None,
+        "prevCursor": encode_cursor(
+            sort, getattr(items[0], sort), items[0].user_id, PAGE_PREV
+        ) if items and has_prev else None
+    }
+
+    return data, pagination
+
+
+def select_snapshot_meta(server_name: str, sort: str) -> Select:
+    return select(LeaderboardSnapshotMeta).where(
+        LeaderboardSnapshotMeta.server_name == server_name,
+        LeaderboardSnapshotMeta.sort_key == sort
+    )
+
+
+# Место известно заранее, поэтому вместо OFFSET читаем диапазон rank по первичному ключу
+def select_snapshot_page(server_name: str, sort: str, page: int, page_size: int) -> Select:
+    first_rank = (page - 1) * page_size + 1
+    return select(LeaderboardSnapshot).where(
+        LeaderboardSnapshot.server_name == server_name,
+        LeaderboardSnapshot.sort_key == sort,
+        LeaderboardSnapshot.rank.between(first_rank, first_rank + page_size - 1)
+    ).order_by(LeaderboardSnapshot.rank).execution_options(metrics_label="leaderboard_snapshot_page")
+
+
+def pack_snapshot_page(
+        meta: LeaderboardSnapshotMeta,
+        items: list[LeaderboardSnapshot],
+        page: int,
+        page_size: int
+) -> tuple[list[dict], dict]:
+    total = meta.players
+    total_pages = math.ceil(total / page_size)
+
+    data = [
+        {
+            "user_id": str(s.user_id),
+            "rank": s.rank,
+            "time_played": s.time_played,
+            "kills": s.kills,
+            "deaths": s.deaths
+        } for s in items
+    ]
+
+    pagination = {
+        "page": page,
+        "pageSize": page_size,
+        "total": total,
+        "totalPages": total_pages,
+        "nextPage": page + 1 if page < total_pages else None,
+        "prevPage": page - 1 if page > 1 else None,
+        "nextCursor": None,
+        "prevCursor": None,
+        "refreshedAt": meta.refreshed_at.isoformat()
+    }
+
+    return data, pagination
+
+
+# Все игроки сервера для индекса мест: (user_id, score) по возрастанию (score, user_id) —
+# в порядке ключей SortedKeys, сортировать в Python не нужно (обратный проход по индексу лидерборда)
+def select_rank_keys(server_name: str, sort: str) -> Select:
+    sort_column = getattr(PlayerStats, sort)
+    return select(PlayerStats.user_id, sort_column).where(
+        PlayerStats.server_name == server_name
+    ).order_by(sort_column, PlayerStats.user_id).execution_options(metrics_label="rank_index_load")
+
+
+# Первые limit игроков живого лидерборда: (user_id, score) в порядке лидерборда.
+# Index-only scan по (server_name, sort DESC, user_id DESC) — один запрос на все подписки (server_name, sort)
+def select_live_top(server_name: str, sort: str, limit: int) -> Select:
+    sort_column = getattr(PlayerStats, sort)
+    return select(PlayerStats.user_id, sort_column).where(
+        PlayerStats.server_name == server_name
+    ).order_by(sort_column.desc(), PlayerStats.user_id.desc()).limit(limit).execution_options(
+        metrics_label="live_top"
+    )
+
+
+# Место без индекса в памяти: сколько игроков выше по (sort DESC, user_id DESC).
+# Index-only scan по (server_name, sort DESC, user_id DESC), но O(N) по глубине места
+def select_rank_count(server_name: str, sort: str, score: int, user_id: UUID) -> Select:
+    sort_column = getattr(PlayerStats, sort)
+    return select(func.count()).select_from(PlayerStats).where(
+        PlayerStats.server_name == server_name,
+        tuple_(sort_column, PlayerStats.user_id) > tuple_(score, user_id)
+    ).execution_options(metrics_label="rank_count")
+
+
+def to_rank_dto(user_id: UUID, server_name: str, sort: str, score: int, rank: int, players: int) -> dict:
+    return {
+        "user_id": str(user_id),
+        "server_name": server_name,
+        "sort": sort,
+        "value": score,
+        "rank": rank,
+        "players": players
+    }
+
+
+# Игрок и по count соседей сверху и снизу в порядке лидерборда — одним запросом.
+#Соседи — seek от (score, user_id) игрока по индексу (server_name, sort DESC, user_id DESC)
+#в разные стороны с LIMIT, без COUNT и OFFSET. Игрока нет — пустой результат
+def around_query(user_id: UUID, server_name: str, sort: str, count: int) -> Select:
+    sort_column = getattr(PlayerStats, sort)
+    columns = (PlayerStats.user_id, PlayerStats.time_played, PlayerStats.kills, PlayerStats.deaths)
+
+    # Значение игрока — скалярным подзапросом (InitPlan): тогда граница попадает
+    # в Index Cond и это seek, а не фильтр поверх скана с начала лидерборда
+    score = select(sort_column).where(
+        PlayerStats.server_name == server_name,
+        PlayerStats.user_id == user_id
+    ).scalar_subquery()
+    key = tuple_(sort_column, PlayerStats.user_id)
+    me_key = tuple_(score, user_id)
+
+    above = select(*columns).where(PlayerStats.server_name == server_name, key > me_key).order_by(
+        sort_column, PlayerStats.user_id
+    ).limit(count)
+    below = select(*columns).where(PlayerStats.server_name == server_name, key < me_key).order_by(
+        sort_column.desc(), PlayerStats.user_id.desc()
+    ).limit(count)
+    player = select(*columns).where(PlayerStats.server_name == server_name, PlayerStats.user_id == user_id)
+
+    rows = union_all(above, player, below).subquery("around")
+    return select(rows).order_by(
+        getattr(rows.c, sort).desc(),
+        rows.c.user_id.desc()
+    ).execution_options(metrics_label="around")
+
+
+# rank — место игрока из индекса мест, None — неизвестно; места соседей отсчитываются от него
+def pack_around(rows: list, user_id: UUID, rank: int | None) -> list[dict]:
+    me_index = next(i for i, r in enumerate(rows) if r.user_id == user_id)
+    return [
+        {
+            "user_id": str(r.user_id),
+            "time_played": r.time_played,
+            "kills": r.kills,
+            "deaths": r.deaths,
+            "rank": rank + i - me_index if rank is not None else None
+        } for i, r in enumerate(rows)
+    ]
+
+
+# Места игрока во всех снимках сервера: строки (sort_key, rank)
+def select_ranks(user_id: UUID, server_name: str) -> Select:
+    return select(LeaderboardSnapshot.sort_key, LeaderboardSnapshot.rank).where(
+        LeaderboardSnapshot.server_name == server_name,
+        LeaderboardSnapshot.user_id == user_id
+    )
+
+
+def select_player_totals(user_id: UUID) -> Select:
+    return select(PlayerTotals).where(
+        PlayerTotals.user_id == user_id
+    ).execution_options(metrics_label="global_stats_get")
+
+
+# Глобальный топ-N: index scan по ix_player_totals_<sort> без сортировки
+def select_global_top(sort: str, limit: int) -> Select:
+    sort_column = getattr(PlayerTotals, sort)
+    return select(PlayerTotals).order_by(
+        sort_column.desc(),
+        PlayerTotals.user_id.desc()
+    ).limit(limit).execution_options(metrics_label="global_top")
+
+
+# Строки бакетов окна [start, end): целые сутки из player_stats_daily,
+# неровные края из player_stats_hourly (см. windows.split_window)
+def _window_rows(server_name: str, start: datetime, end: datetime | None, user_id: UUID | None = None):
+    days, hours = split_window(start, end)
+    parts = []
+
+    if days is not None:
+        first_day, end_day = days
+        query = select(
+            PlayerStatsDaily.user_id,
+            PlayerStatsDaily.time_played,
+            PlayerStatsDaily.kills,
+            PlayerStatsDaily.deaths
+        ).where(PlayerStatsDaily.server_name == server_name, PlayerStatsDaily.day >= first_day)
+        if end_day is not None:
+            query = query.where(PlayerStatsDaily.day < end_day)
+        if user_id is not None:
+            query = query.where(PlayerStatsDaily.user_id == user_id)
+        parts.append(query)
+
+    for hours_start, hours_end in hours:
+        query = select(
+            PlayerStatsHourly.user_id,
+            PlayerStatsHourly.time_played,
+            PlayerStatsHourly.kills,
+            PlayerStatsHourly.deaths
+        ).where(
+            PlayerStatsHourly.server_name == server_name,
+            PlayerStatsHourly.bucket >= hours_start,
+            PlayerStatsHourly.bucket < hours_end
+        )
+        if user_id is not None:
+            query = query.where(PlayerStatsHourly.user_id == user_id)
+        parts.append(query)
+
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery("window_rows")
+
+
+# Суммы игрока за окно; buckets = 0 — в окне у игрока ничего нет
+def select_window_stats(user_id: UUID, server_name: str, start: datetime, end: datetime | None) -> Select:
+    rows = _window_rows(server_name, start, end, user_id)
+    return select(
+        func.coalesce(func.sum(rows.c.time_played), 0).label("time_played"),
+        func.coalesce(func.sum(rows.c.kills), 0).label("kills"),
+        func.coalesce(func.sum(rows.c.deaths), 0).label("deaths"),
+        func.count().label("buckets")
+    ).execution_options(metrics_label="window_stats_get")
+
+
+# Страница лидерборда окна: GROUP BY user_id по бакетам, только OFFSET-пагинация.
+# total — число игроков в окне, считается в том же запросе оконной функцией
+def window_top_query(
+        server_name: str,
+        sort: str,
+        start: datetime,
+        end: datetime | None,
+        page: int,
+        page_size: int
+) -> Select:
+    rows = _window_rows(server_name, start, end)
+    sums = {
+        field: func.sum(getattr(rows.c, field)).label(field)
+        for field in ("time_played", "kills", "deaths")
+    }
+    return select(
+        rows.c.user_id,
+        *sums.values(),
+        func.count().over().label("total")
+    ).group_by(rows.c.user_id).order_by(
+        sums[sort].desc(),
+        rows.c.user_id.desc()
+    ).offset((page - 1) * page_size).limit(page_size).execution_options(metrics_label="window_page")
+
+
+# Число игроков в окне — когда страница за пределами и total из неё не взять
+def select_window_total(server_name: str, start: datetime, end: datetime | None) -> Select:
+    rows = _window_rows(server_name, start, end)
+    return select(func.count(rows.c.user_id.distinct())).execution_options(metrics_label="window_total")
+
+
+def to_window_dto(user_id: UUID, server_name: str, row, start: datetime, end: datetime | None) -> dict:
+    return {
+        "user_id": str(user_id),
+        "server_name": server_name,
+        "time_played": row.time_played,
+        "kills": row.kills,
+        "deaths": row.deaths,
+        "kd_ratio": kd_ratio(row.kills, row.deaths),
+        "window": window_bounds(start, end)
+    }
+
+
+def pack_window_page(
+        rows: list,
+        total: int,
+        page: int,
+        page_size: int,
+        start: datetime,
+        end: datetime | None
+) -> tuple[list[dict], dict]:
+    total_pages = math.ceil(total / page_size)
+
+    data = [
+        {
+            "user_id": str(r.user_id),
+            "time_played": r.time_played,
+            "kills": r.kills,
+            "deaths": r.deaths
+        } for r in rows
+    ]
+
+    pagination = {
+        "page": page,
+        "pageSize": page_size,
+        "total": total,
+        "totalPages": total_pages,
+        "nextPage": page + 1 if page < total_pages else None,
+        "prevPage": page - 1 if page > 1 else None,
+        "nextCursor": None,
+        "prevCursor": None,
+        "window": window_bounds(start, end)
+    }
+
+    return data, pagination
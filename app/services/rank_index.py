@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Iterable
+from uuid import UUID
+
+from app.database import SessionLocal
+from app.metrics import RANK_INDEX_BUILD_SECONDS, RANK_LOOKUPS
+from app.services import queries
+from app.services.constants import FIELD_POSITIONS, SORT_FIELDS
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Ключ игрока в индексе — одно целое: (score, user_id) упакованы так, что порядок целых
+# совпадает с ORDER BY score, user_id. Сдвиг делает отрицательные значения счётчиков
+# неотрицательными. Одно int вместо кортежа — втрое меньше памяти на миллион игроков
+_SCORE_OFFSET = 1 << 63
+_UUID_BITS = 128
+
+# Размер куска отсортированного списка: вставка — сдвиг внутри куска, а не всего списка
+_CHUNK = 1000
+
+
+def rank_key(score: int, user_id: UUID) -> int:
+    return ((score + _SCORE_OFFSET) << _UUID_BITS) | user_id.int
+
+
+# Отсортированное множество целых с порядковой статистикой.
+# Куски по ~_CHUNK ключей плюс дерево Фенвика по длинам кусков:
+# вставка/удаление — bisect + сдвиг внутри куска, «сколько ключей больше» — O(log N)
+class SortedKeys:
+
+    def __init__(self, keys: list[int]):
+        self._chunks = [keys[i:i + _CHUNK] for i in range(0, len(keys), _CHUNK)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(keys)
+        self._rebuild_tree()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _rebuild_tree(self):
+        tree = [0] * (len(self._chunks) + 1)
+        for i, chunk in enumerate(self._chunks, 1):
+            tree[i] += len(chunk)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, index: int, delta: int):
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    # Число ключей в кусках [0, index)
+    def _prefix(self, index: int) -> int:
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def add(self, key: int) -> bool:
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._rebuild_tree()
+            return True
+
+        index = min(bisect_left(self._maxes, key), len(self._chunks) - 1)
+        chunk = self._chunks[index]
+        pos = bisect_left(chunk, key)
+        if pos < len(chunk) and chunk[pos] == key:
+            return False
+
+        chunk.insert(pos, key)
+        self._maxes[index] = chunk[-1]
+        self._len += 1
+        if len(chunk) > 2 * _CHUNK:
+            self._chunks.insert(index + 1, chunk[_CHUNK:])
+            del chunk[_CHUNK:]
+            self._maxes[index:index + 1] = [chunk[-1], self._chunks[index + 1][-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(index, 1)
+        return True
+
+    def discard(self, key: int) -> bool:
+        index = bisect_left(self._maxes, key)
+        if index == len(self._chunks):
+            return False
+        chunk = self._chunks[index]
+        pos = bisect_left(chunk, key)
+        if pos == len(chunk) or chunk[pos] != key:
+            return False
+
+        del chunk[pos]
+        self._len -= 1
+        if chunk:
+            self._maxes[index] = chunk[-1]
+            self._tree_add(index, -1)
+        else:
+            del self._chunks[index]
+            del self._maxes[index]
+            self._rebuild_tree()
+        return True
+
+    def count_greater(self, key: int) -> int:
+        index = bisect_right(self._maxes, key)
+        if index == len(self._chunks):
+            return 0
+        return self._len - self._prefix(index) - bisect_right(self._chunks[index], key)
+
+
+class _Board:
+
+    def __init__(self, keys: SortedKeys):
+        self.keys = keys
+        self.built_at = time.monotonic()
+        self.refreshing = False
+
+
+# Места игроков по (server_name, sort) в памяти процесса.
+# Доска строится фоном из player_stats при первом запросе сервера и пересобирается
+# раз в STATS_RANK_INDEX_TTL_S; записи этого процесса применяются к ней сразу (after_write).
+# Записи других воркеров видны после пересборки — как у stats_cache, не позже чем через TTL.
+# Пока доски нет, место считается в БД (COUNT по индексу лидерборда).
+# Досок не больше STATS_RANK_INDEX_MAX_BOARDS, лишние вытесняются по LRU
+class RankIndex:
+
+    def __init__(self, max_boards: int, ttl_s: float):
+        self.max_boards = max_boards
+        self.ttl_s = ttl_s
+        self.enabled = max_boards > 0
+
+        self._boards: OrderedDict[tuple[str, str], _Board] = OrderedDict()
+        # Записи, пришедшие во время сборки доски: применяются к ней после установки
+        self._pending: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+# Место игрока со значением score (1 — первое) и число игроков на доске.
+#None — доски нет; тогда же в фоне запускается её сборка
+    def rank(self, server_name: str, sort: str, score: int, user_id: UUID) -> tuple[int, int] | None:
+        if not self.enabled:
+            return None
+
+        board_key = (server_name, sort)
+        with self._lock:
+            board = self._boards.get(board_key)
+            if board is None:
+                build = board_key not in self._pending
+                if build:
+                    self._pending[board_key] = []
+                result = None
+            else:
+                self._boards.move_to_end(board_key)
+                build = not board.refreshing and board.built_at + self.ttl_s < time.monotonic()
+                if build:
+                    board.refreshing = True
+                    self._pending[board_key] = []
+                result = board.keys.count_greater(rank_key(score, user_id)) + 1, len(board.keys)
+
+        if build:
+            threading.Thread(target=self._build, args=(board_key,), daemon=True).start()
+        RANK_LOOKUPS.labels("index" if result is not None else "db").inc()
+        return result
+
+# Новые значения строк после коммита: changes — (user_id, server_name, new, delta),
+#new и delta — тройки (time_played, kills, deaths); старое значение = new - delta
+    def apply(self, changes: Iterable[tuple[UUID, str, tuple, tuple]]):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if not self._boards and not self._pending:
+                return
+            for user_id, server_name, new, delta in changes:
+                for sort in SORT_FIELDS:
+                    board_key = (server_name, sort)
+                    board = self._boards.get(board_key)
+                    pending = self._pending.get(board_key)
+                    if board is None and pending is None:
+                        continue
+                    position = FIELD_POSITIONS[sort]
+                    value = new[position]
+                    old_key = rank_key(value - delta[position], user_id)
+                    new_key = rank_key(value, user_id)
+                    if board is not None:
+                        _move(board.keys, old_key, new_key)
+                    if pending is not None:
+                        pending.append((old_key, new_key))
+
+    def clear(self):
+        with self._lock:
+            self._boards.clear()
+            self._pending.clear()
+
+    def _build(self, board_key: tuple[str, str]):
+        started = time.perf_counter()
+        try:
+            with SessionLocal() as db:
+                rows = db.execute(queries.select_rank_keys(*board_key))
+                keys = SortedKeys([rank_key(score, user_id) for user_id, score in rows])
+        except Exception:
+            logger.exception("Не удалось собрать индекс мест %s", board_key)
+            with self._lock:
+                self._pending.pop(board_key, None)
+                board = self._boards.get(board_key)
+                if board is not None:
+                    board.refreshing = False
+            return
+
+        # Записи во время загрузки могли попасть или не попасть в выборку —
+        # повтор по порядку сходится к одному результату (add/discard идемпотентны)
+        with self._lock:
+            for old_key, new_key in self._pending.pop(board_key, ()):
+                _move(keys, old_key, new_key)
+            self._boards[board_key] = _Board(keys)
+            self._boards.move_to_end(board_key)
+            while len(self._boards) > self.max_boards:
+                self._boards.popitem(last=False)
+        RANK_INDEX_BUILD_SECONDS.observe(time.perf_counter() - started)
+
+
+def _move(keys: SortedKeys, old_key: int, new_key: int):
+    if old_key != new_key:
+        keys.discard(old_key)
+    keys.add(new_key)
+
+
+rank_index = RankIndex(settings.STATS_RANK_INDEX_MAX_BOARDS, settings.STATS_RANK_INDEX_TTL_S)
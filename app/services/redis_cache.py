@@ -0,0 +1,222 @@
+import time
+from datetime import datetime
+from uuid import UUID
+
+import orjson
+import redis
+import redis.asyncio
+
+from app.services.constants import FIELD_POSITIONS, SORT_FIELDS
+from app.services.shared_cache import CACHED_STATS_FIELDS, CachedRow, SharedCacheBackend
+
+# Ключи одного сервера в одном hash slot ({server_name}) — Lua-скрипты работают и в Redis Cluster:
+#   svc-stats:{s}:stats:<user_id>   hash   time_played, kills, deaths, rank (JSON), version, updated_at (ISO)
+#   svc-stats:{s}:top:<sort>        zset   user_id -> значение; порядок ZREVRANGE при равных
+#                                          значениях — user_id по убыванию, как в лидерборде
+#   svc-stats:{s}:floor:<sort>      string "<score>:<user_id>" последнего при заполнении, "" — весь сервер
+#   svc-stats:{s}:rows              hash   user_id -> "time_played:kills:deaths" для участников наборов
+#   svc-stats:{s}:total             string игроков на сервере
+
+
+def _prefix(server_name: str) -> str:
+    return f"svc-stats:{{{server_name}}}"
+
+
+def _stats_key(server_name: str, user_id: UUID) -> str:
+    return f"{_prefix(server_name)}:stats:{user_id}"
+
+
+def _top_keys(server_name: str, sort: str) -> list[str]:
+    prefix = _prefix(server_name)
+    return [f"{prefix}:top:{sort}", f"{prefix}:floor:{sort}", f"{prefix}:rows", f"{prefix}:total"]
+
+
+# Ключи для UPDATE_SCRIPT: stats, rows, затем (top, floor) по SORT_FIELDS
+def _update_keys(server_name: str, user_id: UUID) -> list[str]:
+    prefix = _prefix(server_name)
+    keys = [_stats_key(server_name, user_id), f"{prefix}:rows"]
+    for sort in SORT_FIELDS:
+        keys += [f"{prefix}:top:{sort}", f"{prefix}:floor:{sort}"]
+    return keys
+
+
+# Страница [start, stop] и total; nil — набора нет или он короче stop при непустом пороге
+READ_SCRIPT = """
+local floor = redis.call('GET', KEYS[2])
+if not floor then
+    return false
+end
+if floor ~= '' and redis.call('ZCARD', KEYS[1]) <= tonumber(ARGV[2]) then
+    return false
+end
+local total = redis.call('GET', KEYS[4])
+if not total then
+    return false
+end
+local members = redis.call('ZREVRANGE', KEYS[1], ARGV[1], ARGV[2])
+local rows = {}
+if #members > 0 then
+    rows = redis.call('HMGET', KEYS[3], unpack(members))
+end
+return {total, members, rows}
+"""
+
+# Новые значения игрока в лидербордах; статистика игрока сбрасывается — в ней версия строки,
+# которой нет в changes. ARGV = user_id, time_played, kills, deaths и значения в порядке SORT_FIELDS
+UPDATE_SCRIPT = """
+local user_id = ARGV[1]
+local values = {ARGV[5], ARGV[6], ARGV[7]}
+local member = false
+for i = 1, 3 do
+    local floor = redis.call('GET', KEYS[2 + i * 2])
+    if floor then
+        local above = floor == ''
+        if not above then
+            local sep = string.find(floor, ':', 1, true)
+            local floor_score = tonumber(string.sub(floor, 1, sep - 1))
+            local score = tonumber(values[i])
+            above = score > floor_score or (score == floor_score and user_id > string.sub(floor, sep + 1))
+        end
+        if above then
+            redis.call('ZADD', KEYS[1 + i * 2], values[i], user_id)
+            member = true
+        else
+            redis.call('ZREM', KEYS[1 + i * 2], user_id)
+        end
+    end
+end
+if member then
+    redis.call('HSET', KEYS[2], user_id, ARGV[2] .. ':' .. ARGV[3] .. ':' .. ARGV[4])
+end
+redis.call('DEL', KEYS[1])
+return 0
+"""
+
+
+def _update_call(change) -> tuple[list[str], list]:
+    user_id, server_name, new, _ = change
+    return (
+        _update_keys(server_name, user_id),
+        [str(user_id), *new, *(new[FIELD_POSITIONS[sort]] for sort in SORT_FIELDS)]
+    )
+
+
+# Hash без version записан до версий строк — считаем промахом, он истечёт по TTL
+def _decode_stats(raw: dict) -> dict | None:
+    if not raw:
+        return None
+    data = {field.decode(): value for field, value in raw.items()}
+    if "version" not in data:
+        return None
+    return {
+        "time_played": int(data["time_played"]),
+        "kills": int(data["kills"]),
+        "deaths": int(data["deaths"]),
+        "rank": orjson.loads(data["rank"]),
+        "version": int(data["version"]),
+        "updated_at": datetime.fromisoformat(data["updated_at"].decode())
+    }
+
+
+def _encode_stats(data: dict) -> dict:
+    encoded = {field: data[field] for field in CACHED_STATS_FIELDS}
+    encoded["rank"] = orjson.dumps(data["rank"])
+    encoded["updated_at"] = data["updated_at"].isoformat()
+    return encoded
+
+
+def _decode_top(reply) -> tuple[list[CachedRow], int] | None:
+    if not reply:
+        return None
+    total, members, rows = reply
+    if any(row is None for row in rows):
+        return None
+    return [
+        CachedRow(UUID(member.decode()), *map(int, row.split(b":")))
+        for member, row in zip(members, rows)
+    ], int(total)
+
+
+class RedisSharedCache(SharedCacheBackend):
+
+    def __init__(self, url: str, ttl_s: float, timeout_s: float):
+        self.ttl_s = ttl_s
+        options = {"socket_timeout": timeout_s, "socket_connect_timeout": timeout_s}
+        self._client = redis.Redis.from_url(url, **options)
+        self._aclient = redis.asyncio.Redis.from_url(url, **options)
+        self._read = self._client.register_script(READ_SCRIPT)
+        self._update = self._client.register_script(UPDATE_SCRIPT)
+        self._aread = self._aclient.register_script(READ_SCRIPT)
+        self._aupdate = self._aclient.register_script(UPDATE_SCRIPT)
+
+    def _set_stats(self, pipe, server_name: str, user_id: UUID, data: dict):
+        key = _stats_key(server_name, user_id)
+        pipe.hset(key, mapping=_encode_stats(data))
+        pipe.pexpire(key, int(self.ttl_s * 1000))
+
+# Набор, порог, строки и total пишутся одной транзакцией и истекают в один момент
+    def _fill_top(self, pipe, server_name: str, sort: str, rows: list, total: int, top_size: int):
+        top_key, floor_key, rows_key, total_key = _top_keys(server_name, sort)
+        expire_at = int((time.time() + self.ttl_s) * 1000)
+
+        pipe.delete(top_key)
+        if rows:
+            pipe.zadd(top_key, {str(r.user_id): getattr(r, sort) for r in rows})
+            pipe.hset(rows_key, mapping={
+                str(r.user_id): f"{r.time_played}:{r.kills}:{r.deaths}" for r in rows
+            })
+        last = rows[-1] if len(rows) >= top_size else None
+        pipe.set(floor_key, f"{getattr(last, sort)}:{last.user_id}" if last is not None else "")
+        pipe.set(total_key, total)
+        for key in (top_key, floor_key, rows_key, total_key):
+            pipe.pexpireat(key, expire_at)
+
+    def get_stats(self, server_name, user_id):
+        return _decode_stats(self._client.hgetall(_stats_key(server_name, user_id)))
+
+    def set_stats(self, server_name, user_id, data):
+        with self._client.pipeline(transaction=False) as pipe:
+            self._set_stats(pipe, server_name, user_id, data)
+            pipe.execute()
+
+    def get_top(self, server_name, sort, start, stop):
+        return _decode_top(self._read(keys=_top_keys(server_name, sort), args=[start, stop]))
+
+    def fill_top(self, server_name, sort, rows, total, top_size):
+        with self._client.pipeline(transaction=True) as pipe:
+            self._fill_top(pipe, server_name, sort, rows, total, top_size)
+            pipe.execute()
+
+    def apply(self, changes):
+        with self._client.pipeline(transaction=False) as pipe:
+            for change in changes:
+                keys, args = _update_call(change)
+                self._update(keys=keys, args=args, client=pipe)
+            pipe.execute()
+
+    async def aget_stats(self, server_name, user_id):
+        return _decode_stats(await self._aclient.hgetall(_stats_key(server_name, user_id)))
+
+    async def aset_stats(self, server_name, user_id, data):
+        async with self._aclient.pipeline(transaction=False) as pipe:
+            self._set_stats(pipe, server_name, user_id, data)
+            await pipe.execute()
+
+    async def aget_top(self, server_name, sort, start, stop):
+        return _decode_top(await self._aread(keys=_top_keys(server_name, sort), args=[start, stop]))
+
+    async def afill_top(self, server_name, sort, rows, total, top_size):
+        async with self._aclient.pipeline(transaction=True) as pipe:
+            self._fill_top(pipe, server_name, sort, rows, total, top_size)
+            await pipe.execute()
+
+    async def aapply(self, changes):
+        async with self._aclient.pipeline(transaction=False) as pipe:
+            for change in changes:
+                keys, args = _update_call(change)
+                await self._aupdate(keys=keys, args=args, client=pipe)
+            await pipe.execute()
+
+    async def aclose(self):
+        self._client.close()
+        await self._aclient.aclose()
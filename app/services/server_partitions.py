@@ -0,0 +1,269 @@
+import re
+import zlib
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services import bulk_io
+
+# Секционирование player_stats по server_name (LIST) — по желанию, для больших
+# многосерверных установок. Включается один раз (python -m app.partitions enable):
+# прежняя таблица без копирования данных становится DEFAULT-секцией новой
+# секционированной player_stats. Свою секцию получает сервер, которому она нужна:
+# его сканы лидерборда, VACUUM и раздувание индексов больше не задевают остальных,
+# а конец сезона — DETACH вместо DELETE на миллионы строк.
+#
+# Индексы лидерборда объявлены на родителе, у каждой секции — свои локальные.
+# Запросы чтения фильтруют по server_name = :s, и планировщик оставляет одну секцию.
+#
+# Триггеры счётчиков, сумм и бакетов — statement-level на родителе: перенос строк
+# между секциями напрямую их не вызывает (строки не меняются), а DETACH и ATTACH
+# правят server_player_counts и player_totals сами.
+
+# Ключ pg_advisory_xact_lock: секции player_stats меняет один процесс за раз
+PARTITIONS_LOCK_ID = 7_301_228
+
+TABLE = "player_stats"
+DEFAULT_PARTITION = "player_stats_default"
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+# Имя секции — читаемая часть имени сервера и crc32 от полного имени:
+# имена серверов произвольные, а идентификатор Postgres — до 63 байт
+def partition_name(server_name: str) -> str:
+    slug = _SLUG_RE.sub("_", server_name.lower()).strip("_")[:32]
+    return f"{TABLE}_s_{slug}_{zlib.crc32(server_name.encode()):08x}"
+
+
+# Границы секции в DDL не параметризуются — строковый литерал
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# DDL идёт без параметров: имя сервера в литерале может содержать ":" и "%"
+def _ddl(db: Session, statement: str):
+    db.connection().exec_driver_sql(statement, execution_options={"no_parameters": True})
+
+
+def _lock(db: Session):
+    db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITIONS_LOCK_ID})
+    db.execute(bulk_io.NO_STATEMENT_TIMEOUT)
+
+
+def is_partitioned(db: Session) -> bool:
+    return db.scalar(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": TABLE}) == "p"
+
+
+def _require_partitioned(db: Session):
+    if not is_partitioned(db):
+        raise ValueError(f"{TABLE} не секционирована: python -m app.partitions enable")
+
+
+def _is_partition(db: Session, name: str) -> bool:
+    return db.scalar(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_inherits
+            WHERE inhrelid = to_regclass(:name) AND inhparent = CAST(:table AS regclass)
+        )
+    """), {"name": name, "table": TABLE})
+
+
+# Секция вышла из player_stats или вошла в неё: строки не удалялись и не вставлялись,
+# триггеры не сработали — счётчик сервера и суммы игроков правим сами, sign = -1 или 1.
+# Дельты упорядочены по user_id, как в player_totals_apply (0003_player_totals.sql)
+def _apply_totals(db: Session, name: str, server_name: str, sign: int):
+    if sign > 0:
+        db.execute(text(f"""
+            INSERT INTO server_player_counts AS c (server_name, players)
+            SELECT :server_name, count(*) FROM {name}
+            ON CONFLICT (server_name) DO UPDATE SET
+                players = c.players + excluded.players,
+                version = nextval('leaderboard_version_seq')
+        """), {"server_name": server_name})
+        db.execute(text(f"""
+            INSERT INTO player_totals AS t (user_id, servers, time_played, kills, deaths)
+            SELECT user_id, count(*), sum(time_played), sum(kills), sum(deaths)
+            FROM {name} GROUP BY user_id ORDER BY user_id
+            ON CONFLICT (user_id) DO UPDATE SET
+                servers = t.servers + excluded.servers,
+                time_played = t.time_played + excluded.time_played,
+                kills = t.kills + excluded.kills,
+                deaths = t.deaths + excluded.deaths
+        """))
+        return
+
+    db.execute(text("DELETE FROM server_player_counts WHERE server_name = :server_name"), {"server_name": server_name})
+    db.execute(text(f"""
+        UPDATE player_totals AS t SET
+            servers = t.servers - d.servers,
+            time_played = t.time_played - d.time_played,
+            kills = t.kills - d.kills,
+            deaths = t.deaths - d.deaths
+        FROM (
+            SELECT user_id, count(*) AS servers, sum(time_played) AS time_played,
+                   sum(kills) AS kills, sum(deaths) AS deaths
+            FROM {name} GROUP BY user_id ORDER BY user_id
+        ) AS d
+        WHERE t.user_id = d.user_id
+    """))
+    db.execute(text(f"""
+        DELETE FROM player_totals AS t
+        USING (SELECT DISTINCT user_id FROM {name}) AS d
+        WHERE t.user_id = d.user_id AND t.servers <= 0
+    """))
+    # Снимки лидерборда сервера пересоберёт фоновая задача, если сервер вернётся
+    for table in ("leaderboard_snapshots", "leaderboard_snapshot_meta"):
+        db.execute(text(f"DELETE FROM {table} WHERE server_name = :server_name"), {"server_name": server_name})
+
+
+class ServerPartitionService:
+
+# Прежняя player_stats переименовывается в DEFAULT-секцию вместе с индексами,
+# родитель получает те же колонки, первичный ключ, индексы и триггеры.
+# При ATTACH Postgres подцепляет существующие индексы секции к индексам родителя —
+# ничего не перестраивается, ACCESS EXCLUSIVE держится на время правки каталога.
+# Уже секционирована — False
+    @staticmethod
+    def enable(db: Session) -> bool:
+        _lock(db)
+        if is_partitioned(db):
+            db.commit()
+            return False
+
+        _ddl(db, f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        params = {"table": TABLE}
+        constraints = db.execute(text("""
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = CAST(:table AS regclass) AND contype IN ('p', 'u')
+        """), params).all()
+        indexes = db.execute(text("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = CAST(:table AS regclass)
+        """), params).all()
+        triggers = db.execute(text("""
+            SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger
+            WHERE tgrelid = CAST(:table AS regclass) AND NOT tgisinternal
+        """), params).all()
+        constraint_names = {name for name, _ in constraints}
+
+        _ddl(db, f"ALTER TABLE {TABLE} RENAME TO {DEFAULT_PARTITION}")
+        for name, _ in indexes:
+            _ddl(db, f"ALTER INDEX {name} RENAME TO {name.replace(TABLE, DEFAULT_PARTITION, 1)}")
+        for name, _ in triggers:
+            _ddl(db, f"DROP TRIGGER {name} ON {DEFAULT_PARTITION}")
+
+        _ddl(db, f"CREATE TABLE {TABLE} (LIKE {DEFAULT_PARTITION} INCLUDING DEFAULTS) PARTITION BY LIST (server_name)")
+        for name, definition in constraints:
+            _ddl(db, f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+        # Определения сняты до переименования и указывают на player_stats — теперь это родитель
+        for name, definition in indexes:
+            if name not in constraint_names:
+                _ddl(db, definition)
+        _ddl(db, f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+        for _, definition in triggers:
+            _ddl(db, definition)
+
+        db.commit()
+        return True
+
+# Своя секция для сервера. Строк сервера в DEFAULT нет — пустая секция создаётся сразу.
+# Есть — переносятся в новую таблицу и удаляются из DEFAULT, затем таблица
+# подключается секцией; DEFAULT на это время заблокирована ATTACH, поэтому сервер
+# лучше выносить при заведении, а не под нагрузкой. Возвращает имя и число перенесённых строк
+    @staticmethod
+    def create(db: Session, server_name: str) -> tuple[str, int]:
+        _lock(db)
+        _require_partitioned(db)
+        name = partition_name(server_name)
+        if db.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+            db.rollback()
+            raise ValueError(f"Таблица {name} уже есть: python -m app.partitions attach")
+
+        bound = _literal(server_name)
+        moved = db.scalar(
+            text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE server_name = :server_name"),
+            {"server_name": server_name}
+        )
+        if not moved:
+            _ddl(db, f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES IN ({bound})")
+        else:
+            _ddl(db, f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)")
+            # С CHECK-ограничением ATTACH не сканирует новую секцию заново
+            _ddl(db, f"ALTER TABLE {name} ADD CONSTRAINT {name}_server CHECK (server_name = {bound})")
+            db.execute(
+                text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE server_name = :server_name"),
+                {"server_name": server_name}
+            )
+            db.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION} WHERE server_name = :server_name"),
+                {"server_name": server_name}
+            )
+            _ddl(db, f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES IN ({bound})")
+            _ddl(db, f"ALTER TABLE {name} DROP CONSTRAINT {name}_server")
+
+        db.commit()
+        return name, moved
+
+# Отключить секцию сервера — конец сезона без DELETE: строки остаются в отдельной
+# таблице (архив, выгрузка, attach обратно), drop=True — удалить её сразу.
+# Возвращает число игроков в секции
+    @staticmethod
+    def detach(db: Session, server_name: str, drop: bool = False) -> int:
+        _lock(db)
+        _require_partitioned(db)
+        name = partition_name(server_name)
+        if not _is_partition(db, name):
+            db.rollback()
+            raise ValueError(f"У сервера {server_name} нет своей секции")
+
+        _ddl(db, f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+        players = db.scalar(text(f"SELECT count(*) FROM {name}"))
+        _apply_totals(db, name, server_name, -1)
+        if drop:
+            _ddl(db, f"DROP TABLE {name}")
+
+        db.commit()
+        return players
+
+# Подключить таблицу секцией сервера: отключённую раньше detach или залитую отдельно
+# (те же колонки, что у player_stats). Таблица переименовывается в имя секции сервера.
+# Строки сервера в DEFAULT или чужие строки в таблице — ошибка Postgres, ничего не меняется
+    @staticmethod
+    def attach(db: Session, server_name: str, table: str | None = None) -> int:
+        _lock(db)
+        _require_partitioned(db)
+        name = partition_name(server_name)
+        source = table if table is not None else name
+        if db.scalar(text("SELECT to_regclass(quote_ident(:source))"), {"source": source}) is None:
+            db.rollback()
+            raise ValueError(f"Таблицы {source} нет")
+        if _is_partition(db, name):
+            db.rollback()
+            raise ValueError(f"У сервера {server_name} уже есть секция {name}")
+        if source != name:
+            if db.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+                db.rollback()
+                raise ValueError(f"Таблица {name} уже есть: attach {server_name} без --table")
+            _ddl(db, f'ALTER TABLE "{source}" RENAME TO {name}')
+
+        _ddl(db, f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES IN ({_literal(server_name)})")
+        players = db.scalar(text(f"SELECT count(*) FROM {name}"))
+        _apply_totals(db, name, server_name, 1)
+
+        db.commit()
+        return players
+
+# Секции player_stats: [(имя, границы, оценка числа строк)]
+    @staticmethod
+    def partitions(db: Session) -> list[tuple[str, str, int]]:
+        _require_partitioned(db)
+        rows = db.execute(text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), greatest(c.reltuples, 0)::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:table AS regclass)
+            ORDER BY c.relname
+        """), {"table": TABLE}).all()
+        return [tuple(row) for row in rows]
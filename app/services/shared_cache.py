@@ -0,0 +1,322 @@
+import logging
+import threading
+import time
+from typing import NamedTuple
+from uuid import UUID
+
+from app.metrics import CACHE_HITS, CACHE_MISSES, SHARED_CACHE_ERRORS
+from app.services.constants import FIELD_POSITIONS, SORT_FIELDS
+from app.services.queries import kd_ratio
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Строка лидерборда из общего кэша: те же атрибуты, что у PlayerStats для pack_top_stats
+class CachedRow(NamedTuple):
+    user_id: UUID
+    time_played: int
+    kills: int
+    deaths: int
+
+
+# Общий для всех реплик кэш поверх Postgres:
+#   * статистика игрока — hash на (server_name, user_id): time_played, kills, deaths, rank
+#     (места из снимков), version и updated_at; остальное в DTO get_stats собирает SharedCache
+#   * лидерборд — первые STATS_SHARED_CACHE_TOP_SIZE игроков (server_name, sort) в sorted set
+#     и «порог» — ключ (score, user_id) последнего из них при заполнении.
+#     В наборе всегда ровно игроки выше порога: запись выше порога кладётся в набор,
+#     ниже — убирается из него, поэтому префикс набора совпадает с лидербордом в БД.
+#     Порог пустой — в наборе весь сервер
+# Записи (after_write) обновляют лидерборды на месте, а статистику игрока сбрасывают:
+# новой версии строки (ETag) в changes нет, её принесёт следующее чтение из БД.
+# Все ключи живут STATS_SHARED_CACHE_TTL_S — это же предел устаревания для записей,
+# которые разминулись с заполнением из БД, и для total.
+# Методы с префиксом a — то же для async-сервиса
+class SharedCacheBackend:
+
+    def get_stats(self, server_name: str, user_id: UUID) -> dict | None:
+        raise NotImplementedError
+
+    def set_stats(self, server_name: str, user_id: UUID, data: dict):
+        raise NotImplementedError
+
+# Строки [start, stop] лидерборда и total. None — в кэше нет или набор короче stop
+    def get_top(self, server_name: str, sort: str, start: int, stop: int) -> tuple[list[CachedRow], int] | None:
+        raise NotImplementedError
+
+# rows — первые игроки сервера в порядке лидерборда (не больше top_size), total — всего на сервере
+    def fill_top(self, server_name: str, sort: str, rows: list, total: int, top_size: int):
+        raise NotImplementedError
+
+# changes — как у rank_index.apply: (user_id, server_name, новые значения, дельта)
+    def apply(self, changes: list):
+        raise NotImplementedError
+
+    async def aget_stats(self, server_name: str, user_id: UUID) -> dict | None:
+        raise NotImplementedError
+
+    async def aset_stats(self, server_name: str, user_id: UUID, data: dict):
+        raise NotImplementedError
+
+    async def aget_top(self, server_name: str, sort: str, start: int, stop: int) -> tuple[list[CachedRow], int] | None:
+        raise NotImplementedError
+
+    async def afill_top(self, server_name: str, sort: str, rows: list, total: int, top_size: int):
+        raise NotImplementedError
+
+    async def aapply(self, changes: list):
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+# Поля статистики игрока, которые хранит бэкенд
+CACHED_STATS_FIELDS = ("time_played", "kills", "deaths", "rank", "version", "updated_at")
+
+
+def _stats_dto(server_name: str, user_id: UUID, data: dict) -> dict:
+    return {
+        "user_id": str(user_id),
+        "server_name": server_name,
+        "time_played": data["time_played"],
+        "kills": data["kills"],
+        "deaths": data["deaths"],
+        "kd_ratio": kd_ratio(data["kills"], data["deaths"]),
+        "version": data["version"],
+        "updated_at": data["updated_at"],
+        "rank": data["rank"]
+    }
+
+
+# Бэкенд в памяти процесса с той же семантикой, что у Redis: для тестов и разработки
+# без сети (STATS_SHARED_CACHE=memory). Реплики его, разумеется, не делят
+class InMemorySharedCache(SharedCacheBackend):
+
+    def __init__(self, ttl_s: float, clock=time.monotonic):
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._stats: dict[tuple[str, str], tuple[float, dict]] = {}
+        # (server_name, sort) -> (expires, порог (score, user_id) | None, {user_id: (tp, kills, deaths)}, total)
+        self._boards: dict[tuple[str, str], tuple[float, tuple | None, dict, int]] = {}
+        self._lock = threading.Lock()
+
+    def get_stats(self, server_name, user_id):
+        with self._lock:
+            entry = self._stats.get((server_name, str(user_id)))
+            if entry is None or entry[0] < self._clock():
+                return None
+            return dict(entry[1])
+
+    def set_stats(self, server_name, user_id, data):
+        with self._lock:
+            self._stats[(server_name, str(user_id))] = (self._clock() + self.ttl_s, {
+                field: data[field] for field in CACHED_STATS_FIELDS
+            })
+
+    def get_top(self, server_name, sort, start, stop):
+        with self._lock:
+            board = self._boards.get((server_name, sort))
+            if board is None or board[0] < self._clock():
+                return None
+            _, floor, rows, total = board
+            if floor is not None and len(rows) <= stop:
+                return None
+            position = FIELD_POSITIONS[sort]
+            ordered = sorted(rows.items(), key=lambda item: (item[1][position], item[0]), reverse=True)
+            return [CachedRow(UUID(user_id), *values) for user_id, values in ordered[start:stop + 1]], total
+
+    def fill_top(self, server_name, sort, rows, total, top_size):
+        floor = None
+        if len(rows) >= top_size:
+            floor = (getattr(rows[-1], sort), str(rows[-1].user_id))
+        with self._lock:
+            self._boards[(server_name, sort)] = (
+                self._clock() + self.ttl_s,
+                floor,
+                {str(r.user_id): (r.time_played, r.kills, r.deaths) for r in rows},
+                total
+            )
+
+    def apply(self, changes):
+        with self._lock:
+            for user_id, server_name, new, _ in changes:
+                user_id = str(user_id)
+                self._stats.pop((server_name, user_id), None)
+                for sort in SORT_FIELDS:
+                    board = self._boards.get((server_name, sort))
+                    if board is None:
+                        continue
+                    floor, rows = board[1], board[2]
+                    if floor is None or (new[FIELD_POSITIONS[sort]], user_id) > floor:
+                        rows[user_id] = tuple(new)
+                    else:
+                        rows.pop(user_id, None)
+
+    async def aget_stats(self, server_name, user_id):
+        return self.get_stats(server_name, user_id)
+
+    async def aset_stats(self, server_name, user_id, data):
+        self.set_stats(server_name, user_id, data)
+
+    async def aget_top(self, server_name, sort, start, stop):
+        return self.get_top(server_name, sort, start, stop)
+
+    async def afill_top(self, server_name, sort, rows, total, top_size):
+        self.fill_top(server_name, sort, rows, total, top_size)
+
+    async def aapply(self, changes):
+        self.apply(changes)
+
+
+# Обёртка, через которую ходят сервисы: счётчики попаданий и автоматический откат на Postgres.
+# Любая ошибка бэкенда — промах; после ошибки кэш не трогаем STATS_SHARED_CACHE_RETRY_S секунд,
+# чтобы недоступный Redis не добавлял таймаут к каждому запросу
+class SharedCache:
+
+    def __init__(self, backend: SharedCacheBackend | None, top_size: int, retry_s: float):
+        self.backend = backend
+        self.top_size = top_size
+        self.retry_s = retry_s
+        self._down_until = 0.0
+
+        self._stats_hits = CACHE_HITS.labels("shared_stats")
+        self._stats_misses = CACHE_MISSES.labels("shared_stats")
+        self._top_hits = CACHE_HITS.labels("shared_top")
+        self._top_misses = CACHE_MISSES.labels("shared_top")
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _available(self) -> bool:
+        return self.backend is not None and self._down_until <= time.monotonic()
+
+    def _failed(self, operation: str):
+        SHARED_CACHE_ERRORS.labels(operation).inc()
+        if self._down_until <= time.monotonic():
+            logger.warning("Общий кэш недоступен, %s с. читаем из Postgres", self.retry_s, exc_info=True)
+        self._down_until = time.monotonic() + self.retry_s
+
+# Страница лидерборда целиком из кэша? Только OFFSET-страницы в пределах top_size
+    def covers(self, page: int, page_size: int) -> bool:
+        return self._available() and page * page_size <= self.top_size
+
+    def get_stats(self, server_name: str, user_id: UUID) -> dict | None:
+        if not self._available():
+            return None
+        try:
+            data = self.backend.get_stats(server_name, user_id)
+        except Exception:
+            self._failed("get_stats")
+            return None
+        (self._stats_hits if data is not None else self._stats_misses).inc()
+        return _stats_dto(server_name, user_id, data) if data is not None else None
+
+    async def aget_stats(self, server_name: str, user_id: UUID) -> dict | None:
+        if not self._available():
+            return None
+        try:
+            data = await self.backend.aget_stats(server_name, user_id)
+        except Exception:
+            self._failed("get_stats")
+            return None
+        (self._stats_hits if data is not None else self._stats_misses).inc()
+        return _stats_dto(server_name, user_id, data) if data is not None else None
+
+    def set_stats(self, server_name: str, user_id: UUID, data: dict):
+        if not self._available():
+            return
+        try:
+            self.backend.set_stats(server_name, user_id, data)
+        except Exception:
+            self._failed("set_stats")
+
+    async def aset_stats(self, server_name: str, user_id: UUID, data: dict):
+        if not self._available():
+            return
+        try:
+            await self.backend.aset_stats(server_name, user_id, data)
+        except Exception:
+            self._failed("set_stats")
+
+    def get_top(self, server_name: str, sort: str, page: int, page_size: int) -> tuple[list, int] | None:
+        if not self._available():
+            return None
+        try:
+            cached = self.backend.get_top(server_name, sort, (page - 1) * page_size, page * page_size - 1)
+        except Exception:
+            self._failed("get_top")
+            return None
+        (self._top_hits if cached is not None else self._top_misses).inc()
+        return cached
+
+    async def aget_top(self, server_name: str, sort: str, page: int, page_size: int) -> tuple[list, int] | None:
+        if not self._available():
+            return None
+        try:
+            cached = await self.backend.aget_top(server_name, sort, (page - 1) * page_size, page * page_size - 1)
+        except Exception:
+            self._failed("get_top")
+            return None
+        (self._top_hits if cached is not None else self._top_misses).inc()
+        return cached
+
+    def fill_top(self, server_name: str, sort: str, rows: list, total: int):
+        if not self._available():
+            return
+        try:
+            self.backend.fill_top(server_name, sort, rows, total, self.top_size)
+        except Exception:
+            self._failed("fill_top")
+
+    async def afill_top(self, server_name: str, sort: str, rows: list, total: int):
+        if not self._available():
+            return
+        try:
+            await self.backend.afill_top(server_name, sort, rows, total, self.top_size)
+        except Exception:
+            self._failed("fill_top")
+
+# Запись мимо кэша (Redis недоступен) оставляет в нём старые значения до истечения TTL
+    def apply(self, changes: list):
+        if not self._available():
+            return
+        try:
+            self.backend.apply(changes)
+        except Exception:
+            self._failed("apply")
+
+    async def aapply(self, changes: list):
+        if not self._available():
+            return
+        try:
+            await self.backend.aapply(changes)
+        except Exception:
+            self._failed("apply")
+
+    async def aclose(self):
+        if self.backend is not None:
+            await self.backend.aclose()
+
+
+def create_backend() -> SharedCacheBackend | None:
+    if settings.STATS_SHARED_CACHE == "redis":
+        # redis-py нужен только с этим бэкендом
+        from app.services.redis_cache import RedisSharedCache
+        return RedisSharedCache(
+            settings.STATS_SHARED_CACHE_URL,
+            settings.STATS_SHARED_CACHE_TTL_S,
+            settings.STATS_SHARED_CACHE_TIMEOUT_S
+        )
+    if settings.STATS_SHARED_CACHE == "memory":
+        return InMemorySharedCache(settings.STATS_SHARED_CACHE_TTL_S)
+    return None
+
+
+shared_cache = SharedCache(
+    create_backend(),
+    settings.STATS_SHARED_CACHE_TOP_SIZE,
+    settings.STATS_SHARED_CACHE_RETRY_S
+)
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_advisory_xact_lock: секции бакетов создаёт и удаляет одна реплика за раз
+BUCKETS_LOCK_ID = 7_301_227
+
+# Часовые бакеты режутся на секции по дням, дневные — по месяцам
+HOURLY_TABLE = "player_stats_hourly"
+DAILY_TABLE = "player_stats_daily"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+# Секции, которые должны существовать: [(имя, таблица, from, to)]
+def _wanted_partitions(today: date, ahead_days: int) -> list[tuple[str, str, date, date]]:
+    wanted = []
+    for offset in range(ahead_days + 1):
+        day = today + timedelta(days=offset)
+        wanted.append((f"{HOURLY_TABLE}_p{day:%Y%m%d}", HOURLY_TABLE, day, day + timedelta(days=1)))
+
+    month = _month_start(today)
+    while month <= today + timedelta(days=ahead_days):
+        wanted.append((f"{DAILY_TABLE}_p{month:%Y%m}", DAILY_TABLE, month, _next_month(month)))
+        month = _next_month(month)
+    return wanted
+
+
+def _partition(table: str, start: date) -> tuple[str, str, date, date]:
+    if table == HOURLY_TABLE:
+        return f"{HOURLY_TABLE}_p{start:%Y%m%d}", HOURLY_TABLE, start, start + timedelta(days=1)
+    return f"{DAILY_TABLE}_p{start:%Y%m}", DAILY_TABLE, start, _next_month(start)
+
+
+# Периоды, строки которых лежат в DEFAULT-секции: их секции тоже создаются, строки
+# переносятся — иначе период навсегда остался бы в DEFAULT и мимо срока хранения
+def _default_partitions(db: Session) -> list[tuple[str, str, date, date]]:
+    days = db.scalars(text(
+        f"SELECT DISTINCT CAST(bucket AT TIME ZONE 'UTC' AS DATE) FROM {HOURLY_TABLE}_default"
+    )).all()
+    months = db.scalars(text(
+        f"SELECT DISTINCT CAST(date_trunc('month', day) AS DATE) FROM {DAILY_TABLE}_default"
+    )).all()
+    return [_partition(HOURLY_TABLE, day) for day in days] + [_partition(DAILY_TABLE, month) for month in months]
+
+
+# Наши секции таблицы с верхней границей: [(имя, to)]. Граница берётся из имени
+#(_pYYYYMMDD / _pYYYYMM), а не из pg_get_expr — тот печатает timestamptz в зоне сессии.
+#DEFAULT-секцию и секции, созданные руками под другими именами, не трогаем
+def _existing_partitions(db: Session, table: str) -> list[tuple[str, date]]:
+    names = db.scalars(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+    """), {"table": table}).all()
+
+    partitions = []
+    for name in names:
+        suffix = name.removeprefix(f"{table}_p")
+        if suffix == name or not suffix.isdigit():
+            continue
+        if table == HOURLY_TABLE and len(suffix) == 8:
+            upper = datetime.strptime(suffix, "%Y%m%d").date() + timedelta(days=1)
+        elif table == DAILY_TABLE and len(suffix) == 6:
+            upper = _next_month(datetime.strptime(suffix, "%Y%m").date())
+        else:
+            continue
+        partitions.append((name, upper))
+    return partitions
+
+
+class StatsBucketService:
+
+# Создаёт секции на сегодня и STATS_BUCKET_PARTITIONS_AHEAD_DAYS дней вперёд, а также
+# для периодов, уже попавших в DEFAULT-секцию. Postgres не создаёт секцию, пока строки
+# её периода лежат в DEFAULT, поэтому такие строки переносятся: DEFAULT отключается,
+# секция создаётся, строки переезжают, DEFAULT подключается обратно — одной транзакцией
+    @staticmethod
+    def ensure_partitions(db: Session, today: date | None = None) -> int:
+        today = today or datetime.now(timezone.utc).date()
+        db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": BUCKETS_LOCK_ID})
+
+        wanted = _wanted_partitions(today, settings.STATS_BUCKET_PARTITIONS_AHEAD_DAYS) + _default_partitions(db)
+        created = 0
+        for name, table, start, end in dict.fromkeys(wanted):
+            if db.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+                continue
+            if table == HOURLY_TABLE:
+                bounds = f"FROM ('{start} 00:00+00') TO ('{end} 00:00+00')"
+                period = f"bucket >= '{start} 00:00+00' AND bucket < '{end} 00:00+00'"
+            else:
+                bounds = f"FROM ('{start}') TO ('{end}')"
+                period = f"day >= '{start}' AND day < '{end}'"
+            default = f"{table}_default"
+
+            if not db.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {period})")):
+                db.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+            else:
+                db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+                db.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+                moved = db.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {period}")).rowcount
+                db.execute(text(f"DELETE FROM {default} WHERE {period}"))
+                db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+                logger.warning("Секция %s создана, из DEFAULT-секции перенесено строк: %s", name, moved)
+            created += 1
+
+        db.commit()
+        return created
+
+# Удаляет секции, целиком вышедшие за срок хранения (0 — хранить всегда)
+    @staticmethod
+    def drop_expired_partitions(db: Session, today: date | None = None) -> int:
+        today = today or datetime.now(timezone.utc).date()
+        db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": BUCKETS_LOCK_ID})
+
+        dropped = 0
+        for table, retention_days in (
+                (HOURLY_TABLE, settings.STATS_HOURLY_RETENTION_DAYS),
+                (DAILY_TABLE, settings.STATS_DAILY_RETENTION_DAYS)
+        ):
+            if retention_days <= 0:
+                continue
+            cutoff = today - timedelta(days=retention_days)
+            for name, upper in _existing_partitions(db, table):
+                if upper <= cutoff:
+                    db.execute(text(f"DROP TABLE {name}"))
+                    dropped += 1
+
+        db.commit()
+        return dropped
+
+    @staticmethod
+    def maintain() -> tuple[int, int]:
+        with SessionLocal() as db:
+            created = StatsBucketService.ensure_partitions(db)
+            dropped = StatsBucketService.drop_expired_partitions(db)
+        return created, dropped
+
+
+# Фоновая задача из lifespan: секции наперёд и очистка по сроку хранения раз в interval_s секунд
+async def maintain_buckets_periodically(interval_s: float):
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await asyncio.to_thread(StatsBucketService.maintain)
+        except Exception:
+            logger.exception("Не удалось обслужить секции бакетов статистики")
@@ -1,37 +1,58 @@
-import math
+from typing import BinaryIO
 from sqlalchemy.orm import Session
 from uuid import UUID
 from app.models import PlayerStats
-from app.services.constants import KD_RATIO_PRECISION
+from app.services import bulk_io, queries
+from app.services.constants import CONSISTENCY_LIVE, CONSISTENCY_SNAPSHOT
+from app.services.cache import stats_cache
+from app.services.leaderboard_snapshots import LeaderboardSnapshotService
+from app.services.rank_index import rank_index
+from app.services.shared_cache import shared_cache
+from app.services.windows import parse_window
+from app.services.write_hooks import after_bulk_write, after_write
 from app.codes import Codes
+from app.settings import settings
 
 
+# Синхронный сервис: им пользуются gRPC-сервер и write-behind буфер.
+# HTTP-маршруты работают через AsyncStatsService, запросы у них общие (queries.py)
 class StatsService:
 
-# Проверяем, что у игрока ещё нет статистики
+# Создание статистики игрока одним INSERT ... ON CONFLICT DO NOTHING RETURNING
 #Принимает БД-сессию
 #Принимает user_id
-#Возвращает ORM-объект PlayerStats
+#Возвращает ORM-объект PlayerStats; строка уже есть — ValueError(STATS_ALREADY_EXISTS)
     @staticmethod
     def create_stats(db: Session, user_id: UUID, server_name: str) -> PlayerStats:
-        if db.query(PlayerStats).filter_by(
-                user_id=user_id,
-                server_name=server_name
-        ).first():
-            raise ValueError(Codes.STATS_ALREADY_EXISTS)
+        stats = db.scalars(queries.insert_stats_stmt(user_id, server_name)).first()
 
-        stats = PlayerStats(
-        user_id=user_id,
-        server_name=server_name
-    )
+        if stats is None:
+            db.rollback()
+            raise ValueError(Codes.STATS_ALREADY_EXISTS)
 
-        db.add(stats)
         db.commit()
-        db.refresh(stats)
+        after_write([(user_id, server_name)], [(user_id, server_name, (0, 0, 0), (0, 0, 0))])
         return stats
 
+# Ростер сервера одним запросом: создаёт отсутствующих игроков, существующих не трогает.
+#Повтор того же ростера безопасен. Возвращает created и existing в порядке user_id
+    @staticmethod
+    def create_roster(db: Session, server_name: str, user_ids: list[UUID]) -> dict:
+        user_ids = sorted(set(user_ids))
+        created = set(db.scalars(queries.insert_roster_stmt(server_name, user_ids)).all())
+        db.commit()
+
+        if created:
+            after_write(
+                [(user_id, server_name) for user_id in created],
+                [(user_id, server_name, (0, 0, 0), (0, 0, 0)) for user_id in created]
+            )
+        return queries.to_roster_dto(server_name, user_ids, created)
+
 # Полное обновление статистики игрока
 #Передаём поля — сервис не зависит от HTTP-схем.
+#Один атомарный UPDATE ... SET kills = kills + :k RETURNING:
+#один round trip и никаких потерянных инкрементов при конкурентных запросах
     @staticmethod
     def update_stats(
         db: Session,
@@ -41,45 +62,178 @@ class StatsService:
         kills: int,
         deaths: int
     ) -> PlayerStats:
-        stats = db.query(PlayerStats).filter_by(
-        user_id=user_id,
-        server_name=server_name
-    ).first()
+        stats = db.scalars(
+            queries.update_stats_stmt(user_id, server_name, time_played, kills, deaths)
+        ).first()
 
         if not stats:
+            db.rollback()
             raise ValueError("STATS_NOT_FOUND")
 
-        stats.time_played += time_played
-        stats.kills += kills
-        stats.deaths += deaths
-
         db.commit()
+        after_write(
+            [(user_id, server_name)],
+            [(user_id, server_name, (stats.time_played, stats.kills, stats.deaths), (time_played, kills, deaths))]
+        )
         return stats
 
+# Применяет пачку уже просуммированных дельт одним multi-row upsert в одной транзакции
+#deltas: {(user_id, server_name): (time_played, kills, deaths)}
+#Отсутствующие строки создаются — так работает write-behind буфер
+    @staticmethod
+    def apply_deltas(db: Session, deltas: dict[tuple[UUID, str], tuple[int, int, int]]) -> int:
+        if not deltas:
+            return 0
+
+        rows = queries.delta_rows(deltas)
+        changed = []
+        for stmt in queries.upsert_deltas_stmts(rows):
+            changed.extend(db.execute(stmt))
+
+        db.commit()
+        after_write(deltas, queries.changes_from_rows(changed, deltas))
+        return len(rows)
+
+# Пачка дельт к существующим строкам: UPDATE ... FROM (VALUES ...) в одной транзакции
+#В отличие от apply_deltas ничего не создаёт и возвращает ключи, которые нашлись
+    @staticmethod
+    def update_stats_batch(
+            db: Session,
+            deltas: dict[tuple[UUID, str], tuple[int, int, int]]
+    ) -> set[tuple[UUID, str]]:
+        if not deltas:
+            return set()
+
+        changed = []
+        for stmt in queries.update_deltas_stmts(queries.delta_rows(deltas)):
+            changed.extend(db.execute(stmt))
+
+        db.commit()
+        found = {(row.user_id, row.server_name) for row in changed}
+        after_write(found, queries.changes_from_rows(changed, deltas))
+        return found
+
 # Метод возвращает не ORM, а DTO (dict) — готовый формат для API
+#Read-through: stats_cache процесса, затем общий кэш реплик (shared_cache), затем БД.
+#Возвращённый dict общий для всех читателей, менять его нельзя
     @staticmethod
     def get_stats(db: Session, user_id: UUID, server_name: str) -> dict:
-        stats = db.query(PlayerStats).filter_by(
-        user_id=user_id,
-        server_name=server_name
-    ).first()
+        key = (user_id, server_name)
+        cached = stats_cache.get(key)
+        if cached is not None:
+            return cached
+        stamp = stats_cache.stamp()
+
+        data = shared_cache.get_stats(server_name, user_id)
+        if data is None:
+            stats = db.scalars(queries.select_stats(user_id, server_name)).first()
+
+            if not stats:
+                raise ValueError("STATS_NOT_FOUND")
+
+            data = queries.to_dto(stats)
+            # Место в лидербордах берём из снимков, без COUNT(*) WHERE kills > x.
+            # None — снимки выключены; в словаре нет ключа — игрок ещё не попал в снимок
+            data["rank"] = (
+                LeaderboardSnapshotService.get_ranks(db, user_id, server_name)
+                if settings.LEADERBOARD_SNAPSHOT_INTERVAL_S > 0 else None
+            )
+            shared_cache.set_stats(server_name, user_id, data)
+        stats_cache.set(key, data, stamp)
+        return data
+
+# Пачка чтений за один запрос: WHERE (user_id, server_name) IN (...)
+#Отсутствующие ключи просто не попадают в результат
+    @staticmethod
+    def get_stats_batch(db: Session, keys: list[tuple[UUID, str]]) -> list[dict]:
+        if not keys:
+            return []
+
+        items = db.scalars(queries.select_stats_batch(keys)).all()
+        return [queries.to_dto(s) for s in items]
+
+# Место игрока на сервере по полю sort (1 — первое) и число игроков.
+#Значение игрока — из player_stats (PK lookup), место — из индекса в памяти за O(log N);
+#пока доски сервера нет (она строится фоном), место считается COUNT'ом в БД
+    @staticmethod
+    def get_rank(db: Session, user_id: UUID, server_name: str, sort: str) -> dict:
+        stats = db.scalars(queries.select_stats(user_id, server_name)).first()
 
         if not stats:
             raise ValueError("STATS_NOT_FOUND")
 
-        kd = stats.kills / stats.deaths if stats.deaths > 0 else stats.kills
+        score = getattr(stats, sort)
+        found = rank_index.rank(server_name, sort, score, user_id)
+        if found is None:
+            found = (
+                db.scalar(queries.select_rank_count(server_name, sort, score, user_id)) + 1,
+                db.scalar(queries.select_total_players(server_name)) or 0
+            )
+
+        return queries.to_rank_dto(user_id, server_name, sort, score, *found)
 
-        return {
-            "user_id": str(stats.user_id),
-            "server_name": stats.server_name,
-            "time_played": stats.time_played,
-            "kills": stats.kills,
-            "deaths": stats.deaths,
-            "kd_ratio": round(kd, KD_RATIO_PRECISION)
-        }
+# Игрок и по count соседей сверху и снизу по полю sort — один запрос (queries.around_query).
+#Места проставляются, если у процесса есть доска индекса мест для сервера
+    @staticmethod
+    def get_around(db: Session, user_id: UUID, server_name: str, sort: str, count: int) -> list[dict]:
+        rows = db.execute(queries.around_query(user_id, server_name, sort, count)).all()
+
+        if not rows:
+            raise ValueError("STATS_NOT_FOUND")
+
+        score = next(getattr(r, sort) for r in rows if r.user_id == user_id)
+        found = rank_index.rank(server_name, sort, score, user_id)
+        return queries.pack_around(rows, user_id, found[0] if found else None)
+
+# Суммы игрока по всем серверам из player_totals (поддерживается триггерами)
+    @staticmethod
+    def get_global_stats(db: Session, user_id: UUID) -> dict:
+        totals = db.scalars(queries.select_player_totals(user_id)).first()
+
+        if not totals:
+            raise ValueError("STATS_NOT_FOUND")
+
+        return queries.to_totals_dto(totals)
+
+# Глобальный топ-N по сумме со всех серверов
+    @staticmethod
+    def get_global_top(db: Session, sort: str, limit: int) -> list[dict]:
+        items = db.scalars(queries.select_global_top(sort, limit)).all()
+        return [queries.to_totals_dto(t) for t in items]
+
+# Суммы игрока за окно (day | week | season | from..to) из часовых и дневных бакетов.
+#Игрок есть, но в окне ничего не делал — нули; игрока нет совсем — STATS_NOT_FOUND
+    @staticmethod
+    def get_window_stats(db: Session, user_id: UUID, server_name: str, window: str) -> dict:
+        start, end = parse_window(window)
+        row = db.execute(queries.select_window_stats(user_id, server_name, start, end)).one()
+
+        if not row.buckets and not db.scalars(queries.select_stats(user_id, server_name)).first():
+            raise ValueError("STATS_NOT_FOUND")
+
+        return queries.to_window_dto(user_id, server_name, row, start, end)
+
+# Лидерборд за окно: суммы бакетов с GROUP BY user_id, только по номеру страницы
+    @staticmethod
+    def get_window_top_stats(
+            db: Session,
+            server_name: str,
+            sort: str,
+            page: int,
+            page_size: int,
+            window: str
+    ) -> tuple[list[dict], dict]:
+        start, end = parse_window(window)
+        rows = db.execute(queries.window_top_query(server_name, sort, start, end, page, page_size)).all()
+        total = rows[0].total if rows else db.scalar(queries.select_window_total(server_name, start, end))
+
+        return queries.pack_window_page(rows, total, page, page_size, start, end)
 
 # Подсчёт общего количества записей для пагинации
-# Сортировка динамически по выбранному полю
+# Сортировка динамически по выбранному полю, user_id — стабильный tiebreak
+#consistency=snapshot читает последний снимок лидерборда (см. leaderboard_snapshots.py)
+#Два режима: номер страницы (OFFSET) и курсор (keyset: WHERE (kills, user_id) < (:k, :u)),
+#цена курсора не зависит от глубины страницы
 #Возвращает объект пагинации
 #(разделение удобно для HTTP-слоя)
     @staticmethod
@@ -88,32 +242,68 @@ class StatsService:
             server_name: str,
             sort: str,
             page: int,
-            page_size: int
+            page_size: int,
+            cursor: str | None = None,
+            consistency: str = CONSISTENCY_LIVE
     ) -> tuple[list[dict], dict]:
-        total = db.query(PlayerStats).count()
-        total_pages = math.ceil(total / page_size)
-
-        query = db.query(PlayerStats).filter_by(
-            server_name=server_name
-        ).order_by(getattr(PlayerStats, sort).desc())
-        items = query.offset((page - 1) * page_size).limit(page_size).all()
-
-        data = [
-            {
-                "user_id": s.user_id,
-                "time_played": s.time_played,
-                "kills": s.kills,
-                "deaths": s.deaths
-            } for s in items
-        ]
-
-        pagination = {
-            "page": page,
-            "pageSize": page_size,
-            "total": total,
-            "totalPages": total_pages,
-            "nextPage": page + 1 if page < total_pages else None,
-            "prevPage": page - 1 if page > 1 else None
-        }
-
-        return data, pagination #Возвращаем чистые данные, без HTTP-логики
+        # Снимок листается только по номеру страницы; если снимка ещё нет — читаем живые строки
+        if consistency == CONSISTENCY_SNAPSHOT:
+            if cursor is not None:
+                raise ValueError("INVALID_CURSOR")
+            snapshot = LeaderboardSnapshotService.get_top_stats(db, server_name, sort, page, page_size)
+            if snapshot is not None:
+                return snapshot
+
+        # Первые страницы — из общего кэша; при промахе одним запросом берём весь
+        # кэшируемый топ, кладём его в кэш и отдаём страницу из него
+        if cursor is None and shared_cache.covers(page, page_size):
+            cached = shared_cache.get_top(server_name, sort, page, page_size)
+            if cached is None:
+                stmt, _ = queries.top_stats_query(server_name, sort, 1, shared_cache.top_size, None)
+                rows = db.scalars(stmt).all()
+                total = db.scalar(queries.select_total_players(server_name)) or 0
+                shared_cache.fill_top(server_name, sort, rows, total)
+                cached = rows[(page - 1) * page_size:page * page_size], total
+            items, total = cached
+            return queries.pack_top_stats(items, total, sort, page, page_size, None)
+
+        stmt, direction = queries.top_stats_query(server_name, sort, page, page_size, cursor)
+        total = db.scalar(queries.select_total_players(server_name)) or 0
+        items = db.scalars(stmt).all()
+
+        return queries.pack_top_stats(items, total, sort, page, page_size, direction) #Возвращаем чистые данные, без HTTP-логики
+
+# Выгрузка сервера (None — всех серверов) в out в формате fmt, возвращает число строк.
+#COPY пишет в out по мере прихода данных — память не растёт с числом строк;
+#выгрузка — один запрос, то есть один согласованный снимок данных
+    @staticmethod
+    def export_stats(db: Session, server_name: str | None, fmt: str, out: BinaryIO) -> int:
+        db.execute(bulk_io.NO_STATEMENT_TIMEOUT)
+        with db.connection().connection.cursor() as cur:
+            cur.copy_expert(cur.mogrify(bulk_io.export_sql(fmt, server_name), (server_name,)).decode(), out)
+            return cur.rowcount
+
+# Загрузка из файла: COPY во временную таблицу и одно слияние в player_stats.
+#Значения из файла заменяют текущие; ошибка в данных — ValueError(IMPORT_INVALID_ROWS, текст Postgres)
+    @staticmethod
+    def import_stats(db: Session, source: BinaryIO, fmt: str) -> dict:
+        try:
+            db.execute(bulk_io.NO_STATEMENT_TIMEOUT)
+            db.execute(bulk_io.SKIP_BUCKETS)
+            for ddl in bulk_io.STAGING_DDL:
+                db.execute(ddl)
+            with db.connection().connection.cursor() as cur:
+                cur.copy_expert(bulk_io.copy_sql(fmt), source, size=1 << 20)
+            if fmt == "ndjson":
+                db.execute(bulk_io.STAGE_NDJSON)
+            row = db.execute(bulk_io.MERGE_IMPORT).one()
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            message = bulk_io.import_error(exc)
+            if message is None:
+                raise
+            raise ValueError(Codes.IMPORT_INVALID_ROWS, message) from exc
+
+        after_bulk_write()
+        return bulk_io.to_import_dto(row)
@@ -0,0 +1,84 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.settings import settings
+
+# Окна статистики по времени, все границы — UTC:
+#   day    — с начала текущих суток
+#   week   — с понедельника текущей недели
+#   season — с STATS_SEASON_START
+#   A..B   — с A до B (даты или ISO 8601; без зоны — UTC), B можно опустить: "2026-10-01.."
+# Окно — полуинтервал [start, end), end=None — «до сейчас».
+# Точность — час: бакеты часовые, границы округляются вниз до часа.
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _parse_bound(raw: str) -> datetime:
+    value = datetime.fromisoformat(raw)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return _floor_hour(value.astimezone(timezone.utc))
+
+
+# Битое окно — ValueError("INVALID_WINDOW"), как битый курсор
+def parse_window(window: str, now: datetime | None = None) -> tuple[datetime, datetime | None]:
+    now = now or datetime.now(timezone.utc)
+    today = datetime.combine(now.date(), time(), timezone.utc)
+
+    if window == "day":
+        return today, None
+    if window == "week":
+        return today - timedelta(days=today.weekday()), None
+    if window == "season":
+        if settings.STATS_SEASON_START is None:
+            raise ValueError("INVALID_WINDOW")
+        season_start = settings.STATS_SEASON_START
+        if season_start.tzinfo is None:
+            season_start = season_start.replace(tzinfo=timezone.utc)
+        return _floor_hour(season_start.astimezone(timezone.utc)), None
+
+    start_raw, separator, end_raw = window.partition("..")
+    if not separator or not start_raw:
+        raise ValueError("INVALID_WINDOW")
+    try:
+        start = _parse_bound(start_raw)
+        end = _parse_bound(end_raw) if end_raw else None
+    except ValueError:
+        raise ValueError("INVALID_WINDOW")
+
+    if end is not None and end <= start:
+        raise ValueError("INVALID_WINDOW")
+    return start, end
+
+
+# Раскладка окна по бакетам: целые сутки — из дневных, неровные края — из часовых.
+# Возвращает (days, hours): days = (первый день, день после последнего | None),
+# hours — список полуинтервалов часовых бакетов
+def split_window(
+        start: datetime,
+        end: datetime | None
+) -> tuple[tuple[date, date | None] | None, list[tuple[datetime, datetime]]]:
+    first_day = start.date() if start.time() == time() else start.date() + timedelta(days=1)
+    first_day_start = datetime.combine(first_day, time(), timezone.utc)
+
+    if end is None:
+        hours = [(start, first_day_start)] if start < first_day_start else []
+        return (first_day, None), hours
+
+    last_day = end.date()
+    last_day_start = datetime.combine(last_day, time(), timezone.utc)
+    if first_day >= last_day:
+        return None, [(start, end)]
+
+    hours = []
+    if start < first_day_start:
+        hours.append((start, first_day_start))
+    if last_day_start < end:
+        hours.append((last_day_start, end))
+    return (first_day, last_day), hours
+
+
+def window_bounds(start: datetime, end: datetime | None) -> dict:
+    return {"from": start, "to": end}
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from uuid import UUID
+
+from sqlalchemy.exc import DataError
+
+from app.database import SessionLocal
+from app.metrics import (
+    WRITE_BUFFER_DROPPED,
+    WRITE_BUFFER_FLUSH_ERRORS,
+    WRITE_BUFFER_FLUSH_SECONDS,
+    WRITE_BUFFER_FLUSH_SIZE,
+    WRITE_BUFFER_PENDING,
+    WRITE_BUFFER_REJECTED
+)
+from app.services.constants import INT32_MAX, INT32_MIN
+from app.services.stats_service import StatsService
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBufferFull(Exception):
+    """Буфер заполнен и не освободился за отведённое время."""
+
+
+class DeltaOutOfRange(ValueError):
+    """Сумма дельт ключа не помещается в колонку INTEGER."""
+
+
+# Write-behind агрегатор: суммирует дельты по (user_id, server_name) в памяти
+# и сбрасывает их в БД одним upsert раз в flush_ms или при flush_size ключах.
+# Потокобезопасен: в него пишут и HTTP-обработчики, и пул gRPC.
+class StatsWriteBuffer:
+
+    def __init__(
+            self,
+            enabled: bool,
+            flush_ms: int,
+            flush_size: int,
+            max_keys: int,
+            put_timeout_s: float
+    ):
+        self.enabled = enabled
+        self.flush_interval = flush_ms / 1000
+        self.flush_size = flush_size
+        self.max_keys = max_keys
+        self.put_timeout_s = put_timeout_s
+
+        self._pending: dict[tuple[UUID, str], list[int]] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+# Добавляет дельту. Дельта для уже ожидающего ключа складывается и память не растит,
+# новый ключ при полном буфере ждёт сброса (backpressure) не дольше put_timeout_s.
+# wait=False — не ждать, а вернуть False (для event loop: ждать там нельзя).
+# Сумма, вышедшая за INT32, не копится — DeltaOutOfRange, ожидающая дельта не меняется
+    def add(
+            self,
+            user_id: UUID,
+            server_name: str,
+            time_played: int,
+            kills: int,
+            deaths: int,
+            wait: bool = True
+    ) -> bool:
+        key = (user_id, server_name)
+        deadline = time.monotonic() + self.put_timeout_s
+
+        with self._cond:
+            while key not in self._pending and len(self._pending) >= self.max_keys:
+                self._cond.notify_all()
+                if not wait:
+                    return False
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    WRITE_BUFFER_REJECTED.inc()
+                    raise WriteBufferFull(key)
+                self._cond.wait(remaining)
+
+            delta = self._pending.get(key, (0, 0, 0))
+            summed = [delta[0] + time_played, delta[1] + kills, delta[2] + deaths]
+            if not all(INT32_MIN <= value <= INT32_MAX for value in summed):
+                raise DeltaOutOfRange(key)
+            self._pending[key] = summed
+
+            WRITE_BUFFER_PENDING.set(len(self._pending))
+            if len(self._pending) >= self.flush_size:
+                self._cond.notify_all()
+            return True
+
+# Забирает всё накопленное и пишет одной транзакцией.
+# DataError (значение вне диапазона колонки с учётом того, что уже в БД) — пачка
+# делится пополам, пока виноватый ключ не останется один: его дельта отбрасывается
+# с записью в лог, остальные пишутся. Другая ошибка (БД недоступна) — всё ещё
+# не записанное возвращается в буфер и уйдёт со следующим сбросом
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                WRITE_BUFFER_PENDING.set(0)
+                self._cond.notify_all()
+
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            self._write(batch)
+            WRITE_BUFFER_FLUSH_SECONDS.observe(time.perf_counter() - started)
+            WRITE_BUFFER_FLUSH_SIZE.observe(len(batch))
+            return len(batch)
+
+    def _write(self, batch: dict[tuple[UUID, str], list[int]]):
+        chunks = [batch]
+        while chunks:
+            chunk = chunks.pop()
+            db = SessionLocal()
+            try:
+                StatsService.apply_deltas(db, {key: tuple(delta) for key, delta in chunk.items()})
+            except DataError:
+                db.rollback()
+                items = list(chunk.items())
+                if len(items) == 1:
+                    key, delta = items[0]
+                    WRITE_BUFFER_DROPPED.inc()
+                    logger.error("Дельта %s для %s отброшена: значение вне диапазона колонки", delta, key)
+                    continue
+                middle = len(items) // 2
+                chunks += [dict(items[middle:]), dict(items[:middle])]
+            except Exception:
+                db.rollback()
+                WRITE_BUFFER_FLUSH_ERRORS.inc()
+                for rest in (chunk, *chunks):
+                    self._merge_back(rest)
+                raise
+            finally:
+                db.close()
+
+    def _merge_back(self, batch: dict[tuple[UUID, str], list[int]]):
+        with self._cond:
+            for key, delta in batch.items():
+                pending = self._pending.setdefault(key, [0, 0, 0])
+                for i in range(3):
+                    pending[i] += delta[i]
+            WRITE_BUFFER_PENDING.set(len(self._pending))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping:
+                    return
+
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Не удалось сбросить буфер статистики")
+                time.sleep(self.flush_interval)
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="stats-write-buffer", daemon=True)
+        self._thread.start()
+
+# Останавливает фоновый поток и делает финальный сброс
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Финальный сброс не удался, потеряно ключей: %s", len(self._pending))
+
+
+write_buffer = StatsWriteBuffer(
+    enabled=settings.STATS_WRITE_BUFFER_ENABLED,
+    flush_ms=settings.STATS_WRITE_BUFFER_FLUSH_MS,
+    flush_size=settings.STATS_WRITE_BUFFER_FLUSH_SIZE,
+    max_keys=settings.STATS_WRITE_BUFFER_MAX_KEYS,
+    put_timeout_s=settings.STATS_WRITE_BUFFER_PUT_TIMEOUT_S
+)
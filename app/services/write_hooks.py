@@ -0,0 +1,37 @@
+from typing import Iterable
+from uuid import UUID
+
+from app.services.cache import stats_cache
+from app.services.live_leaderboard import live_leaderboard
+from app.services.rank_index import rank_index
+from app.services.shared_cache import shared_cache
+
+
+# Вызывается сервисами после коммита любой записи в player_stats
+# (и sync, и async путём): строки изменились — сбрасываем их из кэша.
+# changes — новые значения и дельты тех же строк: ими обновляются индекс мест
+# (rank_index.apply) и общий кэш (shared_cache.apply), а серверы помечаются для пересчёта
+# живого лидерборда (live_leaderboard.mark_dirty). Версии досок для ETag ведут триггеры в БД
+def after_write(keys: Iterable[tuple[UUID, str]], changes: list | None = None):
+    stats_cache.invalidate_many(keys)
+    if changes:
+        rank_index.apply(changes)
+        shared_cache.apply(changes)
+        live_leaderboard.mark_dirty(changes)
+
+
+# Загрузка (bulk import) меняет слишком много строк, чтобы перечислять их:
+# кэш процесса и индекс мест сбрасываются целиком, общий кэш догоняет БД за свой TTL
+def after_bulk_write():
+    stats_cache.clear()
+    rank_index.clear()
+    live_leaderboard.mark_all_dirty()
+
+
+# То же для AsyncStatsService: общий кэш — без блокирующего похода в Redis на event loop
+async def after_write_async(keys: Iterable[tuple[UUID, str]], changes: list | None = None):
+    stats_cache.invalidate_many(keys)
+    if changes:
+        rank_index.apply(changes)
+        live_leaderboard.mark_dirty(changes)
+        await shared_cache.aapply(changes)
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +13,115 @@ class Settings(BaseSettings):
 
     APP_HOST: str
     APP_PORT: int
+    # Число процессов uvicorn при запуске через app.launcher
+    HTTP_WORKERS: int = 1
+    # Access-лог uvicorn; под нагрузкой заметно ест CPU
+    HTTP_ACCESS_LOG: bool = True
+
+    # gRPC: процессы поднимает app.launcher, GRPC_IN_PROCESS=true — запуск из lifespan
+    # (для разработки с --reload)
+    GRPC_ENABLED: bool = True
+    GRPC_IN_PROCESS: bool = False
+    GRPC_HOST: str = "::"
+    GRPC_PORT: int = 50051
+    GRPC_PROCESSES: int = 1
+    GRPC_MAX_WORKERS: int = 10
+    GRPC_REUSE_PORT: bool = True
+    GRPC_GRACE_S: float = 10
+    # thread — grpc.server на пуле потоков и psycopg2, aio — grpc.aio на event loop и asyncpg
+    GRPC_SERVER_MODE: Literal["thread", "aio"] = "thread"
+    # 0 — без лимита; сверх лимита RPC получают RESOURCE_EXHAUSTED
+    GRPC_MAX_CONCURRENT_RPCS: int = 0
+    # Keepalive и размеры сообщений; 0 — значение gRPC по умолчанию
+    GRPC_KEEPALIVE_TIME_MS: int = 0
+    GRPC_KEEPALIVE_TIMEOUT_MS: int = 0
+    GRPC_MIN_PING_INTERVAL_MS: int = 0
+    GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS: bool = False
+    GRPC_MAX_RECEIVE_MESSAGE_BYTES: int = 0
+    GRPC_MAX_SEND_MESSAGE_BYTES: int = 0
+
+    # Метрики Prometheus: гистограммы HTTP, gRPC и SQL-запросов. Счётчики кэша,
+    # буфера и пула собираются всегда. METRICS_GRPC_PORT > 0 — каждый gRPC-процесс
+    # отдаёт свои метрики на METRICS_GRPC_PORT + номер процесса
+    METRICS_ENABLED: bool = True
+    METRICS_GRPC_PORT: int = 0
+
+    # Пул соединений — отдельно у sync (gRPC, буфер) и async (HTTP) движка
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_S: float = 30
+    DB_POOL_RECYCLE_S: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    # Открыть DB_POOL_SIZE соединений HTTP-пула при старте; до конца прогрева /ready отдаёт 503
+    DB_POOL_WARMUP: bool = True
+    # statement_timeout на стороне сервера, 0 — без ограничения
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # Режим для PgBouncer (transaction pooling): без серверных prepared statements
+    # и без startup-параметров; statement_timeout тогда задаётся на роли в Postgres
+    DB_PGBOUNCER: bool = False
+    # plan_cache_mode=force_custom_plan для HTTP-пула — при секциях player_stats по
+    # server_name (python -m app.partitions); с PgBouncer задаётся на роли в Postgres
+    DB_CUSTOM_PLANS: bool = False
+
+    # Миграции на старте: apply — применить недостающие (под advisory lock),
+    # check — только сверить версию схемы и упасть, если она отстаёт, off — не проверять
+    SCHEMA_MIGRATIONS: Literal["apply", "check", "off"] = "apply"
+
+    # Write-behind буфер дельт статистики (выключен по умолчанию)
+    STATS_WRITE_BUFFER_ENABLED: bool = False
+    STATS_WRITE_BUFFER_FLUSH_MS: int = 200
+    STATS_WRITE_BUFFER_FLUSH_SIZE: int = 1000
+    STATS_WRITE_BUFFER_MAX_KEYS: int = 50000
+    STATS_WRITE_BUFFER_PUT_TIMEOUT_S: float = 1.0
+
+    # In-process кэш GET /stats/{user_id} и gRPC GetStats, 0 — кэш выключен
+    STATS_CACHE_SIZE: int = 10000
+    STATS_CACHE_TTL_S: float = 5.0
+
+    # Общий для реплик кэш статистики игрока и первых страниц лидерборда:
+    # off | redis | memory (в памяти процесса, для тестов и разработки)
+    STATS_SHARED_CACHE: Literal["off", "redis", "memory"] = "off"
+    STATS_SHARED_CACHE_URL: str = "redis://localhost:6379/0"
+    STATS_SHARED_CACHE_TTL_S: float = 30.0
+    # Сколько первых игроков лидерборда (server_name, sort) держать в кэше
+    STATS_SHARED_CACHE_TOP_SIZE: int = 1000
+    # Таймаут запроса к Redis и пауза после ошибки, пока читаем мимо кэша из Postgres
+    STATS_SHARED_CACHE_TIMEOUT_S: float = 0.05
+    STATS_SHARED_CACHE_RETRY_S: float = 5.0
+
+    # Индекс мест в памяти процесса (GET /stats/{user_id}/rank): сколько досок (server_name, sort)
+    # держать, ~60 байт на игрока в доске; 0 — места всегда считаются в БД
+    STATS_RANK_INDEX_MAX_BOARDS: int = 16
+    # Период пересборки доски из БД: записи других процессов видны не позже чем через него
+    STATS_RANK_INDEX_TTL_S: float = 60.0
+
+    # Статистика по времени (app/services/stats_buckets.py). Сроки хранения бакетов
+    # в днях, 0 — хранить всегда; часовые нужны только для краёв окна from..to
+    STATS_HOURLY_RETENTION_DAYS: int = 14
+    STATS_DAILY_RETENTION_DAYS: int = 0
+    # На сколько дней вперёд держать готовые секции и как часто их обслуживать
+    STATS_BUCKET_PARTITIONS_AHEAD_DAYS: int = 7
+    STATS_BUCKET_MAINTENANCE_INTERVAL_S: float = 3600
+    # Начало текущего сезона для window=season, например 2026-09-01T00:00:00Z
+    STATS_SEASON_START: datetime | None = None
+
+    # Условные GET: ETag у GET /stats/{user_id} — из версии строки, у GET /stats — из версии доски
+    # сервера в server_player_counts (STATS_LEADERBOARD_ETAG=false — без ETag у лидерборда).
+    # STATS_LEADERBOARD_MAX_AGE_S > 0 — Cache-Control: public, max-age для страниц лидерборда
+    # (их кэширует CDN), 0 — no-cache
+    STATS_LEADERBOARD_ETAG: bool = True
+    STATS_LEADERBOARD_MAX_AGE_S: int = 0
+
+    # Живой лидерборд (GET /stats/live, WS /stats/live/ws): период пересчёта досок с записями,
+    # пересчёт без записей этого процесса (записи других воркеров видны не позже),
+    # сообщений в очереди подписчика до сброса на снимок и пинг SSE
+    STATS_LIVE_TICK_MS: int = 1000
+    STATS_LIVE_RESYNC_S: float = 5.0
+    STATS_LIVE_QUEUE_SIZE: int = 8
+    STATS_LIVE_PING_S: float = 15.0
+
+    # Период пересборки снимков лидерборда, 0 — снимки не строятся
+    LEADERBOARD_SNAPSHOT_INTERVAL_S: float = 0
 
     @property
     def database_url(self) -> str:
@@ -21,6 +133,11 @@ class Settings(BaseSettings):
             f"{self.POSTGRES_DB}"
         )
 
+    # Тот же Postgres через asyncpg — для AsyncSession в HTTP-маршрутах
+    @property
+    def async_database_url(self) -> str:
+        return self.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
     class Config:
         env_file = ".env"
 
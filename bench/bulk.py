@@ -0,0 +1,122 @@
+"""Выгрузка и загрузка player_stats: пропускная способность на --rows строк одного сервера.
+
+Замеряются StatsService.export_stats (psycopg2, путь python -m app.bulk) и
+AsyncStatsService.export_stats (asyncpg, путь GET /stats/export) в каждом формате —
+строки в секунду, мегабайты в секунду и пиковая память процесса. Затем выгрузка загружается
+обратно: на новый сервер (все строки — вставки) и поверх себя же (слияние без изменений).
+
+    python -m bench.bulk --rows 10000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import PlayerStats
+from app.services.async_stats_service import AsyncStatsService
+from app.services.constants import BULK_FORMATS
+from app.services.stats_service import StatsService
+from bench.common import drop_server, drop_servers, prepare_schema, seed_servers
+
+# seed_servers называет серверы "<prefix>-<i>" и не держит строки в памяти
+PREFIX = "bench-bulk"
+SERVER_NAME = f"{PREFIX}-0"
+COPY_SERVER_NAME = f"{PREFIX}-copy"
+
+
+def _peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _report(rows: int, size: int, elapsed: float) -> dict:
+    return {
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(rows / elapsed),
+        "mb_per_s": round(size / elapsed / 1e6, 1),
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+
+def export_sync(fmt: str, path: str, rows: int) -> dict:
+    started = time.perf_counter()
+    with SessionLocal() as db, open(path, "wb") as out:
+        StatsService.export_stats(db, SERVER_NAME, fmt, out)
+    return _report(rows, os.path.getsize(path), time.perf_counter() - started)
+
+
+async def _export_async(fmt: str) -> int:
+    size = 0
+    async with AsyncSessionLocal() as db:
+        async for chunk in AsyncStatsService.export_stats(db, SERVER_NAME, fmt):
+            size += len(chunk)
+    # Соединения пула привязаны к event loop, а следующий asyncio.run — новый loop
+    await async_engine.dispose()
+    return size
+
+
+def export_async(fmt: str, rows: int) -> dict:
+    started = time.perf_counter()
+    size = asyncio.run(_export_async(fmt))
+    return _report(rows, size, time.perf_counter() - started)
+
+
+def import_file(fmt: str, path: str, rows: int) -> dict:
+    started = time.perf_counter()
+    with SessionLocal() as db, open(path, "rb") as source:
+        result = StatsService.import_stats(db, source, fmt)
+    return {**_report(rows, os.path.getsize(path), time.perf_counter() - started), **result}
+
+
+# Та же выгрузка с другим именем сервера — чтобы загрузка вставляла, а не сливала
+def _renamed(path: str, fmt: str) -> str:
+    renamed = f"{path}.copy"
+    old, new = (f",{SERVER_NAME},", f",{COPY_SERVER_NAME},") if fmt == "csv" else (
+        f'"server_name":"{SERVER_NAME}"', f'"server_name":"{COPY_SERVER_NAME}"'
+    )
+    with open(path, encoding="utf-8") as src, open(renamed, "w", encoding="utf-8") as dst:
+        for line in src:
+            dst.write(line.replace(old, new, 1))
+    return renamed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--keep", action="store_true", help="не удалять игроков после прогона")
+    args = parser.parse_args()
+
+    prepare_schema()
+    with SessionLocal() as db:
+        existing = db.scalar(select(func.count()).where(PlayerStats.server_name == SERVER_NAME))
+    if existing != args.rows:
+        drop_servers(PREFIX)
+        seed_servers(PREFIX, 1, args.rows)
+    drop_server(COPY_SERVER_NAME)
+
+    report = {"rows": args.rows, "export_sync": {}, "export_async": {}, "import_insert": {}, "import_unchanged": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in BULK_FORMATS:
+            path = os.path.join(tmp, f"player_stats.{fmt}")
+            report["export_sync"][fmt] = export_sync(fmt, path, args.rows)
+            report["export_async"][fmt] = export_async(fmt, args.rows)
+
+            renamed = _renamed(path, fmt)
+            report["import_insert"][fmt] = import_file(fmt, renamed, args.rows)
+            os.remove(renamed)
+            report["import_unchanged"][fmt] = import_file(fmt, path, args.rows)
+            drop_server(COPY_SERVER_NAME)
+            os.remove(path)
+
+    if not args.keep:
+        drop_servers(PREFIX)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import io
+import itertools
+import random
+import statistics
+import time
+from concurrent import futures
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete
+
+from app.database import SessionLocal, engine
+from app.migrations import apply_migrations
+from app.models import PlayerStats, PlayerStatsDaily, PlayerStatsHourly
+
+
+# Общие помощники для бенчмарков: подготовка данных и сводка по латентности.
+# Бенчмарки пишут в ту базу, что указана в .env — запускать только на одноразовом Postgres.
+
+def prepare_schema():
+    apply_migrations(engine)
+
+
+# COPY вместо INSERT: миллион строк заливается за секунды
+def seed_players(server_name: str, count: int, max_score: int = 0) -> list:
+    rng = random.Random(server_name)
+    user_ids = [uuid4() for _ in range(count)]
+
+    buf = io.StringIO()
+    for user_id in user_ids:
+        buf.write(
+            f"{user_id}\t{server_name}\t{rng.randint(0, max_score)}\t"
+            f"{rng.randint(0, max_score)}\t{rng.randint(0, max_score)}\n"
+        )
+    buf.seek(0)
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            # Засев — не «сегодняшняя игра»: в бакеты статистики по времени не пишем
+            cur.execute("SET LOCAL stats.skip_buckets = on")
+            cur.copy_expert(
+                "COPY player_stats (user_id, server_name, time_played, kills, deaths) FROM STDIN",
+                buf
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return user_ids
+
+
+# user_id игрока i на сервере server_index вычисляется, а не хранится:
+# при 10M строк список UUID в памяти генератора нагрузки не нужен
+def player_id(server_index: int, i: int) -> UUID:
+    return UUID(int=(0xBE7C << 112) | (server_index << 48) | i)
+
+
+# Построчный источник для COPY: строки генерируются по мере чтения, а не собираются в памяти
+class _CopySource(io.RawIOBase):
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = "".join(itertools.islice(self._lines, 1000))
+            if not chunk:
+                break
+            self._buffer += chunk.encode()
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+# rows строк поровну на servers серверов с именами "<prefix>-<i>"
+def seed_servers(prefix: str, servers: int, rows: int, max_score: int = 1000) -> list[str]:
+    rng = random.Random(prefix)
+    names = [f"{prefix}-{i}" for i in range(servers)]
+    per_server = rows // servers
+
+    def lines():
+        for server_index, server_name in enumerate(names):
+            for i in range(per_server):
+                yield (
+                    f"{player_id(server_index, i)}\t{server_name}\t{rng.randint(0, max_score)}\t"
+                    f"{rng.randint(0, max_score)}\t{rng.randint(0, max_score)}\n"
+                )
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            # Засев — не «сегодняшняя игра»: в бакеты статистики по времени не пишем
+            cur.execute("SET LOCAL stats.skip_buckets = on")
+            cur.copy_expert(
+                "COPY player_stats (user_id, server_name, time_played, kills, deaths) FROM STDIN",
+                _CopySource(lines()),
+                size=1 << 20
+            )
+            cur.execute("ANALYZE player_stats")
+        conn.commit()
+    finally:
+        conn.close()
+    return names
+
+
+def drop_servers(prefix: str):
+    db = SessionLocal()
+    try:
+        for model in (PlayerStats, PlayerStatsHourly, PlayerStatsDaily):
+            db.execute(delete(model).where(model.server_name.like(f"{prefix}-%")))
+        db.commit()
+    finally:
+        db.close()
+
+
+def drop_server(server_name: str):
+    db = SessionLocal()
+    try:
+        for model in (PlayerStats, PlayerStatsHourly, PlayerStatsDaily):
+            db.execute(delete(model).where(model.server_name == server_name))
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_concurrently(fn, calls: int, concurrency: int) -> dict:
+    latencies = []
+
+    def timed(i):
+        started = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(calls)))
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed)
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+    return {
+        "calls": len(ordered),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3)
+    }
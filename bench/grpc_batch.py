@@ -0,0 +1,89 @@
+"""Конец матча через gRPC: N унарных UpdateStats против BatchUpdateStats и StreamUpdateStats.
+
+Сервер поднимается в этом же процессе на свободном порту.
+
+    python -m bench.grpc_batch --players 64 --matches 200
+"""
+import argparse
+import json
+import time
+from concurrent import futures
+
+import grpc
+
+import app.grpc.stats_pb2 as pb2
+import app.grpc.stats_pb2_grpc as pb2_grpc
+from app.grpc.server import StatsGrpcService
+from bench.common import drop_server, prepare_schema, seed_players, summarize
+
+SERVER_NAME = "bench-grpc-batch"
+
+
+def start_server():
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    pb2_grpc.add_StatsServiceServicer_to_server(StatsGrpcService(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, port
+
+
+def run(report_match, matches: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(matches):
+        call_started = time.perf_counter()
+        report_match()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=64)
+    parser.add_argument("--matches", type=int, default=200)
+    args = parser.parse_args()
+
+    prepare_schema()
+    drop_server(SERVER_NAME)
+    user_ids = seed_players(SERVER_NAME, args.players)
+    requests = [
+        pb2.UpdateStatsRequest(
+            user_id=str(user_id),
+            server_name=SERVER_NAME,
+            time_played=600,
+            kills=3,
+            deaths=2
+        ) for user_id in user_ids
+    ]
+
+    server, port = start_server()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    stub = pb2_grpc.StatsServiceStub(channel)
+
+    def unary():
+        for request in requests:
+            stub.UpdateStats(request)
+
+    def batch():
+        stub.BatchUpdateStats(pb2.BatchUpdateStatsRequest(items=requests))
+
+    def stream():
+        stub.StreamUpdateStats(iter(requests))
+
+    try:
+        report = {
+            name: run(fn, args.matches)
+            for name, fn in (("unary", unary), ("batch", batch), ("stream", stream))
+        }
+        for result in report.values():
+            result["rows_per_s"] = round(result["rps"] * args.players, 1)
+    finally:
+        channel.close()
+        server.stop(None)
+        drop_server(SERVER_NAME)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
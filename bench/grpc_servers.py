@@ -0,0 +1,137 @@
+"""gRPC: сервер на пуле потоков (psycopg2) против grpc.aio (asyncpg) при одинаковом числе соединений.
+
+Каждый сервер поднимается в отдельном процессе, кэш чтений выключен. Нагрузка — grpc.aio-клиент:
+--connections каналов (отдельные HTTP/2-соединения), --concurrency RPC в полёте на все каналы,
+доля UpdateStats — --write-ratio, остальное GetStats.
+
+    python -m bench.grpc_servers --requests 20000 --concurrency 256 --connections 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import grpc
+
+import app.grpc.stats_pb2 as pb2
+import app.grpc.stats_pb2_grpc as pb2_grpc
+from bench.common import drop_server, prepare_schema, seed_players, summarize
+
+SERVER_NAME = "bench-grpc-servers"
+PORT = 18051
+
+
+def start_server(mode: str, max_workers: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        GRPC_SERVER_MODE=mode,
+        GRPC_HOST="127.0.0.1",
+        GRPC_PORT=str(PORT),
+        GRPC_REUSE_PORT="false",
+        GRPC_MAX_WORKERS=str(max_workers),
+        STATS_CACHE_SIZE="0"
+    )
+    server = subprocess.Popen([sys.executable, "-m", "bench.grpc_servers", "--serve", mode], env=env)
+
+    channel = grpc.insecure_channel(f"127.0.0.1:{PORT}")
+    try:
+        grpc.channel_ready_future(channel).result(timeout=30)
+    except grpc.FutureTimeoutError:
+        server.terminate()
+        raise SystemExit(f"gRPC-сервер {mode} не поднялся")
+    finally:
+        channel.close()
+    return server
+
+
+def serve(mode: str):
+    if mode == "aio":
+        from app.grpc.aio_server import run
+        run()
+    else:
+        from app.grpc.server import serve as serve_thread
+        serve_thread()
+
+
+async def drive(user_ids: list, requests: int, concurrency: int, connections: int, write_ratio: float) -> dict:
+    latencies = []
+    errors = {}
+    queue = iter(range(requests))
+    # Отдельный пул сабканалов — иначе каналы с одинаковым адресом делят одно соединение
+    channels = [
+        grpc.aio.insecure_channel(f"127.0.0.1:{PORT}", options=[("grpc.use_local_subchannel_pool", 1)])
+        for _ in range(connections)
+    ]
+    stubs = [pb2_grpc.StatsServiceStub(channel) for channel in channels]
+
+    async def worker(stub):
+        rng = random.Random()
+        for _ in queue:
+            user_id = str(rng.choice(user_ids))
+            started = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    await stub.UpdateStats(pb2.UpdateStatsRequest(
+                        user_id=user_id, server_name=SERVER_NAME, time_played=60, kills=1, deaths=1
+                    ))
+                else:
+                    await stub.GetStats(pb2.GetStatsRequest(user_id=user_id, server_name=SERVER_NAME))
+            except grpc.aio.AioRpcError as exc:
+                errors[exc.code().name] = errors.get(exc.code().name, 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(stubs[i % connections]) for i in range(concurrency)))
+        report = summarize(latencies, time.perf_counter() - started)
+    finally:
+        for channel in channels:
+            await channel.close()
+
+    report["errors"] = errors
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", choices=("thread", "aio"), help=argparse.SUPPRESS)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--write-ratio", type=float, default=0.5)
+    parser.add_argument("--max-workers", type=int, default=10, help="GRPC_MAX_WORKERS для thread-сервера")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    prepare_schema()
+    drop_server(SERVER_NAME)
+    user_ids = seed_players(SERVER_NAME, args.players, max_score=1000)
+
+    report = {}
+    try:
+        for mode in ("thread", "aio"):
+            server = start_server(mode, args.max_workers)
+            try:
+                report[mode] = asyncio.run(drive(
+                    user_ids, args.requests, args.concurrency, args.connections, args.write_ratio
+                ))
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        drop_server(SERVER_NAME)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""HTTP: sync-маршрут (threadpool + psycopg2) против async-маршрута (AsyncSession + asyncpg).
+
+Оба маршрута читают GET /stats/{user_id} через соответствующий сервис при выключенном кэше.
+Приложение поднимается uvicorn в отдельном процессе, нагрузка — httpx с фиксированной конкурентностью.
+
+    python -m bench.http_stacks --requests 20000 --concurrency 256
+"""
+import os
+
+os.environ.setdefault("STATS_CACHE_SIZE", "0")
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from uuid import UUID
+
+import httpx
+from fastapi import FastAPI
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.services.async_stats_service import AsyncStatsService
+from app.services.stats_service import StatsService
+from bench.common import drop_server, prepare_schema, seed_players, summarize
+
+SERVER_NAME = "bench-http-stacks"
+PORT = 18080
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/sync/{user_id}")
+def sync_get_stats(user_id: UUID):
+    db = SessionLocal()
+    try:
+        return StatsService.get_stats(db, user_id, SERVER_NAME)
+    finally:
+        db.close()
+
+
+@bench_app.get("/async/{user_id}")
+async def async_get_stats(user_id: UUID):
+    async with AsyncSessionLocal() as db:
+        return await AsyncStatsService.get_stats(db, user_id, SERVER_NAME)
+
+
+def start_server() -> subprocess.Popen:
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "bench.http_stacks:bench_app",
+        "--host", "127.0.0.1", "--port", str(PORT), "--log-level", "warning"
+    ])
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/docs").raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("uvicorn не поднялся")
+
+
+async def drive(prefix: str, user_ids: list, requests: int, concurrency: int) -> dict:
+    latencies = []
+    queue = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits) as client:
+        async def worker():
+            for _ in queue:
+                user_id = random.choice(user_ids)
+                started = time.perf_counter()
+                response = await client.get(f"/{prefix}/{user_id}")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    args = parser.parse_args()
+
+    prepare_schema()
+    drop_server(SERVER_NAME)
+    user_ids = seed_players(SERVER_NAME, args.players, max_score=1000)
+    server = start_server()
+
+    try:
+        report = {
+            stack: asyncio.run(drive(stack, user_ids, args.requests, args.concurrency))
+            for stack in ("sync", "async")
+        }
+    finally:
+        server.terminate()
+        server.wait()
+        drop_server(SERVER_NAME)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Инкременты статистики: read-modify-write против атомарного UPDATE.
+
+Все потоки бьют в одну строку (user_id, server_name), после прогона
+проверяется, что сумма kills совпадает с числом вызовов.
+
+    python -m bench.increments --calls 5000 --concurrency 32
+"""
+import argparse
+import json
+
+from app.database import SessionLocal
+from app.models import PlayerStats
+from app.services.stats_service import StatsService
+from bench.common import drop_server, prepare_schema, run_concurrently, seed_players
+
+SERVER_NAME = "bench-increments"
+
+
+# Старый путь: SELECT ... first(), сложение в Python и commit
+def legacy_update(db, user_id, server_name, time_played, kills, deaths):
+    stats = db.query(PlayerStats).filter_by(
+        user_id=user_id,
+        server_name=server_name
+    ).first()
+    stats.time_played += time_played
+    stats.kills += kills
+    stats.deaths += deaths
+    db.commit()
+
+
+def run(update, user_id, calls: int, concurrency: int) -> dict:
+    def call(_):
+        db = SessionLocal()
+        try:
+            update(db, user_id, SERVER_NAME, 1, 1, 0)
+        finally:
+            db.close()
+
+    result = run_concurrently(call, calls, concurrency)
+
+    db = SessionLocal()
+    try:
+        kills = db.query(PlayerStats.kills).filter_by(
+            user_id=user_id,
+            server_name=SERVER_NAME
+        ).scalar()
+    finally:
+        db.close()
+
+    result["expected_kills"] = calls
+    result["actual_kills"] = kills
+    result["lost_updates"] = calls - kills
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    prepare_schema()
+    report = {}
+    for name, update in (("read_modify_write", legacy_update), ("atomic", StatsService.update_stats)):
+        drop_server(SERVER_NAME)
+        [user_id] = seed_players(SERVER_NAME, 1)
+        report[name] = run(update, user_id, args.calls, args.concurrency)
+    drop_server(SERVER_NAME)
+
+    print(json.dumps(report, indent=2))
+    if report["atomic"]["lost_updates"]:
+        raise SystemExit("atomic path lost updates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Живой лидерборд: --subscribers одновременных SSE-подписок на один (server_name, sort, top).
+
+Поднимает сервис через app.launcher, открывает подписки на GET /stats/live и раз в
+--interval секунд выводит нового игрока на первое место через PATCH /stats/{user_id}.
+Замеряются время подключения всех подписчиков (до первого snapshot), задержка
+от отправки PATCH до diff у каждого подписчика (p50/p95/p99), число сообщений по типам,
+повторные snapshot (переполнение очереди подписчика) и пропущенные обновления.
+
+На 10k подписок генератору нужен лимит открытых файлов выше стандартного:
+
+    ulimit -n 65536
+    python -m bench.live --subscribers 10000 --updates 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from argparse import Namespace
+
+import httpx
+import orjson
+
+from app.services.constants import LIVE_TOP_MAX
+from bench.common import drop_server, prepare_schema, seed_players, summarize
+from bench.suite import start_service
+
+SERVER_NAME = "bench-live"
+SORT = "kills"
+# Прибавка к kills, после которой игрок точно первый: у засеянных игроков не больше 1000
+LEAD = 1_000_000
+
+
+class Subscriber:
+
+    def __init__(self):
+        self.connected = asyncio.Event()
+        self.seen: dict[int, float] = {}
+        self.messages = {"snapshot": 0, "diff": 0}
+
+    async def run(self, http: httpx.AsyncClient, top: int):
+        params = {"server_name": SERVER_NAME, "sort": SORT, "top": top}
+        async with http.stream("GET", "/stats/live", params=params) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                message = orjson.loads(line[6:])
+                self.messages[message["type"]] += 1
+                items = message["items"] if message["type"] == "snapshot" else message["changed"]
+                received = time.perf_counter()
+                for item in items:
+                    if item["rank"] == 1:
+                        self.seen.setdefault(item["value"], received)
+                self.connected.set()
+
+
+async def run(args, user_ids: list) -> dict:
+    limits = httpx.Limits(max_connections=args.subscribers + 16, max_keepalive_connections=16)
+    timeout = httpx.Timeout(60, read=None)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{args.http_port}", limits=limits, timeout=timeout
+    ) as http:
+        subscribers = [Subscriber() for _ in range(args.subscribers)]
+        started = time.perf_counter()
+        gate = asyncio.Semaphore(args.connect_concurrency)
+
+        async def subscribe(subscriber: Subscriber):
+            async with gate:
+                task = asyncio.create_task(subscriber.run(http, args.top))
+                connected = asyncio.create_task(subscriber.connected.wait())
+                await asyncio.wait({task, connected}, return_when=asyncio.FIRST_COMPLETED)
+                if task.done():
+                    connected.cancel()
+                    task.result()
+                    raise SystemExit("подписка закрылась до первого snapshot")
+            return task
+
+        tasks = await asyncio.gather(*(subscribe(s) for s in subscribers))
+        connect_seconds = time.perf_counter() - started
+
+        # Обновление i выводит игрока i на первое место со значением kills, известным заранее
+        sent: dict[int, float] = {}
+        for i in range(args.updates):
+            patched_at = time.perf_counter()
+            response = await http.patch(
+                f"/stats/{user_ids[i]}",
+                params={"server_name": SERVER_NAME},
+                json={"time_played": 0, "kills": LEAD * (i + 1), "deaths": 0}
+            )
+            response.raise_for_status()
+            value = (await http.get(f"/stats/{user_ids[i]}", params={"server_name": SERVER_NAME})).json()
+            sent[value["data"]["kills"]] = patched_at
+            await asyncio.sleep(args.interval)
+        await asyncio.sleep(args.drain)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = []
+    missed = 0
+    for subscriber in subscribers:
+        for value, sent_at in sent.items():
+            received = subscriber.seen.get(value)
+            if received is None:
+                missed += 1
+            else:
+                latencies.append(max(0.0, received - sent_at))
+
+    return {
+        "connect_seconds": round(connect_seconds, 3),
+        "push_latency": summarize(latencies, args.updates * args.interval) if latencies else {"calls": 0},
+        "missed_updates": missed,
+        "messages": {
+            kind: sum(s.messages[kind] for s in subscribers) for kind in ("snapshot", "diff")
+        },
+        # Больше одного snapshot — очередь подписчика переполнялась и diff были заменены снимком
+        "resyncs": sum(max(0, s.messages["snapshot"] - 1) for s in subscribers)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--top", type=int, default=20, choices=range(1, LIVE_TOP_MAX + 1), metavar="TOP")
+    parser.add_argument("--updates", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=1.0, help="секунд между обновлениями")
+    parser.add_argument("--drain", type=float, default=3.0, help="сколько ждать последних diff")
+    parser.add_argument("--connect-concurrency", type=int, default=500)
+    parser.add_argument("--tick-ms", type=int, default=200)
+    parser.add_argument("--http-port", type=int, default=18110)
+    parser.add_argument("--grpc-port", type=int, default=18111)
+    args = parser.parse_args()
+
+    prepare_schema()
+    drop_server(SERVER_NAME)
+    user_ids = seed_players(SERVER_NAME, max(args.players, args.updates), max_score=1000)
+
+    # Один HTTP-воркер: записи другого воркера живой лидерборд видит только через STATS_LIVE_RESYNC_S
+    os.environ["STATS_LIVE_TICK_MS"] = str(args.tick_ms)
+    service = start_service(Namespace(
+        http_port=args.http_port,
+        http_workers=1,
+        grpc_port=args.grpc_port,
+        grpc_processes=1,
+        grpc_mode="thread"
+    ))
+    try:
+        results = asyncio.run(run(args, user_ids))
+    finally:
+        service.terminate()
+        service.wait()
+        drop_server(SERVER_NAME)
+
+    print(json.dumps({
+        "subscribers": args.subscribers,
+        "top": args.top,
+        "updates": args.updates,
+        "tick_ms": args.tick_ms,
+        **results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Цена инструментирования: те же операции с метриками и без.
+
+* http — запрос к пустому маршруту через ASGI-транспорт httpx, с MetricsMiddleware и без
+* sql — SELECT 1 на одном соединении, с хуками before/after_cursor_execute и без
+* grpc — вызов обработчика через MetricsInterceptor и напрямую (без сети)
+
+    python -m bench.metrics_overhead --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import grpc
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from app.database import _time_statements
+from app.grpc.interceptors import MetricsInterceptor
+from app.middleware import MetricsMiddleware
+from app.responses import ORJSONResponse
+from app.settings import settings
+
+
+def per_op_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def compare(plain_us: float, instrumented_us: float) -> dict:
+    return {
+        "plain_us": round(plain_us, 2),
+        "instrumented_us": round(instrumented_us, 2),
+        "overhead_us": round(instrumented_us - plain_us, 2),
+        "overhead_pct": round((instrumented_us / plain_us - 1) * 100, 1)
+    }
+
+
+def http_app(instrumented: bool) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/ping/{user_id}")
+    async def ping(user_id: str):
+        return {"user_id": user_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def http_per_op_us(app: FastAPI, iterations: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/ping/warmup")
+        started = time.perf_counter()
+        for i in range(iterations):
+            await client.get(f"/ping/{i}")
+        return (time.perf_counter() - started) / iterations * 1e6
+
+
+def bench_http(iterations: int) -> dict:
+    return compare(
+        asyncio.run(http_per_op_us(http_app(False), iterations)),
+        asyncio.run(http_per_op_us(http_app(True), iterations))
+    )
+
+
+def bench_sql(iterations: int) -> dict:
+    results = []
+    for instrumented in (False, True):
+        engine = create_engine(settings.database_url, pool_size=1)
+        if instrumented:
+            _time_statements(engine, "bench")
+        with engine.connect() as conn:
+            stmt = text("SELECT 1")
+            conn.execute(stmt)
+            results.append(per_op_us(lambda: conn.execute(stmt).scalar(), iterations))
+        engine.dispose()
+    return compare(*results)
+
+
+class _Context:
+    def code(self):
+        return None
+
+
+class _Details:
+    method = "/stats.StatsService/GetStats"
+
+
+def bench_grpc(iterations: int) -> dict:
+    def behavior(request, context):
+        return request
+
+    handler = grpc.unary_unary_rpc_method_handler(behavior)
+    wrapped = MetricsInterceptor().intercept_service(lambda details: handler, _Details()).unary_unary
+    context = _Context()
+
+    return compare(
+        per_op_us(lambda: behavior(None, context), iterations),
+        per_op_us(lambda: wrapped(None, context), iterations)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--skip-sql", action="store_true", help="без базы данных")
+    args = parser.parse_args()
+
+    report = {
+        "http": bench_http(args.iterations),
+        "grpc": bench_grpc(args.iterations)
+    }
+    if not args.skip_sql:
+        report["sql"] = bench_sql(args.iterations)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
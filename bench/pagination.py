@@ -0,0 +1,78 @@
+"""Лидерборд: OFFSET против курсора на первой и глубокой странице.
+
+    python -m bench.pagination --rows 1000000 --page-size 25 --deep-page 40000
+"""
+import argparse
+import json
+import time
+
+from app.database import SessionLocal
+from app.models import PlayerStats
+from app.services.constants import PAGE_NEXT
+from app.services.pagination import encode_cursor
+from app.services.stats_service import StatsService
+from bench.common import drop_server, prepare_schema, seed_players, summarize
+
+SERVER_NAME = "bench-pagination"
+SORT = "kills"
+
+
+# Курсор, указывающий на конец страницы page - 1 (сама подготовка не замеряется)
+def cursor_for_page(db, page: int, page_size: int) -> str | None:
+    if page == 1:
+        return None
+    row = db.query(PlayerStats).filter_by(server_name=SERVER_NAME).order_by(
+        PlayerStats.kills.desc(),
+        PlayerStats.user_id.desc()
+    ).offset((page - 1) * page_size - 1).first()
+    return encode_cursor(SORT, row.kills, row.user_id, PAGE_NEXT)
+
+
+def run(page: int, page_size: int, cursor: str | None, repeats: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeats):
+        db = SessionLocal()
+        try:
+            call_started = time.perf_counter()
+            StatsService.get_top_stats(db, SERVER_NAME, SORT, page, page_size, cursor)
+            latencies.append(time.perf_counter() - call_started)
+        finally:
+            db.close()
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--deep-page", type=int, default=40_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="не удалять данные после прогона")
+    args = parser.parse_args()
+
+    prepare_schema()
+    drop_server(SERVER_NAME)
+    seed_players(SERVER_NAME, args.rows, max_score=10_000)
+
+    report = {}
+    try:
+        for page in (1, args.deep_page):
+            db = SessionLocal()
+            try:
+                cursor = cursor_for_page(db, page, args.page_size)
+            finally:
+                db.close()
+            report[f"page_{page}"] = {
+                "offset": run(page, args.page_size, None, args.repeats),
+                "cursor": run(page, args.page_size, cursor, args.repeats)
+            }
+    finally:
+        if not args.keep:
+            drop_server(SERVER_NAME)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
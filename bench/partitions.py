@@ -0,0 +1,141 @@
+"""player_stats одной таблицей и секциями по server_name: --servers серверов по --players игроков.
+
+Засевает --servers × --players строк (по умолчанию 100 × 100k = 10M) в обычную player_stats
+и меряет запросы чтения (те же, что у GET /stats/top и GET /stats/{user_id}) на случайных серверах:
+первая страница лидерборда, страница --deep-page и строка игрока. Затем секционирует таблицу
+(ServerPartitionService.enable), выносит каждый сервер в свою секцию (create) и повторяет замеры;
+EXPLAIN страницы лидерборда показывает, сколько секций читается. Конец сезона одного сервера
+на --players игроков: DELETE из общей таблицы против detach --drop.
+
+После прогона player_stats остаётся секционированной — только одноразовый Postgres.
+
+    python -m bench.partitions --servers 100 --players 100000
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects import postgresql
+
+from app.database import SessionLocal, engine
+from app.models import PlayerStats
+from app.services import queries
+from app.services.server_partitions import ServerPartitionService, is_partitioned
+from bench.common import drop_server, player_id, prepare_schema, seed_players, seed_servers, summarize
+
+PREFIX = "bench-part"
+WIPE_SERVER = f"{PREFIX}-wipe"
+SORT = "kills"
+
+_SCANNED_RE = re.compile(r" on (player_stats\w*)")
+
+
+def analyze():
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE player_stats"))
+        conn.commit()
+
+
+def measure(args, servers: list[str]) -> dict:
+    rng = random.Random(0)
+    picks = [(rng.randrange(len(servers)), rng.randrange(args.players)) for _ in range(args.lookups)]
+    statements = {
+        "top": lambda s, i: queries.top_stats_query(servers[s], SORT, 1, args.page_size, None)[0],
+        "deep": lambda s, i: queries.top_stats_query(servers[s], SORT, args.deep_page, args.page_size, None)[0],
+        "get": lambda s, i: queries.select_stats(player_id(s, i), servers[s])
+    }
+
+    results = {}
+    with SessionLocal() as db:
+        for name, build in statements.items():
+            latencies = []
+            started = time.perf_counter()
+            for server_index, i in picks:
+                call_started = time.perf_counter()
+                db.scalars(build(server_index, i)).all()
+                latencies.append(time.perf_counter() - call_started)
+            results[name] = summarize(latencies, time.perf_counter() - started)
+            db.rollback()
+
+        stmt = statements["top"](0, 0).compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        plan = "\n".join(db.scalars(text(f"EXPLAIN {stmt}")).all())
+        results["tables_in_plan"] = sorted(set(_SCANNED_RE.findall(plan)))
+    return results
+
+
+def wipe_shared(players: int) -> float:
+    seed_players(WIPE_SERVER, players)
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        db.execute(delete(PlayerStats).where(PlayerStats.server_name == WIPE_SERVER))
+        db.commit()
+        return time.perf_counter() - started
+
+
+def wipe_partitioned(players: int) -> float:
+    seed_players(WIPE_SERVER, players)
+    with SessionLocal() as db:
+        ServerPartitionService.create(db, WIPE_SERVER)
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        ServerPartitionService.detach(db, WIPE_SERVER, drop=True)
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", type=int, default=100)
+    parser.add_argument("--players", type=int, default=100_000, help="игроков на сервер")
+    parser.add_argument("--lookups", type=int, default=2000, help="запросов каждого вида")
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--deep-page", type=int, default=2000)
+    args = parser.parse_args()
+
+    prepare_schema()
+    with SessionLocal() as db:
+        if is_partitioned(db):
+            raise SystemExit("player_stats уже секционирована — нужен одноразовый Postgres без секций")
+    drop_server(WIPE_SERVER)
+
+    started = time.perf_counter()
+    servers = seed_servers(PREFIX, args.servers, args.servers * args.players)
+    seed_seconds = time.perf_counter() - started
+
+    shared = measure(args, servers)
+    shared["season_wipe_s"] = round(wipe_shared(args.players), 3)
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        ServerPartitionService.enable(db)
+        enable_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for server_name in servers:
+        with SessionLocal() as db:
+            ServerPartitionService.create(db, server_name)
+    create_seconds = time.perf_counter() - started
+    analyze()
+
+    partitioned = measure(args, servers)
+    partitioned["season_wipe_s"] = round(wipe_partitioned(args.players), 3)
+
+    for server_name in servers:
+        with SessionLocal() as db:
+            ServerPartitionService.detach(db, server_name, drop=True)
+
+    print(json.dumps({
+        "servers": args.servers,
+        "players_per_server": args.players,
+        "seed_seconds": round(seed_seconds, 1),
+        "enable_seconds": round(enable_seconds, 3),
+        "create_all_partitions_seconds": round(create_seconds, 1),
+        "shared_table": shared,
+        "partitioned": partitioned
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
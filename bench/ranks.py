@@ -0,0 +1,97 @@
+"""Место игрока: индекс в памяти против COUNT(*) в БД на сервере с --rows игроков.
+
+Замеряются StatsService.get_rank с готовой доской (index), тот же вызов с выключенным
+индексом (db: COUNT по индексу лидерборда, цена растёт с глубиной места), сборка доски
+и применение записей к ней (apply). Игроки выбираются случайно — в среднем середина сервера.
+
+    python -m bench.ranks --rows 1000000 --lookups 2000
+"""
+import argparse
+import json
+import random
+import time
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import PlayerStats
+from app.services.rank_index import rank_index
+from app.services.stats_service import StatsService
+from bench.common import drop_server, prepare_schema, seed_players, summarize
+
+SERVER_NAME = "bench-ranks"
+SORT = "kills"
+
+
+def lookups(user_ids: list[UUID], count: int) -> dict:
+    rng = random.Random(0)
+    latencies = []
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        for _ in range(count):
+            call_started = time.perf_counter()
+            StatsService.get_rank(db, rng.choice(user_ids), SERVER_NAME, SORT)
+            latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def wait_for_board(timeout_s: float = 600) -> float:
+    started = time.perf_counter()
+    while rank_index.rank(SERVER_NAME, SORT, 0, UUID(int=0)) is None:
+        if time.perf_counter() - started > timeout_s:
+            raise SystemExit("доска не собралась")
+        time.sleep(0.05)
+    return time.perf_counter() - started
+
+
+def apply_per_op_us(user_ids: list[UUID], count: int) -> float:
+    rng = random.Random(1)
+    changes = [
+        (user_id, SERVER_NAME, (0, rng.randrange(1000) + 1, 0), (0, 1, 0))
+        for user_id in (rng.choice(user_ids) for _ in range(count))
+    ]
+    started = time.perf_counter()
+    for change in changes:
+        rank_index.apply([change])
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--keep", action="store_true", help="не удалять игроков после прогона")
+    args = parser.parse_args()
+
+    prepare_schema()
+    with SessionLocal() as db:
+        user_ids = db.scalars(select(PlayerStats.user_id).where(PlayerStats.server_name == SERVER_NAME)).all()
+    if len(user_ids) != args.rows:
+        drop_server(SERVER_NAME)
+        user_ids = seed_players(SERVER_NAME, args.rows, max_score=1000)
+
+    if not rank_index.enabled:
+        raise SystemExit("индекс мест выключен: STATS_RANK_INDEX_MAX_BOARDS=0")
+
+    # Без досок: каждый запрос — COUNT в БД
+    rank_index.clear()
+    rank_index.enabled = False
+    db_report = lookups(user_ids, max(1, args.lookups // 10))
+    rank_index.enabled = True
+
+    report = {
+        "rows": args.rows,
+        "db": db_report,
+        "build_seconds": round(wait_for_board(), 3),
+        "index": lookups(user_ids, args.lookups),
+        "apply_per_op_us": round(apply_per_op_us(user_ids, args.lookups), 2)
+    }
+
+    if not args.keep:
+        drop_server(SERVER_NAME)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
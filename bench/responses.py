@@ -0,0 +1,114 @@
+"""Сборка и сериализация конверта ответа: прежний путь (JSONResponse + stdlib json,
+uuid4().hex, utcnow().isoformat()) против ORJSONResponse из app/responses.py.
+
+БД не нужна. Полезная нагрузка — одна строка статистики и страница лидерборда из 100 строк.
+
+    python -m bench.responses --iterations 20000
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+
+from app.codes import Codes
+from app.responses import success_pagination_response, success_response
+
+
+def legacy_success_response(message: str, code: Codes, data=None):
+    return JSONResponse(
+        status_code=200,
+        content={
+            "data": data,
+            "message": message,
+            "meta": {
+                "code": code,
+                "traceId": uuid.uuid4().hex,
+                "timestamp": datetime.utcnow().isoformat() + "Z"
+            }
+        }
+    )
+
+
+def legacy_success_pagination_response(message: str, code: Codes, data=None, pagination=None):
+    return JSONResponse(
+        status_code=200,
+        content={
+            "data": data,
+            "pagination": pagination,
+            "message": message,
+            "meta": {
+                "code": code,
+                "traceId": uuid.uuid4().hex,
+                "timestamp": datetime.utcnow().isoformat() + "Z"
+            }
+        }
+    )
+
+
+def stats_row(rng: random.Random) -> dict:
+    kills, deaths = rng.randint(0, 5000), rng.randint(0, 5000)
+    return {
+        "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "server_name": "bench",
+        "time_played": rng.randint(0, 10 ** 6),
+        "kills": kills,
+        "deaths": deaths,
+        "kd_ratio": round(kills / deaths if deaths else kills, 2)
+    }
+
+
+def measure(build, iterations: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        build()
+    elapsed = time.perf_counter() - started
+    return {
+        "us_per_response": round(elapsed / iterations * 1e6, 2),
+        "responses_per_s": round(iterations / elapsed, 1),
+        "bytes": len(build().body)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    row = stats_row(rng)
+    page = [stats_row(rng) for _ in range(100)]
+    pagination = {
+        "page": 1, "pageSize": 100, "total": 100_000, "totalPages": 1000,
+        "nextPage": 2, "prevPage": None, "nextCursor": None, "prevCursor": None
+    }
+
+    cases = {
+        "single_row": (
+            lambda: legacy_success_response("ok", Codes.STATS_FETCHED, row),
+            lambda: success_response("ok", Codes.STATS_FETCHED, row)
+        ),
+        "page_100": (
+            lambda: legacy_success_pagination_response("ok", Codes.STATS_LIST_FETCHED, page, pagination),
+            lambda: success_pagination_response("ok", Codes.STATS_LIST_FETCHED, page, pagination)
+        )
+    }
+
+    report = {}
+    for name, (legacy, current) in cases.items():
+        report[name] = {
+            "json": measure(legacy, args.iterations),
+            "orjson": measure(current, args.iterations)
+        }
+        report[name]["speedup"] = round(
+            report[name]["json"]["us_per_response"] / report[name]["orjson"]["us_per_response"], 2
+        )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Время старта пода: импорт app.main в чистом интерпретаторе и холодный запуск app.launcher.
+
+Импорт меряется --runs раз отдельным процессом; заодно проверяется, что HTTP-воркер
+не тянет grpc и сгенерированные стабы. Запуск — --runs раз python -m app.launcher
+до первого 200 на GET /live (процесс принимает соединения) и на GET /ready
+(схема сверена, секции бакетов есть, пул прогрет), затем SIGTERM и время остановки.
+
+Миграции применяются до замеров — меряется быстрый путь, когда схема уже актуальна.
+
+    python -m bench.startup --runs 10
+    python -m bench.startup --runs 10 --http-workers 4 --grpc-processes 2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.common import prepare_schema
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import app.main\n"
+    "print(time.perf_counter() - started, 'grpc' in sys.modules)\n"
+)
+
+
+def spread(values: list[float]) -> dict:
+    ordered = sorted(values)
+    return {
+        "runs": len(ordered),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 1)
+    }
+
+
+def measure_import(runs: int) -> dict:
+    seconds = []
+    grpc_loaded = False
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True
+        ).stdout.split()
+        seconds.append(float(out[0]))
+        grpc_loaded |= out[1] == "True"
+    return {**spread(seconds), "grpc_loaded": grpc_loaded}
+
+
+def wait_for(url: str, started: float, deadline: float) -> float:
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise SystemExit(f"{url} не ответил 200")
+
+
+def measure_launcher(args) -> dict:
+    env = dict(
+        os.environ,
+        APP_HOST="127.0.0.1",
+        APP_PORT=str(args.http_port),
+        HTTP_WORKERS=str(args.http_workers),
+        HTTP_ACCESS_LOG="false",
+        GRPC_ENABLED=str(args.grpc_processes > 0).lower(),
+        GRPC_IN_PROCESS="false",
+        GRPC_HOST="127.0.0.1",
+        GRPC_PORT=str(args.grpc_port),
+        GRPC_PROCESSES=str(args.grpc_processes)
+    )
+    base = f"http://127.0.0.1:{args.http_port}"
+    live, ready, stop = [], [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        service = subprocess.Popen([sys.executable, "-m", "app.launcher"], env=env)
+        try:
+            deadline = time.monotonic() + args.timeout
+            live.append(wait_for(f"{base}/live", started, deadline))
+            ready.append(wait_for(f"{base}/ready", started, deadline))
+        finally:
+            stopping = time.perf_counter()
+            service.terminate()
+            service.wait()
+            stop.append(time.perf_counter() - stopping)
+    return {"to_live": spread(live), "to_ready": spread(ready), "shutdown": spread(stop)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--http-workers", type=int, default=1)
+    parser.add_argument("--grpc-processes", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60, help="секунд на один запуск")
+    parser.add_argument("--http-port", type=int, default=18120)
+    parser.add_argument("--grpc-port", type=int, default=18121)
+    args = parser.parse_args()
+
+    prepare_schema()
+    print(json.dumps({
+        "http_workers": args.http_workers,
+        "grpc_processes": args.grpc_processes,
+        "import_app_main": measure_import(args.runs),
+        "launcher": measure_launcher(args)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
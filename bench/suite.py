@@ -0,0 +1,336 @@
+"""Нагрузочный прогон сервиса целиком: REST и gRPC через app.launcher, как в проде.
+
+Засевает player_stats (--rows строк поровну на --servers серверов), поднимает сервис
+в отдельном процессе и гоняет каждый сценарий --requests запросами при фиксированной
+--concurrency. Результат — JSON: конфигурация прогона, время засева и по каждому
+сценарию rps, p50/p95/p99 и число ошибок по кодам.
+
+Сценарии: rest_get, rest_leaderboard (первая страница), rest_leaderboard_deep (страница
+из середины сервера, OFFSET), rest_patch, rest_post, grpc_get, grpc_update.
+
+База — из .env или одноразовый контейнер (--docker-postgres, нужен docker):
+
+    python -m bench.suite --rows 1000000 --servers 100 --concurrency 64 --output bench.json
+    python -m bench.suite --docker-postgres --rows 10000000 --servers 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import grpc
+import httpx
+
+SCENARIOS = (
+    "rest_get",
+    "rest_leaderboard",
+    "rest_leaderboard_deep",
+    "grpc_get",
+    "rest_patch",
+    "grpc_update",
+    "rest_post"
+)
+PREFIX = "bench-suite"
+PAGE_SIZE = 100
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="строк player_stats, 1K..10M")
+    parser.add_argument("--servers", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=10_000, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--http-workers", type=int, default=1)
+    parser.add_argument("--grpc-processes", type=int, default=1)
+    parser.add_argument("--grpc-mode", choices=("thread", "aio"), default="thread")
+    parser.add_argument("--http-port", type=int, default=18100)
+    parser.add_argument("--grpc-port", type=int, default=18101)
+    parser.add_argument("--reuse-data", action="store_true", help="не засевать, если данные уже есть")
+    parser.add_argument("--keep-data", action="store_true", help="не удалять данные после прогона")
+    parser.add_argument("--docker-postgres", action="store_true", help="одноразовый postgres в docker")
+    parser.add_argument("--docker-image", default="postgres:16")
+    parser.add_argument("--docker-port", type=int, default=15432)
+    parser.add_argument("--output", help="файл для JSON-отчёта, по умолчанию stdout")
+    return parser.parse_args()
+
+
+class DockerPostgres:
+
+    def __init__(self, image: str, port: int):
+        self.image = image
+        self.port = port
+        self.name = f"svc-stats-bench-{os.getpid()}"
+
+    def start(self) -> dict:
+        subprocess.run([
+            "docker", "run", "-d", "--rm", "--name", self.name,
+            "-e", "POSTGRES_USER=postgres",
+            "-e", "POSTGRES_PASSWORD=postgres",
+            "-e", "POSTGRES_DB=bench",
+            "-p", f"127.0.0.1:{self.port}:5432",
+            self.image
+        ], check=True, stdout=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            ready = subprocess.run(
+                ["docker", "exec", self.name, "pg_isready", "-U", "postgres", "-d", "bench", "-h", "127.0.0.1"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            if ready.returncode == 0:
+                return {
+                    "POSTGRES_USER": "postgres",
+                    "POSTGRES_PASSWORD": "postgres",
+                    "POSTGRES_DB": "bench",
+                    "POSTGRES_HOST": "127.0.0.1",
+                    "POSTGRES_PORT": str(self.port)
+                }
+            time.sleep(0.5)
+        self.stop()
+        raise SystemExit("postgres в docker не поднялся")
+
+    def stop(self):
+        subprocess.run(["docker", "stop", self.name], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def start_service(args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        APP_HOST="127.0.0.1",
+        APP_PORT=str(args.http_port),
+        HTTP_WORKERS=str(args.http_workers),
+        HTTP_ACCESS_LOG="false",
+        GRPC_ENABLED="true",
+        GRPC_IN_PROCESS="false",
+        GRPC_HOST="127.0.0.1",
+        GRPC_PORT=str(args.grpc_port),
+        GRPC_PROCESSES=str(args.grpc_processes),
+        GRPC_SERVER_MODE=args.grpc_mode
+    )
+    service = subprocess.Popen([sys.executable, "-m", "app.launcher"], env=env)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{args.http_port}/ready").raise_for_status()
+            break
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    else:
+        service.terminate()
+        raise SystemExit("HTTP не поднялся")
+
+    channel = grpc.insecure_channel(f"127.0.0.1:{args.grpc_port}")
+    try:
+        grpc.channel_ready_future(channel).result(timeout=60)
+    except grpc.FutureTimeoutError:
+        service.terminate()
+        raise SystemExit("gRPC не поднялся")
+    finally:
+        channel.close()
+    return service
+
+
+class Scenarios:
+
+    def __init__(self, args, servers: list[str], http: httpx.AsyncClient, stub):
+        self.servers = servers
+        self.per_server = args.rows // args.servers
+        self.deep_page = max(1, self.per_server // PAGE_SIZE // 2)
+        self.http = http
+        self.stub = stub
+
+    def _player(self, rng: random.Random) -> tuple[str, str]:
+        from bench.common import player_id
+
+        server_index = rng.randrange(len(self.servers))
+        return str(player_id(server_index, rng.randrange(self.per_server))), self.servers[server_index]
+
+    @staticmethod
+    def _check(response: httpx.Response):
+        if response.status_code >= 300:
+            raise RequestFailed(f"HTTP_{response.status_code}")
+
+    async def rest_get(self, rng):
+        user_id, server_name = self._player(rng)
+        self._check(await self.http.get(f"/stats/{user_id}", params={"server_name": server_name}))
+
+    async def rest_leaderboard(self, rng):
+        self._check(await self.http.get("/stats", params={
+            "server_name": rng.choice(self.servers),
+            "sort": rng.choice(("kills", "deaths", "time_played")),
+            "pageSize": PAGE_SIZE
+        }))
+
+    async def rest_leaderboard_deep(self, rng):
+        self._check(await self.http.get("/stats", params={
+            "server_name": rng.choice(self.servers),
+            "sort": "kills",
+            "page": self.deep_page,
+            "pageSize": PAGE_SIZE
+        }))
+
+    async def rest_patch(self, rng):
+        user_id, server_name = self._player(rng)
+        self._check(await self.http.patch(
+            f"/stats/{user_id}",
+            params={"server_name": server_name},
+            json={"time_played": 60, "kills": 1, "deaths": 1}
+        ))
+
+    async def rest_post(self, rng):
+        self._check(await self.http.post(f"/stats/{uuid.uuid4()}", params={"server_name": rng.choice(self.servers)}))
+
+    async def grpc_get(self, rng):
+        import app.grpc.stats_pb2 as pb2
+
+        user_id, server_name = self._player(rng)
+        await self.stub.GetStats(pb2.GetStatsRequest(user_id=user_id, server_name=server_name))
+
+    async def grpc_update(self, rng):
+        import app.grpc.stats_pb2 as pb2
+
+        user_id, server_name = self._player(rng)
+        await self.stub.UpdateStats(pb2.UpdateStatsRequest(
+            user_id=user_id, server_name=server_name, time_played=60, kills=1, deaths=1
+        ))
+
+
+class RequestFailed(Exception):
+    pass
+
+
+async def drive(call, requests: int, concurrency: int) -> dict:
+    from bench.common import summarize
+
+    latencies = []
+    errors = {}
+    queue = iter(range(requests))
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        for _ in queue:
+            started = time.perf_counter()
+            try:
+                await call(rng)
+            except RequestFailed as exc:
+                errors[str(exc)] = errors.get(str(exc), 0) + 1
+                continue
+            except grpc.aio.AioRpcError as exc:
+                errors[exc.code().name] = errors.get(exc.code().name, 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+    report = summarize(latencies, time.perf_counter() - started) if latencies else {"calls": 0}
+    report["errors"] = errors
+    return report
+
+
+async def run_scenarios(args, servers: list[str], names: list[str]) -> dict:
+    import app.grpc.stats_pb2_grpc as pb2_grpc
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with (
+        httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.http_port}", limits=limits) as http,
+        grpc.aio.insecure_channel(f"127.0.0.1:{args.grpc_port}") as channel
+    ):
+        scenarios = Scenarios(args, servers, http, pb2_grpc.StatsServiceStub(channel))
+        return {
+            name: await drive(getattr(scenarios, name), args.requests, args.concurrency)
+            for name in names
+        }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    names = [name for name in args.scenarios.split(",") if name]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    docker = None
+    if args.docker_postgres:
+        docker = DockerPostgres(args.docker_image, args.docker_port)
+        os.environ.update(docker.start())
+
+    try:
+        # app.settings читает окружение при импорте — импортируем после выбора базы
+        from sqlalchemy import func, select
+
+        from app.database import SessionLocal
+        from app.models import ServerPlayerCount
+        from bench.common import drop_servers, prepare_schema, seed_servers
+
+        prepare_schema()
+        servers = [f"{PREFIX}-{i}" for i in range(args.servers)]
+        per_server = args.rows // args.servers
+
+        with SessionLocal() as db:
+            seeded = db.scalar(select(func.count()).where(
+                ServerPlayerCount.server_name.in_(servers),
+                ServerPlayerCount.players >= per_server
+            ))
+        seed_seconds = None
+        if not (args.reuse_data and seeded == len(servers)):
+            drop_servers(PREFIX)
+            started = time.perf_counter()
+            seed_servers(PREFIX, args.servers, args.rows)
+            seed_seconds = round(time.perf_counter() - started, 3)
+
+        service = start_service(args)
+        try:
+            results = asyncio.run(run_scenarios(args, servers, names))
+        finally:
+            service.terminate()
+            service.wait()
+
+        if not args.keep_data:
+            drop_servers(PREFIX)
+    finally:
+        if docker is not None:
+            docker.stop()
+
+    report = {
+        "config": {
+            "rows": per_server * args.servers,
+            "servers": args.servers,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "http_workers": args.http_workers,
+            "grpc_processes": args.grpc_processes,
+            "grpc_mode": args.grpc_mode,
+            "cpus": os.cpu_count(),
+            "revision": git_revision()
+        },
+        "seed_seconds": seed_seconds,
+        "results": results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()